@@ -0,0 +1,205 @@
+"""
+Admission control for POST /readings.
+
+Every reading ends up on the single SQLite writer, so one misconfigured
+controller can slow ingest for the whole fleet. Readings are admitted against
+two in-memory token buckets before any DB work is done:
+
+- a per-tool bucket (INGEST_TOOL_RATE / INGEST_TOOL_BURST)
+- a global bucket (INGEST_GLOBAL_RATE / INGEST_GLOBAL_BURST) that protects
+  the writer as a whole
+
+Excess readings are rejected with 429 and a Retry-After header, so
+well-behaved clients back off and retry.
+
+FAILURE-range readings get priority. They may overdraw their tool's bucket
+by one extra burst, and they alone may use the share of the global bucket
+that is held back by INGEST_FAILURE_RESERVE. Critical readings from a noisy
+tool still get through while its routine readings are being shed.
+
+The check runs as an async route dependency, on the event loop, before
+the sync handler takes a threadpool thread or opens a session, so shed
+readings cost little. Like the other ingest state, buckets live in process
+memory.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from fastapi import HTTPException, Request
+
+from .alerts import evaluate_reading
+from .config import (
+    INGEST_FAILURE_RESERVE,
+    INGEST_GLOBAL_BURST,
+    INGEST_GLOBAL_RATE,
+    INGEST_TOOL_BURST,
+    INGEST_TOOL_RATE,
+)
+
+# Upper bound on tracked per-tool buckets (ids are checked after admission)
+MAX_TRACKED_TOOLS = 100_000
+
+
+class TokenBucket:
+
+    """Refills at `rate` tokens/s up to `burst`. Not thread-safe on its own."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def can_take(self, floor: float) -> bool:
+        return self.tokens - 1 >= floor
+
+    def retry_after(self, floor: float) -> float:
+
+        """Seconds until one token can be taken without going below `floor`."""
+
+        return max(0.0, (floor + 1 - self.tokens) / self.rate)
+
+
+class AdmissionController:
+
+    """
+    Per-tool and global token buckets with FAILURE priority and shed metrics.
+
+    A rate of 0 disables that limit.
+    """
+
+    def __init__(self, tool_rate: float = INGEST_TOOL_RATE, tool_burst: float = INGEST_TOOL_BURST,
+                 global_rate: float = INGEST_GLOBAL_RATE, global_burst: float = INGEST_GLOBAL_BURST,
+                 failure_reserve: float = INGEST_FAILURE_RESERVE, clock = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.configure(tool_rate, tool_burst, global_rate, global_burst, failure_reserve)
+
+    def configure(self, tool_rate: float = INGEST_TOOL_RATE, tool_burst: float = INGEST_TOOL_BURST,
+                  global_rate: float = INGEST_GLOBAL_RATE, global_burst: float = INGEST_GLOBAL_BURST,
+                  failure_reserve: float = INGEST_FAILURE_RESERVE):
+
+        """Set limits, starting from full buckets and zeroed metrics."""
+
+        with self._lock:
+            self.tool_rate = tool_rate
+            self.tool_burst = max(tool_burst, 1.0)
+            self.global_rate = global_rate
+            self.global_burst = max(global_burst, 1.0)
+            self.failure_reserve = failure_reserve
+            self._tools = OrderedDict()
+            self._global = TokenBucket(global_rate, self.global_burst, self._clock()) if global_rate > 0 else None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.admitted = Counter()
+            self.shed = Counter()
+            self.shed_by_tool = Counter()
+            # FAILURE readings admitted only thanks to their priority
+            self.priority_admitted = 0
+
+    def admit(self, equipment_id: int, severity: str) -> float | None:
+
+        """
+        Take a token for one reading.
+
+        Returns None when admitted, otherwise the seconds to wait before retrying.
+        """
+
+        priority = severity == "FAILURE"
+        now = self._clock()
+        with self._lock:
+            tool = None
+            if self.tool_rate > 0:
+                tool = self._tools.get(equipment_id)
+                if tool is None:
+                    tool = self._tools[equipment_id] = TokenBucket(self.tool_rate, self.tool_burst, now)
+                    if len(self._tools) > MAX_TRACKED_TOOLS:
+                        self._tools.popitem(last = False)
+                else:
+                    self._tools.move_to_end(equipment_id)
+                tool.refill(now)
+            if self._global is not None:
+                self._global.refill(now)
+
+            tool_floor = -self.tool_burst if priority else 0.0
+            global_floor = 0.0 if priority else self.failure_reserve * self.global_burst
+
+            wait = None
+            if tool is not None and not tool.can_take(tool_floor):
+                wait, reason = tool.retry_after(tool_floor), "tool"
+            elif self._global is not None and not self._global.can_take(global_floor):
+                wait, reason = self._global.retry_after(global_floor), "global"
+
+            if wait is not None:
+                self.shed[(reason, severity)] += 1
+                self.shed_by_tool[equipment_id] += 1
+                return wait
+
+            if priority and ((tool is not None and not tool.can_take(0.0)) or
+                             (self._global is not None and not self._global.can_take(self.failure_reserve * self.global_burst))):
+                self.priority_admitted += 1
+            if tool is not None:
+                tool.tokens -= 1
+            if self._global is not None:
+                self._global.tokens -= 1
+            self.admitted[severity] += 1
+            return None
+
+    def stats(self, top: int = 10) -> dict:
+        with self._lock:
+            return {
+                "tool_rate": self.tool_rate,
+                "tool_burst": self.tool_burst,
+                "global_rate": self.global_rate,
+                "global_burst": self.global_burst,
+                "failure_reserve": self.failure_reserve,
+                "admitted": dict(self.admitted),
+                "admitted_total": sum(self.admitted.values()),
+                "shed": {f"{reason}:{severity}": n for (reason, severity), n in self.shed.items()},
+                "shed_total": sum(self.shed.values()),
+                "priority_admitted": self.priority_admitted,
+                "top_shed_tools": [
+                    {"equipment_id": equipment_id, "shed": n}
+                    for equipment_id, n in self.shed_by_tool.most_common(top)
+                ],
+            }
+
+
+# Shared controller used by the ingest endpoints.
+admission = AdmissionController()
+
+
+async def admit_reading(request: Request):
+
+    """
+    Route dependency for POST /readings: admit the reading or raise 429 with Retry-After.
+
+    Reads the JSON body itself (Starlette caches it for the handler).
+    Malformed bodies are left to the handler's validation.
+    """
+
+    try:
+        body = await request.json()
+        equipment_id = int(body["equipment_id"])
+        severity, _ = evaluate_reading(float(body["temperature"]), float(body["pressure"]), float(body["vibration"]))
+    except (ValueError, KeyError, TypeError):
+        return
+
+    wait = admission.admit(equipment_id, severity)
+    if wait is not None:
+        raise HTTPException(
+            status_code = 429,
+            detail = "Ingest rate limit exceeded",
+            headers = {"Retry-After": str(max(1, math.ceil(wait)))},
+        )
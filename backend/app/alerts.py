@@ -0,0 +1,53 @@
+"""
+Rule-based alert classification.
+
+Thresholds live here (not in main.py) so every component that classifies
+readings — the API, the ingest pipeline and offline jobs — shares one set of
+rules without importing the FastAPI app.
+"""
+
+# -----------------------------
+# Rule thresholds (v1: deterministic)
+# -----------------------------
+# These thresholds are intentionally simple + explainable:
+# - Great for early monitoring systems
+# - Easy to test
+# - Easy for engineers to trust and act on
+TEMP_WARN = 85.0
+TEMP_FAIL = 95.0
+
+VIB_WARN = 0.7
+VIB_FAIL = 0.9
+
+PRESSURE_LOW = 0.8
+PRESSURE_HIGH = 1.3
+
+def evaluate_reading(temp: float, pressure: float, vibration: float) -> tuple[str, str]:
+
+    """
+    Classify a single sensor reading into NORMAL / WARNING / FAILURE.
+
+    Returns:
+        (severity, reason)
+        severity: "NORMAL" | "WARNING" | "FAILURE"
+
+    Design principle:
+    FAILURE conditions have priority. If any critical limit is exceeded, we raise FAILURE
+    even if other fields are normal.
+    """
+
+    # FAILURE rules first
+    if temp > TEMP_FAIL:
+        return ("FAILURE", f"temperature > {TEMP_FAIL}")
+    if vibration > VIB_FAIL:
+        return ("FAILURE", f"vibration > {VIB_FAIL}")
+    if pressure < PRESSURE_LOW or pressure > PRESSURE_HIGH:
+        return ("FAILURE", f"pressure out of range [{PRESSURE_LOW}, {PRESSURE_HIGH}]") 
+    
+    # WARNING rules
+    if temp > TEMP_WARN:
+        return ("WARNING", f"temperature > {TEMP_WARN}")
+    if vibration > VIB_WARN:
+        return ("WARNING", f"vibration > {VIB_WARN}")
+
+    return ("NORMAL", "within normal thresholds")
@@ -0,0 +1,397 @@
+"""
+Cold-tier archive for old sensor readings.
+
+Years of raw readings in sensor_reading make the table and its indexes large
+and every write slower. Archival moves readings older than a cutoff out of the
+database into immutable columnar segments on disk:
+
+    ARCHIVE_DIR/equipment_<id>/<YYYY-MM-DD>_<min id>_<max id>/
+        id.npy  timestamp.npy  received_at.npy
+        temperature.npy  pressure.npy  vibration.npy  severity.npy
+        meta.json
+
+One segment holds one tool's readings for one UTC day, sorted by
+(timestamp, id). Segments are written to a temp directory and renamed into
+place, so readers never see a partial segment. Readers open the columns with
+np.load(mmap_mode="r") and slice them with a binary search on timestamp.
+
+Range and export queries (iter_range) merge archived rows with live rows in
+(timestamp, id) order. A row that is in both places because archival was
+interrupted is returned only once.
+
+Alerts of archived readings stay in the alerts table (unlinked: reading_id is
+set to NULL), so alert history is unchanged; the severity is also kept as a
+segment column. Rollups stay in the database, so trend views still cover
+archived ranges.
+
+Archival streams one tool-day at a time: each day is read with a bounded
+query, written as a segment and deleted in its own short transaction, so
+memory use and write-lock time do not grow with the size of the history.
+
+Usage:
+    python -m app.archive --older-than-days 90 --vacuum
+"""
+
+import argparse
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from .alerts import evaluate_reading
+from .config import ARCHIVE_AFTER_DAYS, ARCHIVE_DIR
+from .database import make_engine
+from .models import Alert, SensorReading
+
+SEVERITY_CODES = {"NORMAL": 0, "WARNING": 1, "FAILURE": 2}
+
+_FLOAT_COLUMNS = ("temperature", "pressure", "vibration")
+_MANIFEST = "manifest.json"
+
+
+def _to_datetime64(ts: datetime | None):
+    return np.datetime64(ts, "us") if ts is not None else np.datetime64("NaT", "us")
+
+
+class Segment:
+
+    """One immutable, memory-mapped segment (one tool, one day)."""
+
+    __slots__ = ("path", "equipment_id", "start", "end", "count", "min_id", "max_id", "_columns")
+
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self.equipment_id = meta["equipment_id"]
+        self.start = datetime.fromisoformat(meta["start"])
+        self.end = datetime.fromisoformat(meta["end"])
+        self.count = meta["count"]
+        self.min_id = meta["min_id"]
+        self.max_id = meta["max_id"]
+        self._columns = {}
+
+    def column(self, name: str) -> np.ndarray:
+
+        """Memory-mapped column; pages are read by the OS on access."""
+
+        col = self._columns.get(name)
+        if col is None:
+            col = np.load(os.path.join(self.path, name + ".npy"), mmap_mode = "r")
+            self._columns[name] = col
+        return col
+
+    def bounds(self, start: datetime | None, end: datetime | None) -> tuple[int, int]:
+
+        """Index range of rows with start <= timestamp < end."""
+
+        ts = self.column("timestamp")
+        lo = int(np.searchsorted(ts, _to_datetime64(start), "left")) if start is not None else 0
+        hi = int(np.searchsorted(ts, _to_datetime64(end), "left")) if end is not None else len(ts)
+        return lo, hi
+
+
+class SegmentStore:
+
+    """
+    Catalog of archived segments under one directory.
+
+    A tool's segment list is cached and re-read when its directory changes
+    (new segments are renamed into it), so API processes pick up segments
+    written by a separate archival run.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        # equipment_id -> (directory mtime_ns, [Segment sorted by start])
+        self._catalog = {}
+
+    def _tool_dir(self, equipment_id: int) -> str:
+        return os.path.join(self.root, f"equipment_{equipment_id}")
+
+    def segments(self, equipment_id: int) -> list[Segment]:
+        path = self._tool_dir(equipment_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            cached = self._catalog.get(equipment_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        found = []
+        for name in os.listdir(path):
+            seg_path = os.path.join(path, name)
+            meta_path = os.path.join(seg_path, "meta.json")
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            with open(meta_path) as f:
+                found.append(Segment(seg_path, json.load(f)))
+        found.sort(key = lambda s: (s.start, s.min_id))
+
+        with self._lock:
+            self._catalog[equipment_id] = (mtime, found)
+        return found
+
+    def write_segment(self, equipment_id: int, rows: list[tuple]) -> str:
+
+        """
+        Write rows (id, timestamp, received_at, temperature, pressure,
+        vibration, severity), sorted by (timestamp, id), as a new segment.
+        """
+
+        ids = [r[0] for r in rows]
+        name = f"{rows[0][1]:%Y-%m-%d}_{min(ids)}_{max(ids)}"
+        tool_dir = self._tool_dir(equipment_id)
+        final = os.path.join(tool_dir, name)
+        os.makedirs(tool_dir, exist_ok = True)
+        if os.path.exists(final):
+            # Same rows archived by an earlier, interrupted run
+            return final
+
+        tmp = tempfile.mkdtemp(prefix = ".tmp_", dir = tool_dir)
+        try:
+            columns = {
+                "id": np.array(ids, dtype = np.int64),
+                "timestamp": np.array([_to_datetime64(r[1]) for r in rows], dtype = "datetime64[us]"),
+                "received_at": np.array([_to_datetime64(r[2]) for r in rows], dtype = "datetime64[us]"),
+                "temperature": np.array([r[3] for r in rows], dtype = np.float64),
+                "pressure": np.array([r[4] for r in rows], dtype = np.float64),
+                "vibration": np.array([r[5] for r in rows], dtype = np.float64),
+                "severity": np.array([r[6] for r in rows], dtype = np.int8),
+            }
+            for col, values in columns.items():
+                np.save(os.path.join(tmp, col + ".npy"), values)
+            meta = {
+                "format": 1,
+                "equipment_id": equipment_id,
+                "count": len(rows),
+                "start": rows[0][1].isoformat(),
+                "end": rows[-1][1].isoformat(),
+                "min_id": min(ids),
+                "max_id": max(ids),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, final)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors = True)
+            raise
+        return final
+
+    def read_range(self, equipment_id: int, start: datetime | None = None,
+                   end: datetime | None = None) -> dict[str, np.ndarray]:
+
+        """
+        Archived columns for start <= timestamp < end, sorted by (timestamp, id).
+
+        Suited to scans and aggregates (e.g. read_range(...)["temperature"].mean()).
+        """
+
+        parts = []
+        for seg in self.segments(equipment_id):
+            if (start is not None and seg.end < start) or (end is not None and seg.start >= end):
+                continue
+            lo, hi = seg.bounds(start, end)
+            if hi > lo:
+                parts.append((seg, lo, hi))
+
+        names = ("id", "timestamp", "received_at", "temperature", "pressure", "vibration", "severity")
+        if not parts:
+            empty = {"id": np.int64, "severity": np.int8, "timestamp": "datetime64[us]", "received_at": "datetime64[us]"}
+            return {n: np.empty(0, dtype = empty.get(n, np.float64)) for n in names}
+
+        cols = {n: np.concatenate([seg.column(n)[lo:hi] for seg, lo, hi in parts]) for n in names}
+        if len(parts) > 1:
+            # Day segments are already in order unless a late segment overlaps another
+            order = np.lexsort((cols["id"], cols["timestamp"]))
+            if not np.all(order[1:] > order[:-1]):
+                cols = {n: c[order] for n, c in cols.items()}
+            keep = np.concatenate(([True], cols["id"][1:] != cols["id"][:-1]))
+            if not keep.all():
+                cols = {n: c[keep] for n, c in cols.items()}
+        return cols
+
+    def iter_rows(self, equipment_id: int, start: datetime | None = None, end: datetime | None = None):
+
+        """Yield archived (timestamp, id, temperature, pressure, vibration, received_at) in order."""
+
+        cols = self.read_range(equipment_id, start, end)
+        timestamps = cols["timestamp"].astype(object)
+        ids = cols["id"].tolist()
+        values = [cols[n].tolist() for n in _FLOAT_COLUMNS]
+        # NaT (no recorded arrival time) becomes None
+        return zip(timestamps, ids, *values, cols["received_at"].astype(object))
+
+    def archived_before(self) -> datetime | None:
+
+        """Newest cutoff applied so far (readings before it may be archived)."""
+
+        try:
+            with open(os.path.join(self.root, _MANIFEST)) as f:
+                return datetime.fromisoformat(json.load(f)["archived_before"])
+        except FileNotFoundError:
+            return None
+
+    def _record_cutoff(self, cutoff: datetime):
+        current = self.archived_before()
+        if current is not None and current >= cutoff:
+            return
+        os.makedirs(self.root, exist_ok = True)
+        tmp = os.path.join(self.root, _MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"archived_before": cutoff.isoformat()}, f)
+        os.replace(tmp, os.path.join(self.root, _MANIFEST))
+
+
+def iter_range(db, store: SegmentStore, equipment_id: int,
+               start: datetime | None = None, end: datetime | None = None, batch_size: int = 5000):
+
+    """
+    Yield a tool's readings with start <= timestamp < end from the archive and
+    the live table, as (timestamp, id, temperature, pressure, vibration,
+    received_at) in (timestamp, id) order. Live rows are streamed in batches.
+    """
+
+    query = (
+        db.query(
+            SensorReading.timestamp,
+            SensorReading.id,
+            SensorReading.temperature,
+            SensorReading.pressure,
+            SensorReading.vibration,
+            SensorReading.received_at,
+        )
+        .filter(SensorReading.equipment_id == equipment_id)
+    )
+    if start is not None:
+        query = query.filter(SensorReading.timestamp >= start)
+    if end is not None:
+        query = query.filter(SensorReading.timestamp < end)
+    live = (tuple(r) for r in query.order_by(SensorReading.timestamp, SensorReading.id).yield_per(batch_size))
+
+    previous_id = None
+    for row in heapq.merge(store.iter_rows(equipment_id, start, end), live, key = lambda r: r[:2]):
+        # A row left in both tiers by an interrupted archival run sorts next to itself
+        if row[1] != previous_id:
+            yield row
+        previous_id = row[1]
+
+
+def archive_readings(db, store: SegmentStore, cutoff: datetime,
+                     equipment_ids: list[int] | None = None) -> dict:
+
+    """
+    Move readings with timestamp < cutoff into segments, one tool-day at a time.
+
+    Each day's segment is written before its rows are deleted, and every day
+    commits on its own, so a crash leaves at most one day in both tiers
+    (de-duplicated on read) rather than losing it. Alerts are kept and
+    unlinked from the archived readings. Readings inserted while archival
+    runs are not touched.
+    """
+
+    max_id = db.query(func.max(SensorReading.id)).scalar() or 0
+    if equipment_ids is None:
+        equipment_ids = [
+            row[0] for row in
+            db.query(SensorReading.equipment_id)
+            .filter(SensorReading.timestamp < cutoff, SensorReading.id <= max_id)
+            .distinct()
+        ]
+
+    stats = {"tools": 0, "readings": 0, "segments": 0}
+    for equipment_id in equipment_ids:
+        in_scope = (
+            SensorReading.equipment_id == equipment_id,
+            SensorReading.timestamp < cutoff,
+            SensorReading.id <= max_id,
+        )
+        archived = 0
+        while True:
+            # Oldest remaining day of this tool (empty days are skipped)
+            first = db.query(func.min(SensorReading.timestamp)).filter(*in_scope).scalar()
+            if first is None:
+                break
+            day_start = datetime(first.year, first.month, first.day)
+            day = (*in_scope, SensorReading.timestamp >= day_start,
+                   SensorReading.timestamp < day_start + timedelta(days = 1))
+
+            rows = (
+                db.query(
+                    SensorReading.id,
+                    SensorReading.timestamp,
+                    SensorReading.received_at,
+                    SensorReading.temperature,
+                    SensorReading.pressure,
+                    SensorReading.vibration,
+                    Alert.severity,
+                )
+                .outerjoin(Alert, Alert.reading_id == SensorReading.id)
+                .filter(*day)
+                .order_by(SensorReading.timestamp, SensorReading.id)
+                .all()
+            )
+            store.write_segment(equipment_id, [
+                (r.id, r.timestamp, r.received_at, r.temperature, r.pressure, r.vibration,
+                 SEVERITY_CODES[r.severity or evaluate_reading(r.temperature, r.pressure, r.vibration)[0]])
+                for r in rows
+            ])
+
+            day_ids = select(SensorReading.id).where(*day)
+            db.execute(update(Alert).where(Alert.reading_id.in_(day_ids)).values(reading_id = None))
+            db.execute(delete(SensorReading).where(*day))
+            db.commit()
+            stats["segments"] += 1
+            archived += len(rows)
+
+        if archived:
+            stats["tools"] += 1
+            stats["readings"] += archived
+
+    store._record_cutoff(cutoff)
+    return stats
+
+
+def main(argv = None):
+    from .database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(description = "Move old sensor readings to the columnar archive.")
+    parser.add_argument("--older-than-days", type = float, default = ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--tools", help = "Comma-separated equipment ids (default: all)")
+    parser.add_argument("--vacuum", action = "store_true", help = "VACUUM afterwards to return space to the OS")
+    parser.add_argument("--database-url", default = DATABASE_URL)
+    parser.add_argument("--archive-dir", default = ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+
+    cutoff = datetime.utcnow() - timedelta(days = args.older_than_days)
+    engine = make_engine(args.database_url)
+    Session = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+    tools = [int(t) for t in args.tools.split(",")] if args.tools else None
+
+    with Session() as db:
+        stats = archive_readings(db, SegmentStore(args.archive_dir), cutoff, tools)
+    print(f"archived {stats['readings']} readings from {stats['tools']} tools into {stats['segments']} segments "
+          f"(before {cutoff.isoformat()})")
+
+    if args.vacuum:
+        # Deleted rows only free pages inside the file; VACUUM returns them to the OS
+        with engine.connect().execution_options(isolation_level = "AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    engine.dispose()
+
+
+# Shared store used by the API.
+archive = SegmentStore(ARCHIVE_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Async versions of the ingestion and query endpoints.
+
+Mounted instead of the sync router in main.py when DB_MODE=async. Handlers
+run on the event loop with an AsyncSession (aiosqlite / asyncpg), so slow
+queries wait without holding a threadpool thread.
+
+Shared sync helpers (ingest pipeline warm-up, rollup upserts) are called
+through AsyncSession.run_sync, which still performs their I/O through the
+async driver.
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .admission import admit_reading
+from .alerts import evaluate_reading
+from .cache import response_cache, versions
+from .config import HEALTH_BULK_MAX_IDS, HEALTH_WINDOW
+from .database import get_async_sessionmaker
+from .fleet import fleet
+from .health import compute_health, compute_status, next_status_change
+from .ingest import TOO_LATE, apply_rollup, pipeline, to_utc_naive
+from .models import Alert, Equipment, SensorReading
+from .schemas import (
+    AlertOut,
+    DashboardSummaryOut,
+    EquipmentOut,
+    HealthOut,
+    SensorReadingCreate,
+    SensorReadingOut,
+)
+
+router = APIRouter()
+
+_equipment_list_adapter = TypeAdapter(list[EquipmentOut])
+_equipment_adapter = TypeAdapter(EquipmentOut)
+_health_adapter = TypeAdapter(HealthOut)
+_summary_adapter = TypeAdapter(DashboardSummaryOut)
+_health_list_adapter = TypeAdapter(list[HealthOut])
+
+
+async def get_async_db():
+
+    """Dependency that provides an AsyncSession per request."""
+
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def _equipment_row(eq: Equipment) -> dict:
+    return {
+        "id": eq.id,
+        "name": eq.name,
+        "tool_type": eq.tool_type,
+        "location": eq.location,
+        "last_seen_at": eq.last_seen_at,
+        "status": compute_status(eq.last_seen_at),
+    }
+
+
+async def _recent_readings(db: AsyncSession, equipment_id: int, limit: int):
+    result = await db.execute(
+        select(SensorReading)
+        .where(SensorReading.equipment_id == equipment_id)
+        .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+# -----------------------------
+# Equipment APIs
+# -----------------------------
+@router.get("/equipment", response_model = list[EquipmentOut])
+async def list_equipment(request: Request, db: AsyncSession = Depends(get_async_db)):
+
+    """List all equipment (async)."""
+
+    async def build():
+        equipment = (await db.execute(select(Equipment))).scalars().all()
+        return [_equipment_row(e) for e in equipment], next_status_change(e.last_seen_at for e in equipment)
+
+    return await response_cache.serve_async(request, ("equipment",), versions.fleet(), build, _equipment_list_adapter)
+
+
+@router.get("/equipment/{equipment_id}", response_model = EquipmentOut)
+async def get_equipment(equipment_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+
+    """Fetch a single equipment record by ID (async)."""
+
+    async def build():
+        eq = await db.get(Equipment, equipment_id)
+        if not eq:
+            raise HTTPException(status_code = 404, detail = "Equipment not found")
+        return _equipment_row(eq), next_status_change([eq.last_seen_at])
+
+    return await response_cache.serve_async(
+        request, ("equipment", equipment_id), versions.equipment(equipment_id), build, _equipment_adapter
+    )
+
+
+# -----------------------------
+# Sensor Reading APIs
+# -----------------------------
+@router.post("/readings", response_model = SensorReadingOut, dependencies = [Depends(admit_reading)])
+async def add_reading(reading: SensorReadingCreate, db: AsyncSession = Depends(get_async_db)):
+
+    """
+    Ingest a sensor reading for a tool (async).
+
+    Same semantics as the sync endpoint: device timestamps, one alert per
+    reading, event-time state kept by the ingest pipeline, and admission
+    control before any DB work.
+    """
+
+    eq = await db.get(Equipment, reading.equipment_id)
+    if not eq:
+        raise HTTPException(status_code = 404, detail = "Equipment not found")
+
+    received_at = datetime.utcnow()
+    event_time = to_utc_naive(reading.timestamp) or received_at
+    if event_time - received_at > pipeline.lateness:
+        raise HTTPException(status_code = 422, detail = "Reading timestamp is too far in the future")
+
+    eq.last_seen_at = received_at
+    eq.status = "RUN"
+
+    state = await db.run_sync(pipeline.state_for, eq.id)
+    arrival = pipeline.classify_arrival(state, event_time)
+
+    sr = SensorReading(
+        equipment_id = reading.equipment_id,
+        temperature = reading.temperature,
+        pressure = reading.pressure,
+        vibration = reading.vibration,
+        timestamp = event_time,
+        received_at = received_at,
+    )
+    db.add(sr)
+    await db.flush()
+
+    severity, reason = evaluate_reading(sr.temperature, sr.pressure, sr.vibration)
+    db.add(Alert(
+        equipment_id = sr.equipment_id,
+        reading_id = sr.id,
+        severity = severity,
+        reason = reason,
+        create_at = event_time,
+    ))
+
+    if arrival != TOO_LATE:
+        await db.run_sync(
+            apply_rollup, sr.equipment_id, event_time, sr.temperature, sr.pressure, sr.vibration, severity
+        )
+
+    await db.commit()
+
+    pipeline.record(state, sr, severity, reason, arrival)
+    versions.bump(sr.equipment_id)
+    fleet.update(eq, state)
+    return sr
+
+
+@router.get("/equipment/{equipment_id}/readings", response_model = list[SensorReadingOut])
+async def get_readings(equipment_id: int, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+
+    """Most recent readings for a tool, newest first (async)."""
+
+    return await _recent_readings(db, equipment_id, limit)
+
+
+# -----------------------------
+# Alert APIs
+# -----------------------------
+@router.get("/equipment/{equipment_id}/alerts", response_model = list[AlertOut])
+async def get_equipment_alerts(equipment_id: int, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+
+    """Recent alerts for a tool (async)."""
+
+    result = await db.execute(
+        select(Alert)
+        .where(Alert.equipment_id == equipment_id)
+        .order_by(Alert.create_at.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/alerts/failure", response_model = list[AlertOut])
+async def get_failures(limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+
+    """Most recent FAILURE alerts across all equipment (async)."""
+
+    result = await db.execute(
+        select(Alert)
+        .where(Alert.severity == "FAILURE")
+        .order_by(Alert.create_at.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+# -----------------------------
+# Health APIs
+# -----------------------------
+@router.get("/equipment/{equipment_id}/health", response_model = HealthOut)
+async def get_equipment_health(equipment_id: int, request: Request, window: int = HEALTH_WINDOW,
+                               db: AsyncSession = Depends(get_async_db)):
+
+    """Health level and window counts for one tool (async)."""
+
+    async def build():
+        eq = await db.get(Equipment, equipment_id)
+        if not eq:
+            raise HTTPException(status_code = 404, detail = "Equipment not found")
+
+        if window == pipeline.window_size:
+            w = (await db.run_sync(pipeline.state_for, equipment_id)).window
+            level, warning_count, failure_count = w.level, w.warning_count, w.failure_count
+        else:
+            readings = await _recent_readings(db, equipment_id, window)
+            level, warning_count, failure_count = compute_health(readings)
+
+        data = {
+            "equipment_id": equipment_id,
+            "level": level,
+            "window": window,
+            "warning_count": warning_count,
+            "failure_count": failure_count,
+        }
+        return data, None
+
+    return await response_cache.serve_async(
+        request, ("health", equipment_id, window), versions.equipment(equipment_id), build, _health_adapter
+    )
+
+
+@router.get("/health", response_model = list[HealthOut])
+async def get_health_bulk(request: Request, ids: list[int] = Query(..., max_length = HEALTH_BULK_MAX_IDS),
+                          window: int = HEALTH_WINDOW, db: AsyncSession = Depends(get_async_db)):
+
+    """Health of many tools in one call, in the order of `ids` (async)."""
+
+    ids = list(dict.fromkeys(ids))
+
+    async def build():
+        result = await db.execute(select(Equipment.id).where(Equipment.id.in_(ids)))
+        found = set(result.scalars().all())
+        data = []
+        for equipment_id in ids:
+            if equipment_id not in found:
+                continue
+            if window == pipeline.window_size:
+                w = (await db.run_sync(pipeline.state_for, equipment_id)).window
+                level, warning_count, failure_count = w.level, w.warning_count, w.failure_count
+            else:
+                level, warning_count, failure_count = compute_health(await _recent_readings(db, equipment_id, window))
+            data.append({
+                "equipment_id": equipment_id,
+                "level": level,
+                "window": window,
+                "warning_count": warning_count,
+                "failure_count": failure_count,
+            })
+        return data, None
+
+    version = tuple(versions.equipment(i) for i in ids)
+    return await response_cache.serve_async(request, ("health", tuple(ids), window), version, build, _health_list_adapter)
+
+
+@router.get("/dashboard/summary", response_model = DashboardSummaryOut)
+async def dashboard_summary(request: Request, window: int = HEALTH_WINDOW, db: AsyncSession = Depends(get_async_db)):
+
+    """Fleet status and health counts (async)."""
+
+    async def build():
+        equipment = (await db.execute(select(Equipment))).scalars().all()
+
+        counts = {"RUN": 0, "DOWN": 0, "IDLE": 0, "HIGH": 0, "MED": 0, "LOW": 0}
+        for eq in equipment:
+            status = compute_status(eq.last_seen_at)
+            counts[status if status in counts else "IDLE"] += 1
+
+            if window == pipeline.window_size:
+                level = (await db.run_sync(pipeline.state_for, eq.id)).window.level
+            else:
+                level, _, _ = compute_health(await _recent_readings(db, eq.id, window))
+            counts[level] += 1
+
+        data = {
+            "total": len(equipment),
+            "run": counts["RUN"],
+            "idle": counts["IDLE"],
+            "down": counts["DOWN"],
+            "high": counts["HIGH"],
+            "med": counts["MED"],
+            "low": counts["LOW"],
+        }
+        return data, next_status_change(eq.last_seen_at for eq in equipment)
+
+    return await response_cache.serve_async(request, ("summary", window), versions.fleet(), build, _summary_adapter)
@@ -0,0 +1,415 @@
+"""
+Historical re-evaluation (backfill) of alerts and derived health.
+
+When rule thresholds change (see app/alerts.py), existing Alert rows and
+rollups still reflect the old rules. A backfill job re-runs classification
+over a time range and set of tools:
+
+- readings are streamed from sensor_reading in id-ordered chunks
+- tools are processed in parallel by a process pool (one tool per task)
+- alerts are upserted per reading, rollup buckets in the range are rebuilt
+- each tool is rebuilt up to its newest reading at the time its buckets are
+  cleared; readings ingested later keep the rollups live ingest gave them
+- every chunk commits together with a checkpoint, so a job can resume
+- each worker is throttled so live ingestion keeps getting the SQLite writer
+- a running server picks up jobs finished by the CLI within
+  BACKFILL_POLL_SECONDS (see jobs_finished_since) and drops its cached state
+  for the job's tools
+
+Usage:
+    python -m app.backfill --start 2025-01-01T00:00:00 --end 2025-02-01T00:00:00 --tools 1,2 --workers 4
+    python -m app.backfill --resume 7
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from .alerts import evaluate_reading
+from .archive import archive
+from .config import ROLLUP_BUCKET_SECONDS
+from .database import make_engine
+from .ingest import bucket_start, merge_rollup_row, rollup_row, to_utc_naive, upsert_insert, upsert_rollups
+from .models import Alert, BackfillCheckpoint, BackfillJob, Equipment, SensorReading, SensorRollup
+
+
+def _session_factory(database_url: str):
+    # make_engine sets a generous busy timeout: workers share the SQLite writer with live ingest.
+    engine = make_engine(database_url)
+    return engine, sessionmaker(autocommit = False, autoflush = False, bind = engine)
+
+
+def _reading_filter(query, job: BackfillJob, equipment_id: int, max_reading_id: int | None = None):
+    query = query.filter(
+        SensorReading.equipment_id == equipment_id,
+        SensorReading.id <= (job.max_reading_id if max_reading_id is None else max_reading_id),
+    )
+    if job.range_start is not None:
+        query = query.filter(SensorReading.timestamp >= job.range_start)
+    if job.range_end is not None:
+        query = query.filter(SensorReading.timestamp < job.range_end)
+    return query
+
+
+def create_job(db, start: datetime | None = None, end: datetime | None = None,
+               equipment_ids: list[int] | None = None, chunk_size: int = 1000,
+               max_rows_per_sec: float | None = None) -> BackfillJob:
+
+    """
+    Register a backfill job and one checkpoint per tool.
+
+    The range is widened to whole rollup buckets so rebuilt buckets never
+    lose readings that fall outside the requested bounds. It starts no
+    earlier than the archive cutoff: archived readings are no longer in the
+    table, so rebuilding their buckets would empty them.
+    """
+
+    def align_up(ts):
+        aligned = bucket_start(ts)
+        return aligned if aligned == ts else aligned + timedelta(seconds = ROLLUP_BUCKET_SECONDS)
+
+    start = to_utc_naive(start)
+    end = to_utc_naive(end)
+    if start is not None:
+        start = bucket_start(start)
+    if end is not None:
+        end = align_up(end)
+
+    archived_before = archive.archived_before()
+    if archived_before is not None:
+        floor = align_up(archived_before)
+        start = floor if start is None or start < floor else start
+
+    if equipment_ids is None:
+        equipment_ids = [row.id for row in db.query(Equipment.id).order_by(Equipment.id)]
+
+    job = BackfillJob(
+        range_start = start,
+        range_end = end,
+        equipment_ids = ",".join(str(i) for i in equipment_ids),
+        chunk_size = chunk_size,
+        max_rows_per_sec = max_rows_per_sec,
+        status = "PENDING",
+        max_reading_id = db.query(func.max(SensorReading.id)).scalar() or 0,
+    )
+    db.add(job)
+    db.flush()
+
+    total = 0
+    for equipment_id in equipment_ids:
+        total += _reading_filter(db.query(func.count(SensorReading.id)), job, equipment_id).scalar()
+        db.add(BackfillCheckpoint(job_id = job.id, equipment_id = equipment_id))
+    job.rows_total = total
+
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _clear_derived(db, job: BackfillJob, equipment_id: int) -> int:
+
+    """
+    Remove rollups and unlinked (legacy) alerts that the job will rebuild.
+
+    Returns the tool's newest reading id, read after the deletes in the same
+    transaction. The deletes take the SQLite write lock, so no ingest can
+    commit in between: readings up to the returned id are rebuilt by the
+    job, later ones were folded into the (now cleared) buckets by ingest.
+    """
+
+    rollups = db.query(SensorRollup).filter(SensorRollup.equipment_id == equipment_id)
+    legacy = db.query(Alert).filter(Alert.equipment_id == equipment_id, Alert.reading_id.is_(None))
+    if job.range_start is not None:
+        rollups = rollups.filter(SensorRollup.bucket_start >= job.range_start)
+        legacy = legacy.filter(Alert.create_at >= job.range_start)
+    if job.range_end is not None:
+        rollups = rollups.filter(SensorRollup.bucket_start < job.range_end)
+        legacy = legacy.filter(Alert.create_at < job.range_end)
+    rollups.delete(synchronize_session = False)
+    legacy.delete(synchronize_session = False)
+    return (
+        db.query(func.max(SensorReading.id))
+        .filter(SensorReading.equipment_id == equipment_id)
+        .scalar()
+    ) or 0
+
+
+def _upsert_alerts(db, rows: list[dict]):
+    stmt = upsert_insert(db, Alert).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements = ["reading_id"],
+        set_ = {"severity": stmt.excluded.severity, "reason": stmt.excluded.reason},
+    )
+    db.execute(stmt)
+
+
+def process_tool(database_url: str, job_id: int, equipment_id: int,
+                 max_rows_per_sec: float | None = None) -> int:
+
+    """
+    Re-classify one tool's readings for a job, resuming from its checkpoint.
+
+    Runs in a worker process, so it opens its own engine.
+    Returns the number of readings processed in this call.
+    """
+
+    engine, Session = _session_factory(database_url)
+    db = Session()
+    processed = 0
+    started = time.perf_counter()
+    try:
+        job = db.get(BackfillJob, job_id)
+        cp = (
+            db.query(BackfillCheckpoint)
+            .filter(BackfillCheckpoint.job_id == job_id, BackfillCheckpoint.equipment_id == equipment_id)
+            .one()
+        )
+        if cp.done:
+            return 0
+
+        # First visit: clear what will be rebuilt, atomically with the checkpoint.
+        if cp.last_reading_id is None:
+            cp.max_reading_id = _clear_derived(db, job, equipment_id)
+            cp.last_reading_id = 0
+            db.commit()
+
+        while True:
+            rows = (
+                _reading_filter(db.query(SensorReading), job, equipment_id, cp.max_reading_id)
+                .filter(SensorReading.id > cp.last_reading_id)
+                .order_by(SensorReading.id)
+                .limit(job.chunk_size)
+                .all()
+            )
+            if not rows:
+                cp.done = 1
+                db.commit()
+                break
+
+            alerts = []
+            buckets = {}
+            for r in rows:
+                severity, reason = evaluate_reading(r.temperature, r.pressure, r.vibration)
+                alerts.append({
+                    "equipment_id": equipment_id,
+                    "reading_id": r.id,
+                    "severity": severity,
+                    "reason": reason,
+                    "create_at": r.timestamp,
+                })
+                row = rollup_row(equipment_id, r.timestamp, r.temperature, r.pressure, r.vibration, severity)
+                if row["bucket_start"] in buckets:
+                    merge_rollup_row(buckets[row["bucket_start"]], row)
+                else:
+                    buckets[row["bucket_start"]] = row
+
+            # Chunk results and checkpoint commit together: a crash replays at most this chunk.
+            _upsert_alerts(db, alerts)
+            upsert_rollups(db, list(buckets.values()))
+            cp.last_reading_id = rows[-1].id
+            cp.rows_processed += len(rows)
+            db.commit()
+            processed += len(rows)
+
+            # Throttle: keep the average rate at or below the budget.
+            if max_rows_per_sec:
+                ahead = processed / max_rows_per_sec - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        return processed
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def job_progress(db, job_id: int) -> dict | None:
+
+    """Summarize a job's status, progress and throughput."""
+
+    job = db.get(BackfillJob, job_id)
+    if job is None:
+        return None
+
+    processed, tools_done = (
+        db.query(
+            func.coalesce(func.sum(BackfillCheckpoint.rows_processed), 0),
+            func.coalesce(func.sum(BackfillCheckpoint.done), 0),
+        )
+        .filter(BackfillCheckpoint.job_id == job_id)
+        .one()
+    )
+
+    elapsed = 0.0
+    if job.started_at is not None:
+        elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+    rate = (processed - job.rows_at_start) / elapsed if elapsed > 0 else 0.0
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "start": job.range_start,
+        "end": job.range_end,
+        "equipment_ids": [int(i) for i in job.equipment_ids.split(",") if i],
+        "rows_total": job.rows_total,
+        "rows_processed": processed,
+        "tools_done": tools_done,
+        # rows_total is estimated at creation; tools may pick up newer readings
+        "progress": min(1.0, processed / job.rows_total) if job.rows_total else 1.0,
+        "rows_per_sec": rate,
+        "elapsed_seconds": elapsed,
+        "error": job.error,
+    }
+
+
+def jobs_finished_since(db, since: datetime | None) -> tuple[datetime | None, list[int]]:
+
+    """
+    Jobs that finished (DONE or FAILED) after `since`, for servers watching
+    for backfills run by other processes.
+
+    Returns the newest finish time seen (`since` when there is none) and the
+    equipment ids those jobs covered.
+    """
+
+    query = db.query(BackfillJob.id, BackfillJob.finished_at).filter(BackfillJob.finished_at.isnot(None))
+    if since is not None:
+        query = query.filter(BackfillJob.finished_at > since)
+    jobs = query.all()
+    if not jobs:
+        return since, []
+
+    equipment_ids = [
+        equipment_id
+        for (equipment_id,) in db.query(BackfillCheckpoint.equipment_id)
+        .filter(BackfillCheckpoint.job_id.in_([job.id for job in jobs]))
+        .distinct()
+    ]
+    return max(job.finished_at for job in jobs), equipment_ids
+
+
+def run_job(database_url: str, job_id: int, workers: int = 2, on_progress = None) -> dict:
+
+    """
+    Run (or resume) a job until every tool is done.
+
+    With workers > 1, tools are spread over a process pool and the throughput
+    budget is split evenly between concurrently running tools.
+    `on_progress` is called with job_progress() about once a second.
+    """
+
+    engine, Session = _session_factory(database_url)
+    db = Session()
+    try:
+        job = db.get(BackfillJob, job_id)
+        pending = [
+            cp.equipment_id
+            for cp in db.query(BackfillCheckpoint)
+            .filter(BackfillCheckpoint.job_id == job_id, BackfillCheckpoint.done == 0)
+            .order_by(BackfillCheckpoint.equipment_id)
+        ]
+        job.status = "RUNNING"
+        job.error = None
+        job.started_at = datetime.utcnow()
+        job.finished_at = None
+        job.rows_at_start = job_progress(db, job_id)["rows_processed"]
+        db.commit()
+
+        parallel = max(1, min(workers, len(pending)))
+        rate = job.max_rows_per_sec / parallel if job.max_rows_per_sec else None
+
+        try:
+            if parallel == 1:
+                for equipment_id in pending:
+                    process_tool(database_url, job_id, equipment_id, rate)
+                    if on_progress:
+                        on_progress(job_progress(db, job_id))
+            else:
+                # Spawned, not forked: the API runs jobs from a thread of a process
+                # that holds an event loop and open DB connections
+                with ProcessPoolExecutor(max_workers = parallel,
+                                         mp_context = multiprocessing.get_context("spawn")) as pool:
+                    futures = [
+                        pool.submit(process_tool, database_url, job_id, equipment_id, rate)
+                        for equipment_id in pending
+                    ]
+                    while not all(f.done() for f in futures):
+                        time.sleep(1.0)
+                        if on_progress:
+                            db.expire_all()
+                            on_progress(job_progress(db, job_id))
+                    for f in futures:
+                        f.result()
+            job.status = "DONE"
+        except Exception as e:
+            # Checkpoints are intact; the job can be resumed.
+            db.rollback()
+            job.status = "FAILED"
+            job.error = str(e)[:500]
+
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        db.expire_all()
+        return job_progress(db, job_id)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def main(argv = None):
+    from .database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(
+        description = "Re-run alert classification over historical readings.",
+        epilog = "A server running on the same database drops its cached health and responses for "
+                 "the job's tools within BACKFILL_POLL_SECONDS of the job finishing.",
+    )
+    parser.add_argument("--start", help = "ISO timestamp (inclusive)")
+    parser.add_argument("--end", help = "ISO timestamp (exclusive)")
+    parser.add_argument("--tools", help = "Comma-separated equipment ids (default: all)")
+    parser.add_argument("--workers", type = int, default = 2)
+    parser.add_argument("--chunk-size", type = int, default = 1000)
+    parser.add_argument("--max-rows-per-sec", type = float, default = 5000.0,
+                        help = "Throughput cap across all workers (0 = unthrottled)")
+    parser.add_argument("--resume", type = int, help = "Resume an existing job id")
+    parser.add_argument("--database-url", default = DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    if args.resume is not None:
+        job_id = args.resume
+    else:
+        _, Session = _session_factory(args.database_url)
+        with Session() as db:
+            tools = [int(t) for t in args.tools.split(",")] if args.tools else None
+            job = create_job(
+                db,
+                start = _parse_time(args.start),
+                end = _parse_time(args.end),
+                equipment_ids = tools,
+                chunk_size = args.chunk_size,
+                max_rows_per_sec = args.max_rows_per_sec or None,
+            )
+            job_id = job.id
+        print(f"Created backfill job {job_id}")
+
+    def report(p):
+        print(
+            f"job {p['id']}: {p['rows_processed']}/{p['rows_total']} rows "
+            f"({p['progress']:.0%}), {p['tools_done']} tools done, {p['rows_per_sec']:.0f} rows/s"
+        )
+
+    result = run_job(args.database_url, job_id, workers = args.workers, on_progress = report)
+    report(result)
+    print(f"status: {result['status']}" + (f" ({result['error']})" if result["error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+HTTP response cache for polled read endpoints.
+
+Read endpoints only change when data changes, so each cached response is
+keyed on a data version that writes bump:
+
+- a per-equipment version, bumped when that tool ingests or is modified
+- a global version, bumped by any write (used by fleet-wide endpoints)
+
+A lookup compares versions held in memory, so an unchanged poll is answered
+(200 from cache, or 304 when If-None-Match matches) without touching the DB.
+Responses that depend on the clock (RUN/DOWN status) also carry a
+`valid_until` after which they are rebuilt.
+
+Memory is bounded by entry count and total body bytes, with LRU eviction.
+Like the ingest pipeline, versions live in process memory, so the app is
+served by a single process: a write handled by another process would never
+bump them. The lifespan hook enforces this (database.serving_lock).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from fastapi import Response
+
+from .config import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES
+
+CACHE_CONTROL = "no-cache"
+
+
+class DataVersions:
+
+    """Monotonic data versions, bumped by writes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global = 0
+        self._equipment = {}
+
+    def bump(self, *equipment_ids: int):
+
+        """Record a write touching the given tools (and the fleet as a whole)."""
+
+        with self._lock:
+            self._global += 1
+            for equipment_id in equipment_ids:
+                self._equipment[equipment_id] = self._equipment.get(equipment_id, 0) + 1
+
+    def fleet(self) -> int:
+        return self._global
+
+    def equipment(self, equipment_id: int) -> int:
+        return self._equipment.get(equipment_id, 0)
+
+
+class CacheEntry:
+
+    __slots__ = ("version", "valid_until", "body", "etag")
+
+    def __init__(self, version, valid_until, body: bytes):
+        self.version = version
+        self.valid_until = valid_until
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+
+    """Bounded LRU of serialized responses with hit/miss counters."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key, version, now: datetime | None = None) -> CacheEntry | None:
+        now = now or datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version or (entry.valid_until is not None and now >= entry.valid_until):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body: bytes, valid_until: datetime | None = None) -> CacheEntry:
+        entry = CacheEntry(version, valid_until, body)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+
+            # Bodies larger than the whole budget are served but not kept
+            if len(body) > self.max_bytes:
+                return entry
+
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last = False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def serve(self, request, key, version, build, adapter) -> Response:
+
+        """
+        Serve `key` from cache, or build, serialize and cache it.
+
+        `build()` does the DB work and returns (payload, valid_until);
+        `adapter` is a pydantic TypeAdapter for the endpoint's response model,
+        so cached bodies match what FastAPI would have produced.
+        """
+
+        entry = self.get(key, version)
+        if entry is None:
+            payload, valid_until = build()
+            entry = self._store(key, version, payload, valid_until, adapter)
+        return self._respond(request, entry)
+
+    async def serve_async(self, request, key, version, build, adapter) -> Response:
+
+        """Same as serve(), for async endpoints whose build() is a coroutine."""
+
+        entry = self.get(key, version)
+        if entry is None:
+            payload, valid_until = await build()
+            entry = self._store(key, version, payload, valid_until, adapter)
+        return self._respond(request, entry)
+
+    def _store(self, key, version, payload, valid_until, adapter) -> CacheEntry:
+        body = adapter.dump_json(adapter.validate_python(payload))
+        return self.put(key, version, body, valid_until)
+
+    def _respond(self, request, entry: CacheEntry) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+        if request.headers.get("if-none-match") == entry.etag:
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code = 304, headers = headers)
+        return Response(content = entry.body, media_type = "application/json", headers = headers)
+
+
+# Shared instances used by the API. Writes call versions.bump().
+versions = DataVersions()
+response_cache = ResponseCache()
@@ -0,0 +1,63 @@
+"""
+Runtime configuration.
+
+Values come from environment variables so a deployment can tune them without
+code changes. Defaults match the local development setup.
+"""
+
+import os
+
+# Default number of most recent readings used for health scoring.
+HEALTH_WINDOW = int(os.getenv("HEALTH_WINDOW", "50"))
+
+# How far (in seconds) a device timestamp may lag behind the newest reading
+# seen for the same tool and still be folded into rollups.
+LATENESS_WATERMARK_SECONDS = float(os.getenv("LATENESS_WATERMARK_SECONDS", "300"))
+
+# Width of a rollup bucket in seconds (per tool).
+ROLLUP_BUCKET_SECONDS = int(os.getenv("ROLLUP_BUCKET_SECONDS", "60"))
+
+# Response cache bounds for polled read endpoints.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# SQLAlchemy URL of the main database (sync driver form).
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./manufacturing.db")
+
+# "sync" serves the ingestion/query endpoints with a blocking Session on the
+# threadpool; "async" serves them with an AsyncSession (aiosqlite / asyncpg).
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# Run Alembic migrations from the app's lifespan hook. Disable when
+# migrations are applied as a separate deploy step (`alembic upgrade head`).
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") not in ("0", "false", "False")
+
+# Ingest admission control (token buckets per process). Rates are readings per
+# second; a rate of 0 disables that limit, and both are off by default (see
+# README for recommended values). The reserve is the share of the global
+# burst that only FAILURE-range readings may use.
+INGEST_TOOL_RATE = float(os.getenv("INGEST_TOOL_RATE", "0"))
+INGEST_TOOL_BURST = float(os.getenv("INGEST_TOOL_BURST", "10"))
+INGEST_GLOBAL_RATE = float(os.getenv("INGEST_GLOBAL_RATE", "0"))
+INGEST_GLOBAL_BURST = float(os.getenv("INGEST_GLOBAL_BURST", "1000"))
+INGEST_FAILURE_RESERVE = float(os.getenv("INGEST_FAILURE_RESERVE", "0.2"))
+
+# How often (seconds) the server checks for backfill jobs finished by other
+# processes (python -m app.backfill) to drop their tools' cached state; 0 disables.
+BACKFILL_POLL_SECONDS = float(os.getenv("BACKFILL_POLL_SECONDS", "5"))
+
+# Most tool ids accepted by one bulk health request (GET /health?ids=...).
+HEALTH_BULK_MAX_IDS = int(os.getenv("HEALTH_BULK_MAX_IDS", "1000"))
+
+# Cold-tier archive: directory for columnar reading segments, and the default
+# age (in days) after which `python -m app.archive` moves readings there.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# Optional sharded telemetry storage: comma-separated SQLAlchemy URLs, one per
+# shard. Empty keeps everything in DATABASE_URL.
+SHARD_URLS = [u.strip() for u in os.getenv("SHARD_URLS", "").split(",") if u.strip()]
+
+# How tools are assigned to shards: "equipment" (id modulo shard count) or
+# "location" (all tools of a bay share a shard).
+SHARD_KEY = os.getenv("SHARD_KEY", "equipment")
@@ -1,12 +1,251 @@
-from sqlalchemy import create_engine
+"""
+Database engine, sessions and schema management.
+
+Nothing here connects at import time. The engine is built on first use and
+the schema is brought up to date by Alembic migrations (see migrations/),
+which the app runs once from its lifespan hook.
+"""
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, inspect, make_url, text
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
+
+from .config import DATABASE_URL
+
+# Bound to the engine on first get_engine() call
+SessionLocal = sessionmaker(autocommit = False, autoflush = False)
+
+Base = declarative_base()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+# Revision matching the schema that create_all() used to build before migrations existed
+LEGACY_REVISION = "0001"
+
+# Connections the async SQLite engine shares between sessions
+ASYNC_SQLITE_POOL_SIZE = 20
+
+# pg_advisory_xact_lock key held while migrating (arbitrary, app-wide)
+MIGRATION_LOCK_KEY = 0x4D454D53
+
+# pg_advisory_lock key held by the process serving the database (see serving_lock)
+SERVER_LOCK_KEY = 0x4D454D55
+
+_engine = None
+
+
+def make_engine(url: str):
+
+    """
+    Sync engine with the settings the app, shards and CLI tools share.
+
+    Why:
+    - SQLite connections are opened per session (NullPool): opening one is
+      cheap, and sync sessions are closed by dependency teardown, which needs
+      a threadpool thread itself. With a bounded pool, finished requests still
+      waiting for teardown hold the connections that running requests wait
+      for, and the threadpool deadlocks until the checkout timeout.
+    - A 30 s busy timeout lets writers queue for the single SQLite writer.
+    """
+
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args = {"check_same_thread": False, "timeout": 30}, poolclass = NullPool)
+    return create_engine(url, pool_pre_ping = True)
+
+
+def get_engine():
+
+    """Build the sync engine on first use."""
+
+    if _engine is None:
+        bind_engine(make_engine(DATABASE_URL))
+    return _engine
+
+
+def bind_engine(engine):
+
+    """Serve the app's sessions from `engine` (tools and benchmarks using another database)."""
+
+    global _engine
+    _engine = engine
+    SessionLocal.configure(bind = engine)
+
+
+def __getattr__(name):
+    # Keeps `from .database import engine` working without building it at import
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _lock_for_migrations(conn):
+
+    """
+    Hold an exclusive, database-wide lock for the rest of the transaction.
+
+    Why:
+    - A deploy step (`alembic upgrade head`), the server and CLI tools may
+      all migrate the same database at once; without a lock they all see an
+      empty database and race to create the tables
+    - Waiters block until the first process commits, then find the schema
+      at head and have nothing left to do
+    """
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        # Waits up to the connection's busy timeout (30 s with make_engine)
+        conn.exec_driver_sql("BEGIN EXCLUSIVE")
+    elif dialect == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+@contextmanager
+def serving_lock(url: str = DATABASE_URL):
+
+    """
+    Hold the database for this server process, or raise RuntimeError.
+
+    Why:
+    - Response cache versions, health windows, the fleet snapshot and the
+      admission buckets live in process memory; a second process serving the
+      same database (uvicorn --workers N) never sees the first one's writes
+      and keeps answering 200s and 304s from stale state
+    - The lock is tied to the process (a file lock on SQLite, a session
+      advisory lock on PostgreSQL), so a crashed server never leaves it behind
+    """
+
+    if url.startswith("sqlite"):
+        path = make_url(url).database
+        if not path or path == ":memory:":
+            yield
+            return
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): not enforced
+            yield
+            return
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        with open(os.path.join(tempfile.gettempdir(), f"equipment-monitoring-{digest}.lock"), "w") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"Another server process is already serving {path}; run a single worker") from None
+            yield
+        return
+
+    with get_engine().connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SERVER_LOCK_KEY}).scalar():
+            raise RuntimeError("Another server process is already serving this database; run a single worker")
+        conn.commit()
+        try:
+            yield
+        finally:
+            # The connection goes back to the pool; session locks would stay with it
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SERVER_LOCK_KEY})
+            conn.commit()
+
+
+def run_migrations(engine = None, revision: str = "head"):
+
+    """
+    Upgrade the schema with Alembic.
+
+    Databases created by the old import-time create_all() have tables but no
+    alembic_version row; they are stamped at the legacy revision first, so
+    only the later changes (columns, indexes) are applied.
+
+    Runs under an exclusive lock, and the schema version is only read once
+    the lock is held, so concurrent callers migrate the database once.
+    """
+
+    from alembic import command
+    from alembic.config import Config
+
+    engine = engine or get_engine()
+    cfg = Config()
+    cfg.set_main_option("script_location", MIGRATIONS_DIR)
+
+    with engine.begin() as conn:
+        _lock_for_migrations(conn)
+        cfg.attributes["connection"] = conn
+        tables = inspect(conn).get_table_names()
+        if "equipment" in tables and "alembic_version" not in tables:
+            command.stamp(cfg, LEGACY_REVISION)
+        command.upgrade(cfg, revision)
+
+
+# Async drivers for the URL schemes we support
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def to_async_url(url: str) -> str:
+
+    """Map a sync database URL to its async driver (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+")[0]
+    if base not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{scheme}'")
+    return _ASYNC_DRIVERS[base] + sep + rest
+
+
+def make_async_engine(url: str):
+
+    """
+    Async engine with the same settings as make_engine.
+
+    Why:
+    - `url` is the sync URL; the async driver is picked by to_async_url
+    - SQLite gets the same 30 s busy timeout. Its busy handler retries by
+      sleeping, so it is not fair: with one connection per request, 1000
+      concurrent sessions starve some writers past the timeout
+      ("database is locked"). A bounded pool makes sessions queue in order
+      for a connection instead, and keeps the lock contention to the pool
+      size. Teardown is async here, so the sync threadpool deadlock that
+      make_engine avoids cannot happen.
+    """
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_url = to_async_url(url)
+    if async_url.startswith("sqlite"):
+        return create_async_engine(async_url, connect_args = {"timeout": 30},
+                                   pool_size = ASYNC_SQLITE_POOL_SIZE, max_overflow = 0)
+    return create_async_engine(async_url, pool_pre_ping = True)
+
+
+def get_async_sessionmaker():
+
+    """
+    Build the async engine on first use.
+
+    Kept lazy so sync deployments never import the async drivers.
+    """
+
+    if _async_sessionmaker is None:
+        bind_async_engine(make_async_engine(DATABASE_URL))
+    return _async_sessionmaker
+
 
-DATABASE_URL = "sqlite:///./manufacturing.db"
+def bind_async_engine(engine):
 
-engine = create_engine(
-    DATABASE_URL, connect_args = {"check_same_thread" : False}
-)
+    """Serve the async app's sessions from `engine` (benchmarks using another database)."""
 
-SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+    from sqlalchemy.ext.asyncio import async_sessionmaker
 
-Base = declarative_base()
\ No newline at end of file
+    global _async_engine, _async_sessionmaker
+    _async_engine = engine
+    # Objects stay usable after commit without an implicit (sync) refresh
+    _async_sessionmaker = async_sessionmaker(engine, autoflush = False, expire_on_commit = False)
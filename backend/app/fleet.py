@@ -0,0 +1,174 @@
+"""
+Fleet-wide health snapshot.
+
+The dashboard needs every tool's status, health level, window counts and
+latest reading. Rather than recomputing that per poll (one health query per
+tool), the snapshot keeps one pre-serialized JSON fragment per tool and
+updates only the tool that changed on ingest.
+
+Rendering joins the fragments and is cached until either the snapshot
+version changes or the next RUN -> DOWN transition is due. The body hash is
+the (strong) ETag, so unchanged polls can be answered with 304.
+
+State lives in process memory, like the ingest pipeline it reads from.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+
+from .health import compute_status, next_status_change
+from .ingest import pipeline
+from .models import Equipment
+
+
+def _iso(ts):
+    return ts.isoformat() if ts is not None else None
+
+
+def _fragment(eq, state) -> str:
+
+    """Serialize a tool row without its status (status depends on the clock)."""
+
+    latest = None
+    if state is not None and state.latest is not None:
+        latest = dict(state.latest, timestamp = _iso(state.latest["timestamp"]))
+
+    window = state.window if state is not None else None
+    row = {
+        "id": eq["id"],
+        "name": eq["name"],
+        "tool_type": eq["tool_type"],
+        "location": eq["location"],
+        "last_seen_at": _iso(eq["last_seen_at"]),
+        "level": window.level if window is not None else "LOW",
+        "warning_count": window.warning_count if window is not None else 0,
+        "failure_count": window.failure_count if window is not None else 0,
+        "latest_reading": latest,
+    }
+    return json.dumps(row, separators = (",", ":"))
+
+
+class FleetSnapshot:
+
+    """
+    Incrementally maintained fleet view.
+
+    `version` increases on every change, and callers can use it as a cheap
+    "has anything changed" signal.
+    """
+
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+        self._lock = threading.Lock()
+        self._tools = {}
+        self._loaded = False
+        self.version = 0
+        # (version, valid_until, body, etag)
+        self._cache = None
+
+    def reset(self):
+        with self._lock:
+            self._tools.clear()
+            self._loaded = False
+            self.version += 1
+            self._cache = None
+
+    def ensure_loaded(self, *dbs):
+
+        """
+        Build the snapshot from the DB once; later changes arrive via update().
+
+        With sharded storage, pass one session per shard.
+        """
+
+        if self._loaded:
+            return
+
+        tools = []
+        for db in dbs:
+            equipment = db.query(Equipment).order_by(Equipment.id).all()
+            self._pipeline.warm_all(db, [e.id for e in equipment])
+            tools.extend((e, self._pipeline.state_for(db, e.id)) for e in equipment)
+
+        with self._lock:
+            if self._loaded:
+                return
+            for e, state in tools:
+                self._set(e, state)
+            self._loaded = True
+            self.version += 1
+
+    def update(self, eq, state = None):
+
+        """
+        Refresh one tool after it was created or ingested a reading.
+
+        Ignored until the snapshot has been loaded; the initial load will
+        pick the tool up from the DB.
+        """
+
+        with self._lock:
+            if not self._loaded:
+                return
+            self._set(eq, state)
+            self.version += 1
+
+    def _set(self, eq, state):
+        meta = {
+            "id": eq.id,
+            "name": eq.name,
+            "tool_type": eq.tool_type,
+            "location": eq.location,
+            "last_seen_at": eq.last_seen_at,
+        }
+        self._tools[eq.id] = {
+            "last_seen_at": eq.last_seen_at,
+            "level": state.window.level if state is not None else "LOW",
+            "fragment": _fragment(meta, state),
+        }
+
+    def render(self, now: datetime | None = None) -> tuple[bytes, str]:
+
+        """Return (JSON body, ETag) for the current snapshot."""
+
+        now = now or datetime.utcnow()
+        with self._lock:
+            cache = self._cache
+            if cache is not None and cache[0] == self.version and now < cache[1]:
+                return cache[2], cache[3]
+
+            status_counts = {"RUN": 0, "DOWN": 0, "IDLE": 0}
+            level_counts = {"HIGH": 0, "MED": 0, "LOW": 0}
+            parts = []
+
+            for tool_id in sorted(self._tools):
+                tool = self._tools[tool_id]
+                status = compute_status(tool["last_seen_at"], now)
+                status_counts[status if status in status_counts else "IDLE"] += 1
+                level_counts[tool["level"]] += 1
+                parts.append('{"status":"%s",%s' % (status, tool["fragment"][1:]))
+
+            summary = {
+                "total": len(self._tools),
+                "run": status_counts["RUN"],
+                "idle": status_counts["IDLE"],
+                "down": status_counts["DOWN"],
+                "high": level_counts["HIGH"],
+                "med": level_counts["MED"],
+                "low": level_counts["LOW"],
+            }
+            body = (
+                '{"version":%d,"window":%d,"summary":%s,"tools":[%s]}'
+                % (self.version, self._pipeline.window_size, json.dumps(summary, separators = (",", ":")), ",".join(parts))
+            ).encode()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            # Cached output goes stale when the next RUN tool would flip to DOWN.
+            valid_until = next_status_change((t["last_seen_at"] for t in self._tools.values()), now) or datetime.max
+            self._cache = (self.version, valid_until, body, etag)
+            return body, etag
+
+
+# Shared snapshot used by the API.
+fleet = FleetSnapshot(pipeline)
@@ -0,0 +1,145 @@
+"""
+Window-based health scoring.
+
+Health is derived from the last N readings of a tool using the same
+deterministic rules as alerting, so the score is easy to explain.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from .alerts import evaluate_reading
+from .config import HEALTH_WINDOW
+
+
+# A tool that has not reported for this long is considered DOWN.
+DOWN_AFTER_SECONDS = 30
+
+def compute_status(last_seen_at, now = None):
+    if last_seen_at is None:
+        return "IDEL"
+    
+    now = now or datetime.utcnow()
+    return "DOWN" if (now - last_seen_at).total_seconds() > DOWN_AFTER_SECONDS else "RUN"
+
+
+def next_status_change(last_seen_values, now = None):
+
+    """
+    Earliest time at which any of these tools flips from RUN to DOWN
+    without a new reading, or None if none is currently RUN.
+
+    Lets cached views that show status know when they go stale.
+    """
+
+    now = now or datetime.utcnow()
+    flips = [
+        t + timedelta(seconds = DOWN_AFTER_SECONDS)
+        for t in last_seen_values
+        if compute_status(t, now) == "RUN"
+    ]
+    return min(flips) if flips else None
+
+
+def level_from_counts(n: int, warning_count: int, failure_count: int) -> str:
+
+    """
+    Map window counts to a health level (LOW / MED / HIGH).
+
+    Kept separate from compute_health so incremental structures can score
+    a window without re-evaluating every reading.
+    """
+
+    if n == 0:
+        return "LOW"
+
+    failure_rate = failure_count / n
+    warning_rate = warning_count / n
+
+    if failure_rate >= 0.10 or failure_count >= 3:
+        return "HIGH"
+    if failure_rate >= 0.02 or warning_rate >= 0.10 or warning_count >= 3:
+        return "MED"
+    return "LOW"
+
+
+def compute_health(readings) -> tuple[str, int, int]:
+
+    """
+    We compute health from the last N readings using the same deterministic
+    rules for transparency and testability.
+
+    Returns:
+        (level, warning_count, failure_count = compute_health(readings))
+    """
+    warning_count = 0
+    failure_count = 0
+
+    for r in readings:
+        severity, _ = evaluate_reading(r.temperature, r.pressure, r.vibration)
+        if severity == "FAILURE":
+            failure_count += 1
+        elif severity == "WARNING":
+            warning_count += 1
+
+    level = level_from_counts(len(readings), warning_count, failure_count)
+    return level, warning_count, failure_count
+
+
+class HealthWindow:
+
+    """
+    The latest N reading severities of one tool, ordered by device timestamp.
+
+    Readings may arrive out of order. Each one is inserted at its event-time
+    position and, once the window is full, the oldest entry falls out.
+    Counts are maintained on every insert, so scoring never rescans history.
+
+    Entries are keyed by (timestamp, reading_id), which matches the
+    newest-first ordering used by the readings queries and makes inserts
+    idempotent.
+    """
+
+    def __init__(self, size: int = HEALTH_WINDOW):
+        self.size = size
+        self._keys = []
+        self._severities = []
+        self.warning_count = 0
+        self.failure_count = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, timestamp, reading_id: int, severity: str) -> bool:
+
+        """
+        Insert a reading. Returns False if it is a duplicate or too old
+        to fall inside a full window.
+        """
+
+        key = (timestamp, reading_id)
+        if len(self._keys) >= self.size and key < self._keys[0]:
+            return False
+
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return False
+
+        self._keys.insert(i, key)
+        self._severities.insert(i, severity)
+        self._count(severity, 1)
+
+        if len(self._keys) > self.size:
+            self._keys.pop(0)
+            self._count(self._severities.pop(0), -1)
+        return True
+
+    def _count(self, severity: str, delta: int):
+        if severity == "FAILURE":
+            self.failure_count += delta
+        elif severity == "WARNING":
+            self.warning_count += delta
+
+    @property
+    def level(self) -> str:
+        return level_from_counts(len(self._keys), self.warning_count, self.failure_count)
@@ -0,0 +1,341 @@
+"""
+Out-of-order ingest pipeline.
+
+Readings carry a device-side timestamp, and batched or delayed uploads can
+reach the API in any order. This module keeps the per-tool state that must be
+derived in event-time order:
+
+- a rolling health window (latest N readings by device time)
+- the current alert state (severity of the newest reading by device time)
+- per-bucket rollups, which stay open until the lateness watermark passes them
+
+Each reading is folded into the state incrementally; nothing here rescans
+history. State is warmed once per tool from the last window of readings.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .alerts import evaluate_reading
+from .config import HEALTH_WINDOW, LATENESS_WATERMARK_SECONDS, ROLLUP_BUCKET_SECONDS
+from .health import HealthWindow
+from .models import Equipment, SensorReading, SensorRollup
+
+# Arrival classes relative to the newest device timestamp seen for the tool.
+ON_TIME = "on_time"      # newest so far
+LATE = "late"            # older than newest, but within the watermark
+TOO_LATE = "too_late"    # behind the watermark: stored raw, rollups not updated
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Tools per warm-up query (keeps the IN list under SQLite's bound-parameter limit)
+WARM_BATCH = 500
+
+
+def to_utc_naive(ts: datetime | None) -> datetime | None:
+
+    """
+    Normalize a timestamp to naive UTC, which is how the DB stores times.
+    Naive inputs are assumed to already be UTC.
+    """
+
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo = None)
+
+
+def bucket_start(ts: datetime, seconds: int = ROLLUP_BUCKET_SECONDS) -> datetime:
+
+    """Floor a naive UTC timestamp to the start of its rollup bucket."""
+
+    offset = int((ts - _EPOCH).total_seconds() // seconds) * seconds
+    return _EPOCH + timedelta(seconds = offset)
+
+
+def upsert_insert(db, model):
+
+    """
+    INSERT construct with ON CONFLICT support for the session's dialect.
+
+    SQLite and PostgreSQL share the on_conflict_do_update() API but compile
+    it from their own dialect's insert().
+    """
+
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def latest_readings(db, equipment_ids: list[int], limit: int):
+
+    """
+    SELECT of the newest `limit` readings (by device time) of each listed tool,
+    newest first, so warm-up sets each tool's latest reading once.
+
+    PostgreSQL runs a LATERAL subquery per tool; SQLite, which has no
+    LATERAL, matches reading ids against a correlated subquery. Both read
+    each tool's rows from the (equipment_id, timestamp, id) index and stop
+    after `limit`.
+    """
+
+    columns = (
+        SensorReading.id,
+        SensorReading.equipment_id,
+        SensorReading.temperature,
+        SensorReading.pressure,
+        SensorReading.vibration,
+        SensorReading.timestamp,
+    )
+    newest = (SensorReading.timestamp.desc(), SensorReading.id.desc())
+    tools = Equipment.id.in_(equipment_ids)
+
+    if db.get_bind().dialect.name == "postgresql":
+        window = (
+            select(*columns)
+            .where(SensorReading.equipment_id == Equipment.id)
+            .order_by(*newest)
+            .limit(limit)
+            .lateral()
+        )
+        return (
+            select(window).select_from(Equipment).join(window, true()).where(tools)
+            .order_by(window.c.equipment_id, window.c.timestamp.desc(), window.c.id.desc())
+        )
+
+    window_ids = (
+        select(SensorReading.id)
+        .where(SensorReading.equipment_id == Equipment.id)
+        .order_by(*newest)
+        .limit(limit)
+        .correlate(Equipment)
+    )
+    return (
+        select(*columns).select_from(Equipment).join(SensorReading, SensorReading.id.in_(window_ids)).where(tools)
+        .order_by(SensorReading.equipment_id, *newest)
+    )
+
+
+def upsert_rollups(db, rows: list[dict]):
+
+    """
+    Add pre-aggregated bucket rows into sensor_rollup with a single upsert.
+
+    Each row holds the rollup columns for one (equipment_id, bucket_start).
+    Existing buckets are merged (counts and sums added, extremes combined),
+    so callers can fold in any subset of readings exactly once.
+    The caller owns the transaction.
+    """
+
+    if not rows:
+        return
+
+    # Two-argument max()/min() are scalar in SQLite; PostgreSQL spells them greatest()/least()
+    if db.get_bind().dialect.name == "postgresql":
+        greater, lesser = func.greatest, func.least
+    else:
+        greater, lesser = func.max, func.min
+
+    stmt = upsert_insert(db, SensorRollup).values(rows)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements = ["equipment_id", "bucket_start"],
+        set_ = {
+            "count": SensorRollup.count + excluded.count,
+            "temperature_sum": SensorRollup.temperature_sum + excluded.temperature_sum,
+            "temperature_max": greater(SensorRollup.temperature_max, excluded.temperature_max),
+            "pressure_min": lesser(SensorRollup.pressure_min, excluded.pressure_min),
+            "pressure_max": greater(SensorRollup.pressure_max, excluded.pressure_max),
+            "vibration_sum": SensorRollup.vibration_sum + excluded.vibration_sum,
+            "vibration_max": greater(SensorRollup.vibration_max, excluded.vibration_max),
+            "warning_count": SensorRollup.warning_count + excluded.warning_count,
+            "failure_count": SensorRollup.failure_count + excluded.failure_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def rollup_row(equipment_id: int, event_time: datetime, temperature: float,
+               pressure: float, vibration: float, severity: str) -> dict:
+
+    """Build a single-reading rollup row for upsert_rollups()."""
+
+    return {
+        "equipment_id": equipment_id,
+        "bucket_start": bucket_start(event_time),
+        "count": 1,
+        "temperature_sum": temperature,
+        "temperature_max": temperature,
+        "pressure_min": pressure,
+        "pressure_max": pressure,
+        "vibration_sum": vibration,
+        "vibration_max": vibration,
+        "warning_count": 1 if severity == "WARNING" else 0,
+        "failure_count": 1 if severity == "FAILURE" else 0,
+    }
+
+
+def merge_rollup_row(row: dict, other: dict):
+
+    """Merge `other` into `row` in place (same tool and bucket)."""
+
+    row["count"] += other["count"]
+    row["temperature_sum"] += other["temperature_sum"]
+    row["temperature_max"] = max(row["temperature_max"], other["temperature_max"])
+    row["pressure_min"] = min(row["pressure_min"], other["pressure_min"])
+    row["pressure_max"] = max(row["pressure_max"], other["pressure_max"])
+    row["vibration_sum"] += other["vibration_sum"]
+    row["vibration_max"] = max(row["vibration_max"], other["vibration_max"])
+    row["warning_count"] += other["warning_count"]
+    row["failure_count"] += other["failure_count"]
+
+
+def apply_rollup(db, equipment_id: int, event_time: datetime, temperature: float,
+                 pressure: float, vibration: float, severity: str):
+
+    """Fold one reading into its rollup bucket."""
+
+    upsert_rollups(db, [rollup_row(equipment_id, event_time, temperature, pressure, vibration, severity)])
+
+
+class ToolState:
+
+    """Event-time state for a single tool."""
+
+    def __init__(self, window_size: int):
+        self.window = HealthWindow(window_size)
+        self.max_event_time = None
+        # Newest reading by device time, plus its classification.
+        self.latest = None
+
+    def _observe(self, reading, severity: str, reason: str):
+        self.window.add(reading.timestamp, reading.id, severity)
+
+        if self.max_event_time is None or reading.timestamp > self.max_event_time:
+            self.max_event_time = reading.timestamp
+
+        key = (reading.timestamp, reading.id)
+        if self.latest is None or key > (self.latest["timestamp"], self.latest["id"]):
+            self.latest = {
+                "id": reading.id,
+                "equipment_id": reading.equipment_id,
+                "temperature": reading.temperature,
+                "pressure": reading.pressure,
+                "vibration": reading.vibration,
+                "timestamp": reading.timestamp,
+                "severity": severity,
+                "reason": reason,
+            }
+
+
+class IngestPipeline:
+
+    """
+    Process-wide registry of ToolState objects.
+
+    Sync endpoints run on a threadpool, so all state changes go through a lock.
+    Inserts into the health window are idempotent, which keeps warm-up and a
+    concurrent record() for the same reading from double counting.
+    """
+
+    def __init__(self, lateness_seconds: float = LATENESS_WATERMARK_SECONDS,
+                 window_size: int = HEALTH_WINDOW):
+        self.lateness = timedelta(seconds = lateness_seconds)
+        self.window_size = window_size
+        self._states = {}
+        self._lock = threading.Lock()
+        self.stats = {ON_TIME: 0, LATE: 0, TOO_LATE: 0}
+
+    def reset(self):
+
+        """Drop all cached state (used by tests and after bulk rewrites)."""
+
+        with self._lock:
+            self._states.clear()
+            self.stats = {ON_TIME: 0, LATE: 0, TOO_LATE: 0}
+
+    def forget(self, equipment_ids):
+
+        """Drop cached state for some tools so it is re-warmed on next use."""
+
+        with self._lock:
+            for equipment_id in equipment_ids:
+                self._states.pop(equipment_id, None)
+
+    def state_for(self, db, equipment_id: int) -> ToolState:
+
+        """
+        Return the state for a tool, warming it from the DB on first use.
+
+        Warm-up reads only the last window of readings, not the full history.
+        """
+
+        with self._lock:
+            state = self._states.get(equipment_id)
+        if state is not None:
+            return state
+
+        rows = (
+            db.query(SensorReading)
+            .filter(SensorReading.equipment_id == equipment_id)
+            .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+            .limit(self.window_size)
+            .all()
+        )
+        state = ToolState(self.window_size)
+        for r in rows:
+            severity, reason = evaluate_reading(r.temperature, r.pressure, r.vibration)
+            state._observe(r, severity, reason)
+
+        with self._lock:
+            return self._states.setdefault(equipment_id, state)
+
+    def warm_all(self, db, equipment_ids):
+
+        """
+        Warm state for many tools with a few bounded queries.
+
+        Used when a fleet-wide view is first built, instead of one query per tool.
+        Each tool's window is read with a LIMIT from the (equipment_id,
+        timestamp, id) index, so warm-up costs O(tools x window) however long
+        the history is. Tools without readings get empty state so they are
+        not queried again.
+        """
+
+        equipment_ids = list(equipment_ids)
+        states = {equipment_id: ToolState(self.window_size) for equipment_id in equipment_ids}
+        for i in range(0, len(equipment_ids), WARM_BATCH):
+            stmt = latest_readings(db, equipment_ids[i:i + WARM_BATCH], self.window_size)
+            for r in db.execute(stmt):
+                severity, reason = evaluate_reading(r.temperature, r.pressure, r.vibration)
+                states[r.equipment_id]._observe(r, severity, reason)
+
+        with self._lock:
+            for equipment_id, state in states.items():
+                self._states.setdefault(equipment_id, state)
+
+    def classify_arrival(self, state: ToolState, event_time: datetime) -> str:
+
+        """Place a reading relative to the tool's lateness watermark."""
+
+        with self._lock:
+            newest = state.max_event_time
+        if newest is None or event_time >= newest:
+            return ON_TIME
+        if event_time >= newest - self.lateness:
+            return LATE
+        return TOO_LATE
+
+    def record(self, state: ToolState, reading, severity: str, reason: str, arrival: str):
+
+        """Fold a committed reading into the tool's in-memory state."""
+
+        with self._lock:
+            state._observe(reading, severity, reason)
+            self.stats[arrival] += 1
+
+
+# Shared pipeline used by the API.
+pipeline = IngestPipeline()
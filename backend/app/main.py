@@ -9,16 +9,32 @@ This service provides:
 
 """
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from datetime import datetime, timezone
-
-from .database import engine, SessionLocal
+from contextlib import asynccontextmanager, contextmanager
+from itertools import chain, islice
+import heapq
+import threading
+from pydantic import TypeAdapter
+
+from .database import SessionLocal, get_engine, run_migrations, serving_lock
+from .config import BACKFILL_POLL_SECONDS, DB_MODE, HEALTH_BULK_MAX_IDS, HEALTH_WINDOW, MIGRATE_ON_STARTUP
 from . import models
-from .models import Equipment, SensorReading, Alert
+from .models import Equipment, SensorReading, Alert, SensorRollup
+from .alerts import evaluate_reading
+from .health import compute_health, compute_status, next_status_change
+from .ingest import pipeline, apply_rollup, to_utc_naive, TOO_LATE
+from . import backfill
+from .fleet import fleet
+from .archive import archive, iter_range
+from .admission import admission, admit_reading
+from .sharding import shards
+from .cache import versions, response_cache, CACHE_CONTROL
 from .schemas import (
     EquipmentCreate,
     SensorReadingCreate,
@@ -26,17 +42,50 @@ from .schemas import (
     SensorReadingOut,
     AlertOut,
     HealthOut,
-    DashboardSummaryOut
+    DashboardSummaryOut,
+    RollupOut,
+    BackfillCreate,
+    BackfillOut,
+    FleetSnapshotOut,
 )
 
-# Create database tables at app startup (simple approach for development).
-# NOTE: Dev-only convenience. In production you'd use migration (Alembic).
-models.Base.metadata.create_all(bind = engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    """
+    Claim the database for this process and bring the schema up to date, before serving.
+
+    Why:
+    - Importing the app (tests, tooling) stays free of DB I/O
+    - Schema changes go through Alembic instead of create_all()
+    - Caches and ingest state live in this process, so a second server
+      process on the same database refuses to start (serving_lock)
+    - Backfills run by the CLI are picked up by a watcher thread
+    """
+
+    with serving_lock():
+        if MIGRATE_ON_STARTUP:
+            run_migrations()
+            if shards is not None:
+                shards.migrate()
+
+        stop = threading.Event()
+        watcher = None
+        if BACKFILL_POLL_SECONDS > 0:
+            watcher = threading.Thread(target = _watch_backfills, args = (stop,), name = "backfill-watcher", daemon = True)
+            watcher.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            if watcher is not None:
+                watcher.join()
 
 # FastAPI application instance (defines metadata shown in Swagger /docs)
 app = FastAPI(
     title="Manufacturing Equipment Monitoring System", 
     version="0.1.0",
+    lifespan = lifespan,
 )
 
 # CORS allows browser clients (Swagger UI, React frontend) to call this API.
@@ -48,51 +97,15 @@ app.add_middleware(
     allow_headers = ["*"],
 )
 
-# -----------------------------
-# Rule thresholds (v1: deterministic)
-# -----------------------------
-# These thresholds are intentionally simple + explainable:
-# - Great for early monitoring systems
-# - Easy to test
-# - Easy for engineers to trust and act on
-TEMP_WARN = 85.0
-TEMP_FAIL = 95.0
-
-VIB_WARN = 0.7
-VIB_FAIL = 0.9
-
-PRESSURE_LOW = 0.8
-PRESSURE_HIGH = 1.3
-
-def evaluate_reading(temp: float, pressure: float, vibration: float) -> tuple[str, str]:
-
-    """
-    Classify a single sensor reading into NORMAL / WARNING / FAILURE.
+# Ingestion and query endpoints that also have async versions (see async_api.py).
+# Only one of the two routers is mounted, selected by DB_MODE.
+sync_router = APIRouter()
 
-    Returns:
-        (severity, reason)
-        severity: "NORMAL" | "WARNING" | "FAILURE"
-
-    Design principle:
-    FAILURE conditions have priority. If any critical limit is exceeded, we raise FAILURE
-    even if other fields are normal.
-    """
-
-    # FAILURE rules first
-    if temp > TEMP_FAIL:
-        return ("FAILURE", f"temperature > {TEMP_FAIL}")
-    if vibration > VIB_FAIL:
-        return ("FAILURE", f"vibration > {VIB_FAIL}")
-    if pressure < PRESSURE_LOW or pressure > PRESSURE_HIGH:
-        return ("FAILURE", f"pressure out of range [{PRESSURE_LOW}, {PRESSURE_HIGH}]") 
-    
-    # WARNING rules
-    if temp > TEMP_WARN:
-        return ("WARNING", f"temperature > {TEMP_WARN}")
-    if vibration > VIB_WARN:
-        return ("WARNING", f"vibration > {VIB_WARN}")
-
-    return ("NORMAL", "within normal thresholds")
+_equipment_list_adapter = TypeAdapter(list[EquipmentOut])
+_equipment_adapter = TypeAdapter(EquipmentOut)
+_health_adapter = TypeAdapter(HealthOut)
+_summary_adapter = TypeAdapter(DashboardSummaryOut)
+_health_list_adapter = TypeAdapter(list[HealthOut])
 
 def get_db():
 
@@ -104,12 +117,45 @@ def get_db():
     - Always closes session to avoid connection leaks
     """
 
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_tool_db(equipment_id: int, db: Session = Depends(get_db)):
+
+    """
+    Dependency that provides the session holding one tool's telemetry.
+
+    Why:
+    - Without sharding this is the main session
+    - With sharded storage it is the tool's home shard (see sharding.py)
+    """
+
+    if shards is None:
+        yield db
+        return
+
+    shard = shards.shard_for(equipment_id)
+    if shard is None:
+        raise HTTPException(status_code = 404, detail = "Equipment not found")
+    tool_db = shards.session(shard)
+    try:
+        yield tool_db
+    finally:
+        tool_db.close()
+
+def _all_equipment(db: Session) -> list[Equipment]:
+
+    """Every tool, from the main database or merged from all shards."""
+
+    if shards is None:
+        return db.query(Equipment).all()
+    parts = shards.fan_out(lambda shard_db: shard_db.query(Equipment).all())
+    return sorted(chain.from_iterable(parts), key = lambda e: e.id)
+
 # -----------------------------
 # Basic health check
 # -----------------------------
@@ -139,8 +185,14 @@ def create_equipment(equipment: EquipmentCreate, db: Session = Depends(get_db)):
     )
     try:
         db.add(eq)
+        if shards is not None:
+            # Flush for the id (and the unique name check), then copy the row to its home shard
+            db.flush()
+            shards.add_equipment(eq)
         db.commit()
         db.refresh(eq)
+        versions.bump(eq.id)
+        fleet.update(eq)
         return eq
     except IntegrityError:
         # If name is unique and already exists, return a clear client error (409 Conflict)
@@ -150,31 +202,36 @@ def create_equipment(equipment: EquipmentCreate, db: Session = Depends(get_db)):
         )
 
 
-@app.get("/equipment", response_model=list[EquipmentOut])
-def list_equipment(db: Session = Depends(get_db)):
-    equipment = db.query(Equipment).all()
+@sync_router.get("/equipment", response_model=list[EquipmentOut])
+def list_equipment(request: Request, db: Session = Depends(get_db)):
 
     """
     List all equipment.
 
     Useful for dashboards and admin views.
+    Cached until any write or the next RUN -> DOWN transition.
     """
 
-    return [
-        {
-            "id": e.id,
-            "name": e.name,
-            "tool_type": e.tool_type,
-            "location": e.location,
-            "last_seen_at": e.last_seen_at,
-            "status": compute_status(e.last_seen_at),
-        }
-        for e in equipment
-    ]
+    def build():
+        equipment = _all_equipment(db)
+        data = [
+            {
+                "id": e.id,
+                "name": e.name,
+                "tool_type": e.tool_type,
+                "location": e.location,
+                "last_seen_at": e.last_seen_at,
+                "status": compute_status(e.last_seen_at),
+            }
+            for e in equipment
+        ]
+        return data, next_status_change(e.last_seen_at for e in equipment)
+
+    return response_cache.serve(request, ("equipment",), versions.fleet(), build, _equipment_list_adapter)
 
 
-@app.get("/equipment/{equipment_id}", response_model=EquipmentOut)
-def get_equipment(equipment_id: int, db: Session = Depends(get_db)):
+@sync_router.get("/equipment/{equipment_id}", response_model=EquipmentOut)
+def get_equipment(equipment_id: int, request: Request, db: Session = Depends(get_tool_db)):
 
     """
     Fetch a single equipment record by ID.
@@ -182,69 +239,126 @@ def get_equipment(equipment_id: int, db: Session = Depends(get_db)):
     Returns 404 if the tool does not exist.
     """
 
-    eq = db.query(Equipment).filter(Equipment.id == equipment_id).first()
-    if not eq:
-        raise HTTPException(status_code=404, detail="Equipment not found")
-    return {
-        "id": eq.id,
-        "name": eq.name,
-        "tool_type": eq.tool_type,
-        "location": eq.location,
-        "last_seen_at": eq.last_seen_at,
-        "status": compute_status(eq.last_seen_at),  
-    }
+    def build():
+        eq = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+        if not eq:
+            raise HTTPException(status_code=404, detail="Equipment not found")
+        data = {
+            "id": eq.id,
+            "name": eq.name,
+            "tool_type": eq.tool_type,
+            "location": eq.location,
+            "last_seen_at": eq.last_seen_at,
+            "status": compute_status(eq.last_seen_at),  
+        }
+        return data, next_status_change([eq.last_seen_at])
+
+    return response_cache.serve(
+        request, ("equipment", equipment_id), versions.equipment(equipment_id), build, _equipment_adapter
+    )
 
 
 # -----------------------------
 # Sensor Reading APIs
 # -----------------------------
-@app.post("/readings", response_model=SensorReadingOut)
+@sync_router.post("/readings", response_model=SensorReadingOut, dependencies=[Depends(admit_reading)])
 def add_reading(reading: SensorReadingCreate, db: Session = Depends(get_db)):
 
-
     """
     Ingest a sensor reading for a tool.
 
     Design choice:
     - Each reading also generates an Alert record.
       This converts raw time-series data into actionable events.
+    - The reading is stamped with the device timestamp when one is sent, so
+      batched or delayed uploads keep their measurement time. Arrival order
+      does not matter: health, alert state and rollups are kept in event-time
+      order by the ingest pipeline.
+    - With sharded storage the write goes to the tool's home shard, one
+      writer per shard, so tools on different shards ingest in parallel.
+    - Admission control runs first, as a route dependency: excess readings
+      get 429 + Retry-After before touching the database (see admission.py).
     """
 
+    if shards is None:
+        return _ingest(db, reading)
+
+    shard = shards.shard_for(reading.equipment_id)
+    if shard is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    with shards.writer(shard), shards.session(shard) as shard_db:
+        return _ingest(shard_db, reading)
+
+
+def _ingest(db: Session, reading: SensorReadingCreate) -> SensorReading:
+
+    """Store one reading with its alert and rollup, and update in-memory state."""
+
     # Validate equipment exists to avoid foreign key issues and provide a clean error to client
     eq = db.query(Equipment).filter(Equipment.id == reading.equipment_id).first()
-    eq.last_seen_at = datetime.utcnow()
-    eq.status = "RUN"
     if not eq:
         raise HTTPException(status_code=404, detail="Equipment not found")
 
+    received_at = datetime.utcnow()
+    event_time = to_utc_naive(reading.timestamp) or received_at
+
+    # A clock far in the future would push the watermark ahead and make every
+    # later reading from the tool look late, so reject it up front.
+    if event_time - received_at > pipeline.lateness:
+        raise HTTPException(status_code=422, detail="Reading timestamp is too far in the future")
+
+    # last_seen_at tracks connectivity, so it follows arrival time, not device time
+    eq.last_seen_at = received_at
+    eq.status = "RUN"
+
+    state = pipeline.state_for(db, eq.id)
+    arrival = pipeline.classify_arrival(state, event_time)
+
     # Store the raw sensor reading (ground truth / historical record)
     sr = SensorReading(
         equipment_id=reading.equipment_id,
         temperature=reading.temperature,
         pressure=reading.pressure,
         vibration=reading.vibration,
+        timestamp=event_time,
+        received_at=received_at,
     )
 
+    # Flush so the reading has an id the alert can reference
+    db.add(sr)
+    db.flush()
+
     # Convert the reading into an interpreted alert state (NORMAL/WARNING/FAILURE)
     severity, reason = evaluate_reading(sr.temperature, sr.pressure, sr.vibration)
 
-    # Store the alert event so clients can query failures/warnings without re-processing raw data
+    # Store the alert event so clients can query failures/warnings without re-processing raw data.
+    # Alerts are stamped with the measurement time so they sort with their readings.
     alert = Alert(
         equipment_id=sr.equipment_id,
+        reading_id=sr.id,
         severity=severity,
         reason=reason,
+        create_at=event_time,
     )
 
-    # Persist both reading + alert in one transaction for consistency
-    db.add(sr)
+    # Readings behind the watermark are kept as raw history only; their
+    # rollup buckets are already considered final.
+    if arrival != TOO_LATE:
+        apply_rollup(db, sr.equipment_id, event_time, sr.temperature, sr.pressure, sr.vibration, severity)
+
+    # Persist reading + alert + rollup in one transaction for consistency
     db.add(alert)
     db.commit()
     db.refresh(sr)
+
+    pipeline.record(state, sr, severity, reason, arrival)
+    versions.bump(sr.equipment_id)
+    fleet.update(eq, state)
     return sr
 
 
-@app.get("/equipment/{equipment_id}/readings", response_model=list[SensorReadingOut])
-def get_readings(equipment_id: int, limit: int = 50, db: Session = Depends(get_db)):
+@sync_router.get("/equipment/{equipment_id}/readings", response_model=list[SensorReadingOut])
+def get_readings(equipment_id: int, limit: int = 50, db: Session = Depends(get_tool_db)):
 
     """
     Return the most recent sensor readings for a specific tool.
@@ -257,18 +371,101 @@ def get_readings(equipment_id: int, limit: int = 50, db: Session = Depends(get_d
     readings = (
         db.query(SensorReading)
         .filter(SensorReading.equipment_id == equipment_id)
-        .order_by(SensorReading.timestamp.desc())
+        .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
         .limit(limit)
         .all()
     )
     return readings
 
 
+@app.get("/equipment/{equipment_id}/readings/range", response_model=list[SensorReadingOut])
+def get_readings_range(equipment_id: int, start: datetime | None = None, end: datetime | None = None,
+                       limit: int = 1000, db: Session = Depends(get_tool_db)):
+
+    """
+    Return readings with start <= timestamp < end, oldest first.
+
+    Readings older than the archive cutoff are read from the columnar
+    archive and merged with live rows, so callers do not need to know
+    which tier holds a range.
+    """
+
+    rows = islice(iter_range(db, archive, equipment_id, to_utc_naive(start), to_utc_naive(end)), limit)
+    return [
+        {"id": i, "equipment_id": equipment_id, "temperature": t, "pressure": p, "vibration": v, "timestamp": ts}
+        for ts, i, t, p, v, _ in rows
+    ]
+
+
+@app.get("/equipment/{equipment_id}/readings/export")
+def export_readings(equipment_id: int, start: datetime | None = None, end: datetime | None = None,
+                    db: Session = Depends(get_tool_db)):
+
+    """
+    Stream readings with start <= timestamp < end as CSV, oldest first.
+
+    Like the range query, this merges archived and live readings.
+    received_at (arrival time, empty if unknown) lets `python -m app.replay`
+    reproduce the recorded arrival schedule, late uploads included.
+    """
+
+    def lines():
+        yield "id,equipment_id,timestamp,temperature,pressure,vibration,received_at\n"
+        batch = []
+        for ts, i, t, p, v, rx in iter_range(db, archive, equipment_id, to_utc_naive(start), to_utc_naive(end)):
+            batch.append(f"{i},{equipment_id},{ts.isoformat()},{t},{p},{v},{rx.isoformat() if rx else ''}\n")
+            if len(batch) >= 1000:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+    filename = f"equipment_{equipment_id}_readings.csv"
+    return StreamingResponse(
+        lines(), media_type = "text/csv", headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/equipment/{equipment_id}/rollups", response_model=list[RollupOut])
+def get_rollups(equipment_id: int, limit: int = 60, db: Session = Depends(get_tool_db)):
+
+    """
+    Return the most recent rollup buckets (newest first) for a tool.
+
+    Rollups are aggregated per bucket of device time as readings arrive,
+    so trend views do not have to scan raw readings.
+    """
+
+    rows = (
+        db.query(SensorRollup)
+        .filter(SensorRollup.equipment_id == equipment_id)
+        .order_by(SensorRollup.bucket_start.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "equipment_id": r.equipment_id,
+            "bucket_start": r.bucket_start,
+            "count": r.count,
+            "temperature_avg": r.temperature_sum / r.count,
+            "temperature_max": r.temperature_max,
+            "pressure_min": r.pressure_min,
+            "pressure_max": r.pressure_max,
+            "vibration_avg": r.vibration_sum / r.count,
+            "vibration_max": r.vibration_max,
+            "warning_count": r.warning_count,
+            "failure_count": r.failure_count,
+        }
+        for r in rows
+    ]
+
+
 # -----------------------------
 # Alert APIs
 # -----------------------------
-@app.get("/equipment/{equipment_id}/alerts", response_model=list[AlertOut])
-def get_equipment_alerts(equipment_id: int, limit: int = 50, db: Session = Depends(get_db)):
+@sync_router.get("/equipment/{equipment_id}/alerts", response_model=list[AlertOut])
+def get_equipment_alerts(equipment_id: int, limit: int = 50, db: Session = Depends(get_tool_db)):
 
     """
     Return recent alerts for a specific tool.
@@ -286,96 +483,137 @@ def get_equipment_alerts(equipment_id: int, limit: int = 50, db: Session = Depen
     )
 
 
-@app.get("/alerts/failure", response_model=list[AlertOut])
+@sync_router.get("/alerts/failure", response_model=list[AlertOut])
 def get_failures(limit: int = 50, db: Session = Depends(get_db)):
 
     """
     Return the most recent FAILURE alerts across all equipment.
 
     Useful for a "global" dashboard that prioritizes urgent attention.
+    With sharded storage each shard returns its newest `limit` failures and
+    the lists are merged.
     """
 
-    return (
-        db.query(Alert)
-        # BUG FIX: "FAilURE" -> "FAILURE"
-        .filter(Alert.severity == "FAILURE")
-        .order_by(Alert.create_at.desc())
-        .limit(limit)
-        .all()
-    )
+    def newest_failures(db):
+        return (
+            db.query(Alert)
+            # BUG FIX: "FAilURE" -> "FAILURE"
+            .filter(Alert.severity == "FAILURE")
+            .order_by(Alert.create_at.desc())
+            .limit(limit)
+            .all()
+        )
 
+    if shards is None:
+        return newest_failures(db)
+    parts = shards.fan_out(newest_failures)
+    return list(islice(heapq.merge(*parts, key = lambda a: a.create_at, reverse = True), limit))
 
-def compute_health(readings: list[SensorReading]) -> tuple[str, int, int]:
+
+@sync_router.get("/equipment/{equipment_id}/health", response_model = HealthOut)
+def get_equipment_health(equipment_id: int, request: Request, window: int = HEALTH_WINDOW, db: Session = Depends(get_tool_db)):
 
     """
-    We compute health from the last N readings using the same deterministic
-    rules for transparency and testability.
+    Health level and window counts for one tool.
 
-    Returns:
-        (level, warning_count, failure_count = compute_health(readings))
+    Cached per tool until it ingests again.
     """
-    warning_count = 0
-    failure_count = 0
 
-    for r in readings:
-        severity, _ = evaluate_reading(r.temperature, r.pressure, r.vibration)
-        if severity == "FAILURE":
-            failure_count += 1
-        elif severity == "WARNING":
-            warning_count += 1
+    def build():
+        #Ensure equipment exists
+        eq = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+        if not eq:
+            raise HTTPException(status_code = 404, detail = "Equipment not found")
 
-    n = len(readings)
-    if n == 0:
-        return "LOW", 0 ,0
-    
-    failure_rate = failure_count / n
-    warning_rate = warning_count / n
+        # The default window is maintained incrementally on ingest
+        if window == pipeline.window_size:
+            w = pipeline.state_for(db, equipment_id).window
+            level, warning_count, failure_count = w.level, w.warning_count, w.failure_count
+        else:
+            readings = (
+                db.query(SensorReading)
+                .filter(SensorReading.equipment_id == equipment_id)
+                .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+                .limit(window)
+                .all()
+            )
+            level, warning_count, failure_count = compute_health(readings)
+
+        data = {
+            "equipment_id": equipment_id,
+            "level": level,
+            "window":   window,
+            "warning_count": warning_count,
+            "failure_count": failure_count,
+        }
+        return data, None
 
-    if failure_rate >= 0.10 or failure_count >= 3:
-        level = "HIGH"
-    elif failure_rate >= 0.02 or warning_rate >= 0.10 or warning_count >= 3:
-        level = "MED"
-    else:
-        level = "LOW"
-    
-    return level,warning_count, failure_count
-
-@app.get("/equipment/{equipment_id}/health", response_model = HealthOut)
-def get_equipment_health(equipment_id: int, window: int = 50, db: Session = Depends(get_db)):
-    #Ensure equipment exists
-    eq = db.query(Equipment).filter(Equipment.id == equipment_id).first()
-    if not eq:
-        raise HTTPException(status_code = 404, detail = "Equipment not found")
-    
-    readings = (
-        db.query(SensorReading)
-        .filter(SensorReading.equipment_id == equipment_id)
-        .order_by(SensorReading.timestamp.desc())
-        .limit(window)
-        .all()
+    return response_cache.serve(
+        request, ("health", equipment_id, window), versions.equipment(equipment_id), build, _health_adapter
     )
 
-    level, warning_count, failure_count = compute_health(readings)
 
-    return {
-        "equipment_id": equipment_id,
-        "level": level,
-        "window":   window,
-        "warning_count": warning_count,
-        "failure_count": failure_count,
-    }
+def _bulk_health(db: Session, ids: list[int], window: int) -> dict[int, dict]:
+
+    """Health of the requested tools found in one database, keyed by id."""
+
+    found = [row.id for row in db.query(Equipment.id).filter(Equipment.id.in_(ids))]
+    out = {}
+    for equipment_id in found:
+        if window == pipeline.window_size:
+            w = pipeline.state_for(db, equipment_id).window
+            level, warning_count, failure_count = w.level, w.warning_count, w.failure_count
+        else:
+            readings = (
+                db.query(SensorReading)
+                .filter(SensorReading.equipment_id == equipment_id)
+                .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+                .limit(window)
+                .all()
+            )
+            level, warning_count, failure_count = compute_health(readings)
+        out[equipment_id] = {
+            "equipment_id": equipment_id,
+            "level": level,
+            "window": window,
+            "warning_count": warning_count,
+            "failure_count": failure_count,
+        }
+    return out
+
 
-DOWN_AFTER_SECONDS = 30
+@sync_router.get("/health", response_model = list[HealthOut])
+def get_health_bulk(request: Request, ids: list[int] = Query(..., max_length = HEALTH_BULK_MAX_IDS),
+                    window: int = HEALTH_WINDOW, db: Session = Depends(get_db)):
 
-def compute_status(last_seen_at):
-    if last_seen_at is None:
-        return "IDEL"
-    
-    now = datetime.utcnow()
-    return "DOWN" if (now - last_seen_at).total_seconds() > DOWN_AFTER_SECONDS else "RUN"
+    """
+    Health of many tools in one call: GET /health?ids=1&ids=2&ids=3.
+
+    Why:
+    - A page showing N tools costs one request instead of N
+    - Results follow the order of `ids`; unknown ids are left out
+
+    Cached until one of the requested tools ingests; supports If-None-Match.
+    """
+
+    ids = list(dict.fromkeys(ids))
+
+    def build():
+        if shards is None:
+            found = _bulk_health(db, ids, window)
+        else:
+            found = {}
+            for part in shards.fan_out(lambda shard_db: _bulk_health(shard_db, ids, window)):
+                found.update(part)
+        return [found[i] for i in ids if i in found], None
+
+    version = tuple(versions.equipment(i) for i in ids)
+    return response_cache.serve(request, ("health", tuple(ids), window), version, build, _health_list_adapter)
+
+def _summary_counts(db: Session, window: int) -> tuple[dict, list]:
+
+    """Status and health counts for the tools in one database, plus their last_seen_at values."""
 
-@app.get("/dashboard/summary", response_model = DashboardSummaryOut)
-def dashboard_summary(window: int = 50, db: Session = Depends(get_db)):
     equipment = db.query(Equipment).all()
 
     # Status Counts
@@ -392,14 +630,17 @@ def dashboard_summary(window: int = 50, db: Session = Depends(get_db)):
     # Health Counts
     high = med = low = 0
     for eq in equipment:
-        readings = (
-            db.query(SensorReading)
-            .filter(SensorReading.equipment_id == eq.id)
-            .order_by(SensorReading.timestamp.desc())
-            .limit(window)
-            .all()
-        )
-        level, _, _ = compute_health(readings)
+        if window == pipeline.window_size:
+            level = pipeline.state_for(db, eq.id).window.level
+        else:
+            readings = (
+                db.query(SensorReading)
+                .filter(SensorReading.equipment_id == eq.id)
+                .order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+                .limit(window)
+                .all()
+            )
+            level, _, _ = compute_health(readings)
         if level == "HIGH":
             high += 1
         elif level == "MED":
@@ -407,7 +648,7 @@ def dashboard_summary(window: int = 50, db: Session = Depends(get_db)):
         else:
             low += 1
 
-    return {
+    data = {
         "total": len(equipment),
         "run": run,
         "idle": idle,
@@ -415,4 +656,220 @@ def dashboard_summary(window: int = 50, db: Session = Depends(get_db)):
         "high": high,
         "med": med,
         "low": low,
-    }
\ No newline at end of file
+    }
+    return data, [eq.last_seen_at for eq in equipment]
+
+
+@sync_router.get("/dashboard/summary", response_model = DashboardSummaryOut)
+def dashboard_summary(request: Request, window: int = HEALTH_WINDOW, db: Session = Depends(get_db)):
+
+    """
+    Fleet status and health counts.
+
+    Cached until any write or the next RUN -> DOWN transition.
+    With sharded storage every shard counts its own tools in parallel.
+    """
+
+    def build():
+        if shards is None:
+            data, last_seen = _summary_counts(db, window)
+        else:
+            parts = shards.fan_out(lambda shard_db: _summary_counts(shard_db, window))
+            data = {k: sum(counts[k] for counts, _ in parts) for k in parts[0][0]}
+            last_seen = list(chain.from_iterable(seen for _, seen in parts))
+        return data, next_status_change(last_seen)
+
+    return response_cache.serve(request, ("summary", window), versions.fleet(), build, _summary_adapter)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+
+    """Response cache size and hit/miss counters."""
+
+    return response_cache.stats()
+
+
+@app.get("/ingest/admission")
+def admission_stats():
+
+    """Ingest admission limits, admitted and shed reading counts, and the most-shed tools."""
+
+    return admission.stats()
+
+
+@app.get("/fleet/snapshot", response_model = FleetSnapshotOut)
+def fleet_snapshot(request: Request, db: Session = Depends(get_db)):
+
+    """
+    Every tool's status, health level, window counts and latest reading in one call.
+
+    Served from an in-memory snapshot that ingest keeps up to date, so a poll
+    costs no per-tool queries. Send the previous ETag in If-None-Match to get
+    304 Not Modified when nothing changed.
+    """
+
+    if shards is None:
+        fleet.ensure_loaded(db)
+    else:
+        with shards.sessions() as shard_dbs:
+            fleet.ensure_loaded(*shard_dbs)
+    body, etag = fleet.render()
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code = 304, headers = headers)
+    return Response(content = body, media_type = "application/json", headers = headers)
+
+
+# -----------------------------
+# Backfill APIs
+# -----------------------------
+# Jobs currently running in this process (guards against double resume)
+_running_backfills = set()
+
+def _invalidate_backfilled(equipment_ids):
+    # Cached health windows and responses were built with the old classification
+    pipeline.forget(equipment_ids)
+    versions.bump(*equipment_ids)
+    fleet.reset()
+
+
+@contextmanager
+def _backfill_databases():
+    # Backfill jobs live in the database they rewrite: each shard, or the single database
+    if shards is None:
+        get_engine()
+        with SessionLocal() as db:
+            yield [db]
+    else:
+        with shards.sessions() as shard_dbs:
+            yield shard_dbs
+
+
+def check_backfills(seen: dict):
+
+    """
+    Invalidate cached state for tools of backfill jobs finished since the last check.
+
+    `seen` holds the newest finish time per database between calls; the
+    first call only records it, since state built at startup is current.
+    """
+
+    with _backfill_databases() as dbs:
+        for i, db in enumerate(dbs):
+            newest, equipment_ids = backfill.jobs_finished_since(db, seen.get(i))
+            if i in seen and equipment_ids:
+                _invalidate_backfilled(equipment_ids)
+            seen[i] = newest
+
+
+def _watch_backfills(stop: threading.Event):
+
+    """
+    Poll for backfill jobs finished by other processes (python -m app.backfill).
+
+    Why:
+    - A CLI backfill rewrites alerts and rollups behind the server's back;
+      without this its health windows and ETags stay stale until restart
+    - Jobs started through the API invalidate as soon as they finish; the
+      watcher sees them again, which only costs a rebuild
+    """
+
+    seen = {}
+    while True:
+        try:
+            check_backfills(seen)
+        except Exception:
+            # Database busy or not migrated yet: try again next poll
+            pass
+        if stop.wait(BACKFILL_POLL_SECONDS):
+            return
+
+def _start_backfill(db: Session, job_id: int, equipment_ids: list[int], workers: int):
+
+    """Run a backfill job on a background thread of this process."""
+
+    database_url = db.get_bind().url.render_as_string(hide_password = False)
+    _running_backfills.add(job_id)
+
+    def run():
+        try:
+            backfill.run_job(database_url, job_id, workers = workers)
+        finally:
+            _running_backfills.discard(job_id)
+            _invalidate_backfilled(equipment_ids)
+
+    threading.Thread(target = run, name = f"backfill-{job_id}", daemon = True).start()
+
+
+def _require_unsharded():
+    # Jobs run against a single database; with shards, run the CLI once per shard URL
+    if shards is not None:
+        raise HTTPException(
+            status_code = 409,
+            detail = "Backfill jobs are per database; run `python -m app.backfill --database-url <shard>` for each shard",
+        )
+
+
+@app.post("/backfill", response_model = BackfillOut, status_code = 202)
+def create_backfill(req: BackfillCreate, db: Session = Depends(get_db)):
+
+    """
+    Start re-classifying historical readings with the current rules.
+
+    Alerts are upserted per reading and rollups in the range are rebuilt.
+    Progress is available from GET /backfill/{job_id}.
+    """
+
+    _require_unsharded()
+
+    job = backfill.create_job(
+        db,
+        start = req.start,
+        end = req.end,
+        equipment_ids = req.equipment_ids,
+        chunk_size = req.chunk_size,
+        max_rows_per_sec = req.max_rows_per_sec,
+    )
+    progress = backfill.job_progress(db, job.id)
+    _start_backfill(db, job.id, progress["equipment_ids"], req.workers)
+    return progress
+
+
+@app.get("/backfill/{job_id}", response_model = BackfillOut)
+def get_backfill(job_id: int, db: Session = Depends(get_db)):
+
+    """Report status, progress and throughput of a backfill job."""
+
+    progress = backfill.job_progress(db, job_id)
+    if progress is None:
+        raise HTTPException(status_code = 404, detail = "Backfill job not found")
+    return progress
+
+
+@app.post("/backfill/{job_id}/resume", response_model = BackfillOut, status_code = 202)
+def resume_backfill(job_id: int, workers: int = 2, db: Session = Depends(get_db)):
+
+    """Resume a FAILED or interrupted job from its checkpoints."""
+
+    _require_unsharded()
+
+    progress = backfill.job_progress(db, job_id)
+    if progress is None:
+        raise HTTPException(status_code = 404, detail = "Backfill job not found")
+    if progress["status"] == "DONE" or job_id in _running_backfills:
+        raise HTTPException(status_code = 409, detail = "Backfill job is already finished or running")
+    _start_backfill(db, job_id, progress["equipment_ids"], workers)
+    return progress
+
+
+# -----------------------------
+# Sync / async endpoint selection
+# -----------------------------
+if DB_MODE == "async":
+    if shards is not None:
+        raise RuntimeError("Sharded storage (SHARD_URLS) is only supported with DB_MODE=sync")
+    from .async_api import router as db_router
+else:
+    db_router = sync_router
+app.include_router(db_router)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from sqlalchemy.sql import func
@@ -17,6 +17,10 @@ class Equipment(Base):
 
 class SensorReading(Base):
     __tablename__ = "sensor_reading"
+    __table_args__ = (
+        # Newest-first window per tool (readings, health, warm-up)
+        Index("ix_sensor_reading_equipment_ts", "equipment_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key = True, index = True)
     equipment_id = Column(Integer, ForeignKey("equipment.id"))
@@ -24,15 +28,80 @@ class SensorReading(Base):
     pressure = Column(Float)
     vibration = Column(Float)
     timestamp = Column(DateTime(timezone = True), server_default = func.now())
+    # Server arrival time; `timestamp` is the device measurement time.
+    received_at = Column(DateTime, nullable = True)
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_equipment_created", "equipment_id", "create_at"),
+        Index("ix_alerts_severity_created", "severity", "create_at"),
+    )
 
     id = Column(Integer, primary_key = True, index = True)
     equipment_id = Column(Integer, ForeignKey("equipment.id"), index = True, nullable = False)
+    # Source reading; lets backfills upsert the alert for a reading in place.
+    # NULL for alerts created before readings were linked.
+    reading_id = Column(Integer, ForeignKey("sensor_reading.id"), unique = True, index = True, nullable = True)
 
     severity = Column(String, nullable = False)
     reason = Column(String, nullable = False)
     create_at = Column(DateTime, default = datetime.utcnow, nullable = False)
 
-    equipment = relationship("Equipment")
\ No newline at end of file
+    equipment = relationship("Equipment")
+
+class SensorRollup(Base):
+    __tablename__ = "sensor_rollup"
+    __table_args__ = (UniqueConstraint("equipment_id", "bucket_start", name = "uq_rollup_bucket"),)
+
+    # One row per tool per time bucket (device time), maintained incrementally on ingest.
+    id = Column(Integer, primary_key = True, index = True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id"), nullable = False)
+    bucket_start = Column(DateTime, nullable = False)
+
+    count = Column(Integer, nullable = False, default = 0)
+    temperature_sum = Column(Float, nullable = False, default = 0.0)
+    temperature_max = Column(Float, nullable = False)
+    pressure_min = Column(Float, nullable = False)
+    pressure_max = Column(Float, nullable = False)
+    vibration_sum = Column(Float, nullable = False, default = 0.0)
+    vibration_max = Column(Float, nullable = False)
+    warning_count = Column(Integer, nullable = False, default = 0)
+    failure_count = Column(Integer, nullable = False, default = 0)
+
+
+class BackfillJob(Base):
+    __tablename__ = "backfill_job"
+
+    # A re-classification run over a time range and set of tools.
+    id = Column(Integer, primary_key = True, index = True)
+    range_start = Column(DateTime, nullable = True)
+    range_end = Column(DateTime, nullable = True)
+    equipment_ids = Column(String, nullable = False)  # comma-separated
+    chunk_size = Column(Integer, nullable = False)
+    max_rows_per_sec = Column(Float, nullable = True)
+    status = Column(String, nullable = False, default = "PENDING")
+    rows_total = Column(Integer, nullable = False, default = 0)
+    # Highest reading id when the job was created; newer rows come from live ingest.
+    max_reading_id = Column(Integer, nullable = False, default = 0)
+    # rows_processed when the current run started (for throughput after a resume).
+    rows_at_start = Column(Integer, nullable = False, default = 0)
+    error = Column(String, nullable = True)
+    created_at = Column(DateTime, default = datetime.utcnow, nullable = False)
+    started_at = Column(DateTime, nullable = True)
+    finished_at = Column(DateTime, nullable = True)
+
+
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoint"
+    __table_args__ = (UniqueConstraint("job_id", "equipment_id", name = "uq_backfill_checkpoint"),)
+
+    # Per-tool progress, committed with each chunk so a job can resume.
+    id = Column(Integer, primary_key = True, index = True)
+    job_id = Column(Integer, ForeignKey("backfill_job.id"), nullable = False, index = True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id"), nullable = False)
+    last_reading_id = Column(Integer, nullable = True)
+    # Newest reading of the tool when its derived rows were cleared (rebuild bound)
+    max_reading_id = Column(Integer, nullable = True)
+    rows_processed = Column(Integer, nullable = False, default = 0)
+    done = Column(Integer, nullable = False, default = 0)
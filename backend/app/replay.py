@@ -0,0 +1,401 @@
+"""
+Replay recorded telemetry through the ingestion path.
+
+Used to check rule and threshold changes against real production traces and
+for capacity planning. Recorded readings are read from a database
+(sensor_reading) or from CSV files (the /readings/export format), and are sent
+to POST /readings at 1x to 1000x the recorded speed.
+
+- Inter-arrival timing is kept: a reading that arrived t seconds after the
+  first one is sent t / speed seconds after the replay starts. Arrival time is
+  received_at when recorded, otherwise the device timestamp.
+- Per-tool order is kept: each tool is pinned to one sender thread, which
+  sends its readings one at a time in recorded order.
+- Device timestamps keep their recorded lag behind arrival (--timestamps lag),
+  so late and out-of-order uploads look the same to the lateness watermark.
+
+Targets:
+- http: a running server (BASE_URL)
+- inprocess: calls the POST /readings handler directly with the configured
+  DATABASE_URL, without HTTP
+
+A reading shed with 429 (ingest admission control) is resent after its
+Retry-After, up to --retries times, by the same sender so per-tool order
+holds; retries delay that tool's later readings and show up as lag.
+
+The report covers the achieved vs target rate, lag behind schedule, request
+latency and alert latency. Alert latency is measured from a WARNING/FAILURE
+reading's scheduled send time until its alert is committed, which is when
+the POST returns.
+
+Usage:
+    python -m app.replay --csv trace.csv --speed 100 --target http --base-url http://127.0.0.1:8000
+    python -m app.replay --database-url sqlite:///./recorded.db --start 2025-01-01T00:00:00 --speed 1000 --target inprocess
+"""
+
+import argparse
+import csv
+import heapq
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from .alerts import evaluate_reading
+from .database import make_engine
+from .models import SensorReading
+
+MIN_SPEED = 1.0
+MAX_SPEED = 1000.0
+
+# One recorded reading; tuples sort by arrival time, then id
+Recorded = namedtuple("Recorded", "arrival id equipment_id timestamp temperature pressure vibration")
+
+
+# -----------------------------
+# Sources
+# -----------------------------
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def read_csv(paths: list[str]):
+
+    """
+    Recorded readings from CSV files, merged in arrival order.
+
+    Columns: id, equipment_id, timestamp, temperature, pressure, vibration and
+    optionally received_at.
+    """
+
+    def load(path):
+        with open(path, newline = "") as f:
+            rows = []
+            for r in csv.DictReader(f):
+                ts = _parse_time(r["timestamp"])
+                rows.append(Recorded(
+                    arrival = _parse_time(r.get("received_at")) or ts,
+                    id = int(r["id"]),
+                    equipment_id = int(r["equipment_id"]),
+                    timestamp = ts,
+                    temperature = float(r["temperature"]),
+                    pressure = float(r["pressure"]),
+                    vibration = float(r["vibration"]),
+                ))
+        rows.sort()
+        return rows
+
+    return heapq.merge(*(load(p) for p in paths))
+
+
+def read_database(database_url: str, start: datetime | None = None, end: datetime | None = None,
+                  equipment_ids: list[int] | None = None, batch_size: int = 5000):
+
+    """Recorded readings from a database, streamed in arrival order."""
+
+    engine = make_engine(database_url)
+    Session = sessionmaker(bind = engine)
+    arrival = func.coalesce(SensorReading.received_at, SensorReading.timestamp)
+    try:
+        with Session() as db:
+            query = db.query(
+                arrival,
+                SensorReading.id,
+                SensorReading.equipment_id,
+                SensorReading.timestamp,
+                SensorReading.temperature,
+                SensorReading.pressure,
+                SensorReading.vibration,
+            )
+            if start is not None:
+                query = query.filter(arrival >= start)
+            if end is not None:
+                query = query.filter(arrival < end)
+            if equipment_ids:
+                query = query.filter(SensorReading.equipment_id.in_(equipment_ids))
+            for row in query.order_by(arrival, SensorReading.id).yield_per(batch_size):
+                yield Recorded(*row)
+    finally:
+        engine.dispose()
+
+
+# -----------------------------
+# Targets
+# -----------------------------
+class HttpTarget:
+
+    """POST /readings on a running server; one HTTP session per sender thread."""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def sender(self):
+        import httpx
+
+        client = httpx.Client(base_url = self.base_url, timeout = self.timeout)
+
+        def send(payload: dict) -> tuple[int, float | None]:
+            try:
+                r = client.post("/readings", json = payload)
+            except httpx.HTTPError:
+                # Counted as status 0 (connection error / timeout)
+                return 0, None
+            retry_after = r.headers.get("Retry-After")
+            return r.status_code, float(retry_after) if retry_after else None
+        return send
+
+    def ensure_tool(self, name: str) -> int:
+        import httpx
+
+        with httpx.Client(base_url = self.base_url, timeout = self.timeout) as client:
+            r = client.post("/equipment", json = {"name": name, "tool_type": "Replay", "location": "Replay"})
+            if r.status_code == 409:
+                return next(t["id"] for t in client.get("/equipment").json() if t["name"] == name)
+            r.raise_for_status()
+            return r.json()["id"]
+
+
+class InProcessTarget:
+
+    """Call the POST /readings handler directly, one DB session per reading."""
+
+    def __init__(self):
+        from . import main
+        from .config import MIGRATE_ON_STARTUP
+        from .database import SessionLocal, get_engine, run_migrations
+
+        # Same startup work as the app's lifespan hook
+        if MIGRATE_ON_STARTUP:
+            run_migrations()
+        get_engine()
+        self._main = main
+        self._Session = SessionLocal
+
+    def sender(self):
+        from fastapi import HTTPException
+
+        from .schemas import SensorReadingCreate
+
+        def send(payload: dict) -> tuple[int, float | None]:
+            db = self._Session()
+            try:
+                self._main.add_reading(SensorReadingCreate(**payload), db)
+                return 200, None
+            except HTTPException as e:
+                return e.status_code, None
+            finally:
+                db.close()
+        return send
+
+    def ensure_tool(self, name: str) -> int:
+        from fastapi import HTTPException
+
+        from .models import Equipment
+        from .schemas import EquipmentCreate
+
+        with self._Session() as db:
+            try:
+                return self._main.create_equipment(
+                    EquipmentCreate(name = name, tool_type = "Replay", location = "Replay"), db
+                ).id
+            except HTTPException:
+                return db.query(Equipment.id).filter(Equipment.name == name).scalar()
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    samples = sorted(samples)
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+    }
+
+
+def replay(events, target, speed: float = 1.0, workers: int = 8, timestamps: str = "lag",
+           tool_map: dict | None = None, limit: int | None = None, retries: int = 3) -> dict:
+
+    """
+    Send recorded readings to `target` on the recorded schedule, scaled by `speed`.
+
+    `events` must be in arrival order (as produced by read_csv/read_database).
+    `tool_map` maps recorded equipment ids to target ids. With
+    timestamps="none", readings are sent without a device timestamp.
+    A 429 is retried after its Retry-After (1 s if absent) up to `retries`
+    times; a reading still shed after that is reported under errors, as is a
+    reading whose send raised (keyed by exception name).
+    Returns a report dict; times are in milliseconds.
+    """
+
+    if not MIN_SPEED <= speed <= MAX_SPEED:
+        raise ValueError(f"speed must be between {MIN_SPEED:g} and {MAX_SPEED:g}")
+    if timestamps not in ("lag", "none"):
+        raise ValueError("timestamps must be 'lag' or 'none'")
+
+    lock = threading.Lock()
+    statuses = Counter()
+    retried = 0
+    lags, latencies, alert_latencies = [], [], []
+    # Bounded queues keep the reader from running far ahead of the senders
+    queues = [queue.Queue(maxsize = 1000) for _ in range(workers)]
+
+    def deliver(send, due, rec):
+        nonlocal retried
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+
+        payload = {
+            "equipment_id": tool_map.get(rec.equipment_id, rec.equipment_id) if tool_map else rec.equipment_id,
+            "temperature": rec.temperature,
+            "pressure": rec.pressure,
+            "vibration": rec.vibration,
+        }
+        if timestamps == "lag" and rec.timestamp is not None:
+            # Same lag behind arrival as recorded, anchored to the real send time
+            payload["timestamp"] = (datetime.utcnow() - (rec.arrival - rec.timestamp)).isoformat()
+
+        status, retry_after = send(payload)
+        tries = 0
+        while status == 429 and tries < retries:
+            time.sleep(retry_after or 1.0)
+            tries += 1
+            status, retry_after = send(payload)
+        done = time.perf_counter()
+        severity, _ = evaluate_reading(rec.temperature, rec.pressure, rec.vibration)
+        with lock:
+            retried += tries
+            statuses[status] += 1
+            lags.append((sent - due) * 1000)
+            latencies.append((done - sent) * 1000)
+            if status == 200 and severity != "NORMAL":
+                alert_latencies.append((done - due) * 1000)
+
+    def run_sender(q):
+        # Any failure is reported under errors by exception name, and the
+        # sender keeps draining its queue, so the reader never blocks on a full one
+        try:
+            send, setup_error = target.sender(), None
+        except Exception as e:
+            send, setup_error = None, type(e).__name__
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            try:
+                if send is None:
+                    outcome = setup_error
+                else:
+                    deliver(send, *item)
+                    continue
+            except Exception as e:
+                outcome = type(e).__name__
+            with lock:
+                statuses[outcome] += 1
+
+    threads = [threading.Thread(target = run_sender, args = (q,), daemon = True) for q in queues]
+    for t in threads:
+        t.start()
+
+    started = time.perf_counter()
+    first = last = None
+    count = 0
+    for rec in events:
+        if limit is not None and count >= limit:
+            break
+        if first is None:
+            first = rec.arrival
+        last = rec.arrival
+        due = started + (rec.arrival - first).total_seconds() / speed
+        # Pinning a tool to one sender keeps its readings in recorded order
+        queues[rec.equipment_id % workers].put((due, rec))
+        count += 1
+
+    for q in queues:
+        q.put(None)
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    span = (last - first).total_seconds() / speed if count > 1 else 0.0
+    return {
+        "readings": count,
+        "ok": statuses[200],
+        "errors": {str(k): v for k, v in statuses.items() if k != 200},
+        "retried": retried,
+        "speed": speed,
+        "elapsed_seconds": elapsed,
+        "target_rate": count / span if span > 0 else None,
+        "achieved_rate": count / elapsed if elapsed > 0 else 0.0,
+        "lag_ms": _percentiles(lags),
+        "request_ms": _percentiles(latencies),
+        "alert_latency_ms": _percentiles(alert_latencies),
+        "alerts": len(alert_latencies),
+    }
+
+
+def _print_report(r: dict):
+    def fmt(p):
+        return "n/a" if p["p50"] is None else f"p50 {p['p50']:.1f}  p95 {p['p95']:.1f}  max {p['max']:.1f} ms"
+
+    target = f"{r['target_rate']:.0f}/s" if r["target_rate"] else "n/a"
+    print(f"replayed {r['readings']} readings at {r['speed']:g}x in {r['elapsed_seconds']:.1f} s "
+          f"({r['ok']} ok, errors: {r['errors'] or 'none'}, {r['retried']} retried after 429)")
+    print(f"rate           achieved {r['achieved_rate']:.0f}/s, target {target}")
+    print(f"lag            {fmt(r['lag_ms'])}")
+    print(f"request        {fmt(r['request_ms'])}")
+    print(f"alert latency  {fmt(r['alert_latency_ms'])}  ({r['alerts']} WARNING/FAILURE readings)")
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Replay recorded readings into the ingestion API.")
+    source = parser.add_mutually_exclusive_group(required = True)
+    source.add_argument("--csv", nargs = "+", help = "CSV file(s) in the /readings/export format")
+    source.add_argument("--database-url", help = "Database holding recorded sensor_reading rows")
+    parser.add_argument("--start", help = "ISO arrival time (inclusive), database source only")
+    parser.add_argument("--end", help = "ISO arrival time (exclusive), database source only")
+    parser.add_argument("--tools", help = "Comma-separated recorded equipment ids (database source only)")
+    parser.add_argument("--speed", type = float, default = 1.0, help = "1 = real time, up to 1000")
+    parser.add_argument("--target", choices = ("http", "inprocess"), default = "http")
+    parser.add_argument("--base-url", default = "http://127.0.0.1:8000")
+    parser.add_argument("--workers", type = int, default = 8, help = "Sender threads (tools are pinned to one)")
+    parser.add_argument("--timestamps", choices = ("lag", "none"), default = "lag")
+    parser.add_argument("--create-tools", action = "store_true",
+                        help = "Send to tools named REPLAY-<recorded id>, creating them if needed")
+    parser.add_argument("--limit", type = int)
+    parser.add_argument("--retries", type = int, default = 3,
+                        help = "Resends of a reading shed with 429, after its Retry-After")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        events = read_csv(args.csv)
+    else:
+        tools = [int(t) for t in args.tools.split(",")] if args.tools else None
+        events = read_database(args.database_url, _parse_time(args.start), _parse_time(args.end), tools)
+
+    target = HttpTarget(args.base_url) if args.target == "http" else InProcessTarget()
+
+    tool_map = None
+    if args.create_tools:
+        events = list(events)
+        tool_map = {eq: target.ensure_tool(f"REPLAY-{eq}") for eq in sorted({e.equipment_id for e in events})}
+
+    report = replay(events, target, speed = args.speed, workers = args.workers,
+                    timestamps = args.timestamps, tool_map = tool_map, limit = args.limit,
+                    retries = args.retries)
+    _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ class SensorReadingCreate(BaseModel):
     temperature: float
     pressure: float
     vibration: float
+    # Device-side measurement time. Falls back to arrival time when omitted.
+    timestamp: Optional[datetime] = None
 
 class EquipmentOut(BaseModel):
 
@@ -44,6 +46,7 @@ class AlertOut(BaseModel):
 
     id: int
     equipment_id: int
+    reading_id: Optional[int] = None
     severity: str
     reason: str
     create_at: datetime
@@ -66,4 +69,77 @@ class DashboardSummaryOut(BaseModel):
     down: int
     high: int
     med: int
-    low: int
\ No newline at end of file
+    low: int
+
+class RollupOut(BaseModel):
+
+    equipment_id: int
+    bucket_start: datetime
+    count: int
+    temperature_avg: float
+    temperature_max: float
+    pressure_min: float
+    pressure_max: float
+    vibration_avg: float
+    vibration_max: float
+    warning_count: int
+    failure_count: int
+
+
+class BackfillCreate(BaseModel):
+
+    # Omitted bounds mean "from the first" / "through the last" reading.
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    # Omitted means every tool.
+    equipment_ids: Optional[list[int]] = None
+    chunk_size: int = 1000
+    workers: int = 2
+    # Upper bound on readings per second across all workers (None = unthrottled).
+    max_rows_per_sec: Optional[float] = 5000.0
+
+class BackfillOut(BaseModel):
+
+    id: int
+    status: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    equipment_ids: list[int]
+    rows_total: int
+    rows_processed: int
+    tools_done: int
+    progress: float
+    rows_per_sec: float
+    elapsed_seconds: float
+    error: Optional[str] = None
+
+
+class LatestReadingOut(BaseModel):
+
+    id: int
+    temperature: float
+    pressure: float
+    vibration: float
+    timestamp: datetime
+    severity: str
+    reason: str
+
+class FleetToolOut(BaseModel):
+
+    id: int
+    name: str
+    tool_type: str
+    location: str
+    status: str
+    last_seen_at: Optional[datetime] = None
+    level: str
+    warning_count: int
+    failure_count: int
+    latest_reading: Optional[LatestReadingOut] = None
+
+class FleetSnapshotOut(BaseModel):
+
+    version: int
+    window: int
+    summary: DashboardSummaryOut
+    tools: list[FleetToolOut]
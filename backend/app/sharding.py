@@ -0,0 +1,189 @@
+"""
+Optional sharded storage for telemetry.
+
+A SQLite file has a single writer, which caps ingest for the whole fab. With
+SHARD_URLS set, every tool gets a home shard (by equipment id, or by location
+so a bay stays together) that stores its readings, alerts and rollups, plus a
+copy of its equipment row: status and last_seen_at change on every ingest, so
+they live next to the readings instead of in a shared table.
+
+The main database (DATABASE_URL) stays the registry. It allocates equipment
+ids, enforces unique names and keeps backfill jobs.
+
+- writes for a tool go to its home shard, one writer per shard
+- per-tool reads open a session on the home shard
+- fleet-wide reads run on every shard in parallel and the caller merges them
+
+Reading and alert ids come from each shard's own sequence, so they are only
+unique per shard. Every shard carries the full (migrated) schema.
+"""
+
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from sqlalchemy.orm import sessionmaker
+
+from .config import SHARD_KEY, SHARD_URLS
+from .database import make_engine, run_migrations
+from .models import Equipment
+
+SHARD_KEYS = ("equipment", "location")
+
+
+def location_shard(location: str | None, count: int) -> int:
+
+    """Stable shard index for a location (unlike hash(), the same in every process)."""
+
+    return zlib.crc32((location or "").encode()) % count
+
+
+class ShardRouter:
+
+    """
+    Maps tools to shards and hands out sessions.
+
+    Engines are created on first use, so importing the app stays free of DB
+    work. `locate(equipment_id)` looks up a tool's location in the registry
+    and is only needed when sharding by location.
+    """
+
+    def __init__(self, urls: list[str], key: str = "equipment", locate = None):
+        if not urls:
+            raise ValueError("At least one shard URL is required")
+        if key not in SHARD_KEYS:
+            raise ValueError(f"SHARD_KEY must be one of {SHARD_KEYS}, got '{key}'")
+        self.urls = list(urls)
+        self.key = key
+        self._locate = locate
+        self._lock = threading.Lock()
+        self._engines = [None] * len(self.urls)
+        self._sessions = [None] * len(self.urls)
+        # SQLite serializes writers per file; queueing in-process avoids busy retries
+        self._writers = [threading.Lock() for _ in self.urls]
+        self._homes = {}
+        self._pool = None
+
+    def __len__(self):
+        return len(self.urls)
+
+    def engine(self, shard: int):
+        with self._lock:
+            if self._engines[shard] is None:
+                engine = make_engine(self.urls[shard])
+                self._engines[shard] = engine
+                self._sessions[shard] = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+            return self._engines[shard]
+
+    def session(self, shard: int):
+        self.engine(shard)
+        return self._sessions[shard]()
+
+    @contextmanager
+    def sessions(self):
+
+        """One open session per shard, in shard order."""
+
+        with ExitStack() as stack:
+            yield [stack.enter_context(self.session(shard)) for shard in range(len(self))]
+
+    @contextmanager
+    def writer(self, shard: int):
+
+        """Hold the shard's writer slot for the duration of a write transaction."""
+
+        with self._writers[shard]:
+            yield
+
+    def assign(self, equipment_id: int, location: str | None) -> int:
+
+        """Home shard for a new tool."""
+
+        if self.key == "equipment":
+            return equipment_id % len(self)
+        shard = location_shard(location, len(self))
+        self._homes[equipment_id] = shard
+        return shard
+
+    def shard_for(self, equipment_id: int) -> int | None:
+
+        """Home shard of an existing tool, or None if the registry does not know it."""
+
+        if self.key == "equipment":
+            return equipment_id % len(self)
+        shard = self._homes.get(equipment_id)
+        if shard is None and self._locate is not None:
+            found, location = self._locate(equipment_id)
+            if found:
+                shard = self.assign(equipment_id, location)
+        return shard
+
+    def add_equipment(self, eq: Equipment) -> int:
+
+        """Copy a registry row to the tool's home shard."""
+
+        shard = self.assign(eq.id, eq.location)
+        with self.writer(shard), self.session(shard) as db:
+            db.merge(Equipment(
+                id = eq.id,
+                name = eq.name,
+                tool_type = eq.tool_type,
+                location = eq.location,
+                status = eq.status,
+                last_seen_at = eq.last_seen_at,
+            ))
+            db.commit()
+        return shard
+
+    def fan_out(self, fn) -> list:
+
+        """
+        Run fn(session) on every shard in parallel.
+
+        Returns the results in shard order. Results must not need the session
+        after fn returns (loaded ORM objects are fine; they are detached).
+        """
+
+        def call(shard):
+            with self.session(shard) as db:
+                return fn(db)
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers = len(self), thread_name_prefix = "shard")
+        return list(self._pool.map(call, range(len(self))))
+
+    def migrate(self):
+
+        """Bring every shard's schema up to date."""
+
+        for shard in range(len(self)):
+            run_migrations(self.engine(shard))
+
+    def dispose(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            for engine in self._engines:
+                if engine is not None:
+                    engine.dispose()
+            self._engines = [None] * len(self.urls)
+            self._sessions = [None] * len(self.urls)
+
+
+def _registry_location(equipment_id: int) -> tuple[bool, str | None]:
+
+    """(exists, location) of a tool in the main database."""
+
+    from .database import SessionLocal, get_engine
+
+    get_engine()
+    with SessionLocal() as db:
+        row = db.query(Equipment.location).filter(Equipment.id == equipment_id).first()
+    return (row is not None, row[0] if row is not None else None)
+
+
+# Shared router used by the API; None keeps all data in DATABASE_URL.
+shards = ShardRouter(SHARD_URLS, SHARD_KEY, _registry_location) if SHARD_URLS else None
@@ -0,0 +1,7 @@
+import os
+
+# Benchmarks build their own throwaway databases; never migrate the default one.
+os.environ.setdefault("MIGRATE_ON_STARTUP", "0")
+# Benchmarks measure ingest itself; bench_admission sets its own limits.
+os.environ.setdefault("INGEST_TOOL_RATE", "0")
+os.environ.setdefault("INGEST_GLOBAL_RATE", "0")
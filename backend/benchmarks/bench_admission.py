@@ -0,0 +1,179 @@
+"""
+Ingest admission control load test.
+
+A fleet of tools posts readings at a steady rate while one misconfigured tool
+floods POST /readings at several times the ingest capacity, from many
+concurrent connections and ignoring Retry-After. Fleet ingest latency is
+compared across three runs:
+
+- baseline: fleet only
+- flood, admission control off
+- flood, admission control on (limits from the command line)
+
+Admission control holds fleet latency flat when, under flood, fleet p50 stays
+within 2x baseline + 5 ms and fleet p95 within 3x baseline + 20 ms
+(`within_bounds`); the run exits with status 1 when the admission-on run is
+outside that bound. It is a wall-clock check, so it lives here rather than in
+the unit tests, which check shedding with an injected clock. What is
+left is the CPU spent parsing and rejecting the flood, on the same core as
+the fleet and, in-process, the client.
+
+    python -m benchmarks.bench_admission [--tools 50] [--interval 2] [--flood-rate 400] [--flooders 16] [--seconds 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.admission import admission
+from app.database import make_engine
+from benchmarks.common import seed, temp_database
+
+# Recommended production limits (README), used for the "admission on" run
+LIMITS = {"tool_rate": 5, "tool_burst": 10, "global_rate": 500, "global_burst": 1000}
+OFF = {"tool_rate": 0, "global_rate": 0}
+
+
+def _app(url):
+    # The app's engine settings, on the bench database
+    engine = make_engine(url)
+    Session = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(main.sync_router)
+    app.dependency_overrides[main.get_db] = get_db
+    return app, engine
+
+
+async def _drive(app, tools: int, interval: float, flood_rate: float, flooders: int, seconds: float) -> dict:
+    fleet_latencies, fleet_status, flood_status = [], {}, {}
+    transport = httpx.ASGITransport(app = app, raise_app_exceptions = False)
+    deadline = time.perf_counter() + seconds
+
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench", timeout = 120) as http:
+        async def fleet_tool(tool):
+            # Spread the fleet's sends over the interval
+            await asyncio.sleep(interval * tool / tools)
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                r = await http.post("/readings", json = {
+                    "equipment_id": tool, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3,
+                })
+                fleet_latencies.append((time.perf_counter() - t0) * 1000)
+                fleet_status[r.status_code] = fleet_status.get(r.status_code, 0) + 1
+                await asyncio.sleep(max(0.0, interval - (time.perf_counter() - t0)))
+
+        async def flooder():
+            # Ignores Retry-After, like a controller with a bad send interval
+            period = flooders / flood_rate
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                r = await http.post("/readings", json = {
+                    "equipment_id": 1, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3,
+                })
+                flood_status[r.status_code] = flood_status.get(r.status_code, 0) + 1
+                await asyncio.sleep(max(0.0, period - (time.perf_counter() - t0)))
+
+        await asyncio.gather(
+            *(fleet_tool(t) for t in range(2, tools + 2)),
+            *(flooder() for _ in range(flooders)),
+        )
+
+    fleet_latencies.sort()
+    return {
+        "p50": statistics.median(fleet_latencies),
+        "p95": fleet_latencies[int(len(fleet_latencies) * 0.95) - 1],
+        "p99": fleet_latencies[int(len(fleet_latencies) * 0.99) - 1],
+        "fleet_ok": fleet_status.get(200, 0),
+        "fleet_shed": sum(n for s, n in fleet_status.items() if s != 200),
+        "flood_ok": flood_status.get(200, 0),
+        "flood_shed": flood_status.get(429, 0),
+    }
+
+
+def measure(url: str, limits: dict, tools: int, interval: float, flood_rate: float, flooders: int,
+            seconds: float) -> dict:
+
+    """One run against `url` with the given admission limits; returns fleet latency and counts."""
+
+    main.pipeline.reset()
+    admission.configure(**limits)
+    app, engine = _app(url)
+    try:
+        return asyncio.run(_drive(app, tools, interval, flood_rate, flooders, seconds))
+    finally:
+        engine.dispose()
+        admission.configure()
+        # In-memory state describes the bench database, not the app's own
+        main.pipeline.reset()
+        main.fleet.reset()
+        main.response_cache.clear()
+
+
+def within_bounds(baseline: dict, flooded: dict) -> bool:
+
+    """Fleet latency under flood is within the stated bound of the baseline."""
+
+    return (flooded["p50"] <= 2 * baseline["p50"] + 5 and
+            flooded["p95"] <= 3 * baseline["p95"] + 20)
+
+
+def run(tools: int, interval: float, flood_rate: float, flooders: int, seconds: float, limits: dict):
+    url, engine, Session, path = temp_database("admission")
+    seed(Session, tools + 1, 50)
+    engine.dispose()
+
+    scenarios = [
+        ("baseline (no flood)", 0, OFF),
+        ("flood, admission off", flooders, OFF),
+        ("flood, admission on", flooders, limits),
+    ]
+    print(f"{tools} tools every {interval:g}s ({tools / interval:.0f}/s), flood {flood_rate:g}/s "
+          f"over {flooders} connections, {seconds:g}s per run, limits {limits}")
+    print(f"{'scenario':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fleet ok':>9} {'fleet 429':>9} {'flood ok':>9} {'flood 429':>9}")
+    results = []
+    try:
+        for label, n_flood, scenario_limits in scenarios:
+            r = measure(url, scenario_limits, tools, interval, flood_rate, n_flood, seconds)
+            results.append(r)
+            print(f"{label:<24} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+                  f"{r['fleet_ok']:>9} {r['fleet_shed']:>9} {r['flood_ok']:>9} {r['flood_shed']:>9}")
+    finally:
+        os.remove(path)
+
+    baseline, off, on = results
+    print(f"within bound (p50 <= 2x+5 ms, p95 <= 3x+20 ms): admission off {within_bounds(baseline, off)}, "
+          f"admission on {within_bounds(baseline, on)}")
+    return within_bounds(baseline, on)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", type = int, default = 50)
+    parser.add_argument("--interval", type = float, default = 2)
+    parser.add_argument("--flood-rate", type = float, default = 400)
+    parser.add_argument("--flooders", type = int, default = 16)
+    parser.add_argument("--seconds", type = float, default = 10)
+    parser.add_argument("--tool-rate", type = float, default = LIMITS["tool_rate"])
+    parser.add_argument("--tool-burst", type = float, default = LIMITS["tool_burst"])
+    parser.add_argument("--global-rate", type = float, default = LIMITS["global_rate"])
+    parser.add_argument("--global-burst", type = float, default = LIMITS["global_burst"])
+    args = parser.parse_args()
+    limits = {"tool_rate": args.tool_rate, "tool_burst": args.tool_burst,
+              "global_rate": args.global_rate, "global_burst": args.global_burst}
+    sys.exit(0 if run(args.tools, args.interval, args.flood_rate, args.flooders, args.seconds, limits) else 1)
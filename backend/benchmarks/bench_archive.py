@@ -0,0 +1,133 @@
+"""
+Archive benchmark.
+
+Seeds a database with months of readings (and their alerts), then archives
+everything older than --keep-days and reports:
+
+- database file size before and after archival (+ VACUUM), and archive size
+- scan time for one tool over a 30-day archived range, before archival
+  (from SQLite) and after (memory-mapped segments): an aggregate over the
+  range and a full row scan as used by the export endpoint
+
+    python -m benchmarks.bench_archive [--tools 20] [--readings 20000] [--days 120]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
+from app.archive import SegmentStore, archive_readings, iter_range
+from app.models import Alert, Equipment, SensorReading
+from benchmarks.common import summarize, temp_database, timed
+
+
+def _seed(Session, tools: int, readings: int, days: int):
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    step = timedelta(days = days) / readings
+    with Session() as db:
+        db.bulk_insert_mappings(Equipment, [
+            {"id": i, "name": f"TOOL-{i:05d}", "tool_type": "Etch", "location": f"Bay {i % 20}"}
+            for i in range(1, tools + 1)
+        ])
+        next_id = 1
+        for i in range(1, tools + 1):
+            rows, alerts = [], []
+            for j in range(readings):
+                ts = now - (readings - j) * step
+                rows.append({
+                    "id": next_id, "equipment_id": i, "timestamp": ts, "received_at": ts,
+                    "temperature": rng.uniform(60, 100), "pressure": rng.uniform(0.85, 1.2),
+                    "vibration": rng.uniform(0.2, 0.95),
+                })
+                alerts.append({
+                    "equipment_id": i, "reading_id": next_id, "severity": "NORMAL",
+                    "reason": "All sensor values within normal range", "create_at": ts,
+                })
+                next_id += 1
+            db.bulk_insert_mappings(SensorReading, rows)
+            db.bulk_insert_mappings(Alert, alerts)
+        db.commit()
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def run(tools: int, readings: int, days: int, keep_days: int):
+    url, engine, Session, path = temp_database("archive")
+    archive_dir = tempfile.mkdtemp(prefix = "archive_")
+    store = SegmentStore(archive_dir)
+    # Nothing archived yet: iter_range reads only the live table
+    no_archive = SegmentStore(os.path.join(archive_dir, "unused"))
+    try:
+        _seed(Session, tools, readings, days)
+        print(f"{tools} tools x {readings} readings over {days} days, archiving all but the last {keep_days} days")
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days = keep_days)
+        start, end = cutoff - timedelta(days = 60), cutoff - timedelta(days = 30)
+        tool = tools // 2 or 1
+
+        def sql_aggregate():
+            with Session() as db:
+                return db.query(func.avg(SensorReading.temperature)).filter(
+                    SensorReading.equipment_id == tool, SensorReading.timestamp >= start, SensorReading.timestamp < end
+                ).scalar()
+
+        def sql_rows():
+            with Session() as db:
+                return sum(1 for _ in iter_range(db, no_archive, tool, start, end))
+
+        size_before = os.path.getsize(path)
+        summarize("30-day avg, SQLite (before)", timed(sql_aggregate, 20))
+        summarize("30-day row scan, SQLite (before)", timed(sql_rows, 5))
+        rows_before, avg_before = sql_rows(), sql_aggregate()
+
+        with Session() as db:
+            t0 = datetime.utcnow()
+            stats = archive_readings(db, store, cutoff)
+            took = (datetime.utcnow() - t0).total_seconds()
+        print(f"archived {stats['readings']} readings into {stats['segments']} segments in {took:.1f} s")
+
+        size_deleted = os.path.getsize(path)
+        with engine.connect().execution_options(isolation_level = "AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        size_after = os.path.getsize(path)
+
+        def archive_aggregate():
+            return store.read_range(tool, start, end)["temperature"].mean()
+
+        def archive_rows():
+            with Session() as db:
+                return sum(1 for _ in iter_range(db, store, tool, start, end))
+
+        summarize("30-day avg, mmap segments (after)", timed(archive_aggregate, 20))
+        summarize("30-day row scan, merged (after)", timed(archive_rows, 5))
+        assert archive_rows() == rows_before
+        assert abs(archive_aggregate() - avg_before) < 1e-9
+
+        mb = 1024 * 1024
+        print(f"{'db size before':<40} {size_before / mb:8.1f} MB")
+        print(f"{'db size after delete (no VACUUM)':<40} {size_deleted / mb:8.1f} MB")
+        print(f"{'db size after VACUUM':<40} {size_after / mb:8.1f} MB  ({1 - size_after / size_before:.0%} smaller)")
+        print(f"{'archive size':<40} {_dir_size(archive_dir) / mb:8.1f} MB")
+    finally:
+        engine.dispose()
+        os.remove(path)
+        shutil.rmtree(archive_dir, ignore_errors = True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", type = int, default = 20)
+    parser.add_argument("--readings", type = int, default = 20000)
+    parser.add_argument("--days", type = int, default = 120)
+    parser.add_argument("--keep-days", type = int, default = 7)
+    args = parser.parse_args()
+    run(args.tools, args.readings, args.days, args.keep_days)
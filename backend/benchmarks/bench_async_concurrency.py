@@ -0,0 +1,124 @@
+"""
+Sync vs async endpoint concurrency benchmark.
+
+Drives the ingestion/query endpoints with N concurrent clients, each issuing
+a mix of reads (GET /equipment/{id}/readings, uncached) and writes
+(POST /readings), once against the sync router (threadpool + Session) and
+once against the async router (event loop + AsyncSession).
+
+Requests go through httpx's in-process ASGI transport, so the numbers
+reflect the app and database path rather than network overhead.
+
+    python -m benchmarks.bench_async_concurrency [--clients 100 1000] [--requests 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from app import async_api, main
+from app.database import bind_async_engine, bind_engine, make_async_engine, make_engine
+from benchmarks.common import seed, temp_database
+
+TOOLS = 50
+WRITE_RATIO = 0.2
+
+
+def sync_app(url):
+    # The app's own get_db and engine settings (make_engine), pointed at the bench database
+    engine = make_engine(url)
+    bind_engine(engine)
+
+    app = FastAPI()
+    app.include_router(main.sync_router)
+    return app, engine.dispose
+
+
+def async_app(url):
+    # The app's own get_async_db and engine settings (make_async_engine), pointed at the bench database
+    engine = make_async_engine(url)
+    bind_async_engine(engine)
+
+    app = FastAPI()
+    app.include_router(async_api.router)
+    return app, engine.dispose
+
+
+async def drive(app, clients: int, requests_per_client: int):
+    latencies = []
+    errors = 0
+    # Count server errors instead of raising them into the client
+    transport = httpx.ASGITransport(app = app, raise_app_exceptions = False)
+
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench", timeout = 120) as http:
+        async def client(i):
+            nonlocal errors
+            rng = random.Random(i)
+            for _ in range(requests_per_client):
+                tool = rng.randint(1, TOOLS)
+                t0 = time.perf_counter()
+                if rng.random() < WRITE_RATIO:
+                    r = await http.post("/readings", json = {
+                        "equipment_id": tool,
+                        "temperature": rng.uniform(60, 100),
+                        "pressure": 1.0,
+                        "vibration": rng.uniform(0.2, 0.95),
+                    })
+                else:
+                    r = await http.get(f"/equipment/{tool}/readings?limit=50")
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if r.status_code != 200:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def run(client_counts, requests_per_client):
+    url, engine, Session, path = temp_database("async")
+    seed(Session, TOOLS, 200)
+    engine.dispose()
+
+    print(f"{TOOLS} tools, {int(WRITE_RATIO * 100)}% writes, {requests_per_client} requests per client")
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    try:
+        for clients in client_counts:
+            for mode, factory in (("sync", sync_app), ("async", async_app)):
+                main.pipeline.reset()
+                app, dispose = factory(url)
+
+                async def go():
+                    result = await drive(app, clients, requests_per_client)
+                    out = dispose()
+                    if asyncio.iscoroutine(out):
+                        await out
+                    return result
+
+                r = asyncio.run(go())
+                print(f"{mode:<6} {clients:>7} {r['rps']:>9.0f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type = int, nargs = "+", default = [100, 1000])
+    parser.add_argument("--requests", type = int, default = 10)
+    args = parser.parse_args()
+    run(args.clients, args.requests)
@@ -0,0 +1,71 @@
+"""
+Fleet snapshot benchmark.
+
+Compares the per-tool fan-out the dashboard used to do (one health call per
+tool) with GET /fleet/snapshot for a fleet of 1000 tools: cold load, warm
+polls, 304 polls, and a poll right after a single ingest.
+
+    python -m benchmarks.bench_fleet_snapshot [--tools 1000]
+"""
+
+import argparse
+import os
+
+from fastapi.testclient import TestClient
+
+from app import main
+from benchmarks.common import seed, summarize, temp_database, timed
+
+
+def run(tools: int, readings_per_tool: int):
+    url, engine, Session, path = temp_database("fleet")
+    seed(Session, tools, readings_per_tool)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[main.get_db] = get_db
+    main.pipeline.reset()
+    main.fleet.reset()
+
+    try:
+        with TestClient(main.app) as client:
+            print(f"{tools} tools x {readings_per_tool} readings")
+
+            summarize("fan-out: 1 health call per tool", timed(
+                lambda: [client.get(f"/equipment/{i}/health?window=37") for i in range(1, tools + 1)], 1
+            ))
+            summarize("snapshot: cold (first load)", timed(lambda: client.get("/fleet/snapshot"), 1))
+
+            r = client.get("/fleet/snapshot")
+            etag = r.headers["etag"]
+            summarize("snapshot: warm poll (200)", timed(lambda: client.get("/fleet/snapshot"), 200))
+            summarize("snapshot: unchanged poll (304)", timed(
+                lambda: client.get("/fleet/snapshot", headers = {"If-None-Match": etag}), 200
+            ))
+            summarize("snapshot: in-process render (cached)", timed(main.fleet.render, 1000))
+
+            reading = {"equipment_id": 1, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3}
+
+            def ingest_then_poll():
+                client.post("/readings", json = reading)
+                client.get("/fleet/snapshot")
+
+            summarize("ingest + snapshot poll", timed(ingest_then_poll, 100))
+            summarize("ingest alone", timed(lambda: client.post("/readings", json = reading), 100))
+    finally:
+        main.app.dependency_overrides.clear()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", type = int, default = 1000)
+    parser.add_argument("--readings", type = int, default = 60)
+    args = parser.parse_args()
+    run(args.tools, args.readings)
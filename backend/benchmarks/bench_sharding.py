@@ -0,0 +1,97 @@
+"""
+Sharded ingest benchmark.
+
+Ingests readings from many concurrent writers through the same code path as
+POST /readings (home-shard routing, per-shard writer, reading + alert +
+rollup in one transaction) and reports throughput for 1, 2, 4 and 8 shards,
+plus the latency of the fan-out dashboard summary and failure list.
+
+Shards are SQLite files in a temp directory (or --dir, to test a specific
+disk). Scaling comes from commits on different files overlapping, so it
+depends on the disk's fsync cost and on available cores.
+
+    python -m benchmarks.bench_sharding [--shards 1 2 4 8] [--writers 16] [--readings 4000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import main
+from app.database import Base
+from app.models import Equipment
+from app.schemas import SensorReadingCreate
+from app.sharding import ShardRouter
+from benchmarks.common import summarize, timed
+
+TOOLS = 256
+
+
+def _setup(directory: str, count: int) -> ShardRouter:
+    router = ShardRouter([f"sqlite:///{directory}/shard{count}_{i}.db" for i in range(count)])
+    for shard in range(count):
+        Base.metadata.create_all(bind = router.engine(shard))
+    now = datetime.utcnow()
+    for i in range(1, TOOLS + 1):
+        router.add_equipment(Equipment(
+            id = i, name = f"TOOL-{i:05d}", tool_type = "Etch", location = f"Bay {i % 20}",
+            status = "RUN", last_seen_at = now,
+        ))
+    return router
+
+
+def _ingest(router: ShardRouter, reading: SensorReadingCreate):
+    shard = router.shard_for(reading.equipment_id)
+    with router.writer(shard), router.session(shard) as db:
+        main._ingest(db, reading)
+
+
+def run(shard_counts: list[int], writers: int, readings: int, directory: str | None):
+    rng = random.Random(1)
+    batch = [
+        SensorReadingCreate(
+            equipment_id = rng.randint(1, TOOLS),
+            temperature = rng.uniform(60, 100),
+            pressure = rng.uniform(0.85, 1.2),
+            vibration = rng.uniform(0.2, 1.1),
+        )
+        for _ in range(readings)
+    ]
+
+    print(f"{readings} readings, {writers} writers, {TOOLS} tools")
+    baseline = None
+    with tempfile.TemporaryDirectory(dir = directory) as tmp:
+        for count in shard_counts:
+            router = _setup(tmp, count)
+            main.shards = router
+            main.pipeline.reset()
+            try:
+                t0 = time.perf_counter()
+                with ThreadPoolExecutor(max_workers = writers) as pool:
+                    list(pool.map(lambda r: _ingest(router, r), batch))
+                rate = readings / (time.perf_counter() - t0)
+                baseline = baseline or rate
+                print(f"{count} shard(s): {rate:8.0f} readings/s  ({rate / baseline:.2f}x)")
+
+                summarize(f"  dashboard summary fan-out ({count})", timed(
+                    lambda: router.fan_out(lambda s: main._summary_counts(s, main.pipeline.window_size)), 20
+                ))
+                summarize(f"  failure list fan-out ({count})", timed(
+                    lambda: main.get_failures(limit = 50, db = None), 20
+                ))
+            finally:
+                main.shards = None
+                router.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type = int, nargs = "+", default = [1, 2, 4, 8])
+    parser.add_argument("--writers", type = int, default = 16)
+    parser.add_argument("--readings", type = int, default = 4000)
+    parser.add_argument("--dir", help = "Directory for shard files (default: system temp)")
+    args = parser.parse_args()
+    run(args.shards, args.writers, args.readings, args.dir)
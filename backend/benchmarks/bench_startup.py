@@ -0,0 +1,78 @@
+"""
+Startup benchmark.
+
+Measures what importing and starting the app costs now that the engine is
+built lazily and the schema is managed by migrations:
+
+- cold `import app.main` in a fresh interpreter (and that it creates no DB file)
+- lifespan startup against an empty database (full migration) and one at head
+- `pytest --collect-only` for the test suite
+
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(args, env = None) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(args, cwd = BACKEND_DIR, env = env, check = True, capture_output = True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def _env(db_path: str, migrate: bool) -> dict:
+    return dict(os.environ, DATABASE_URL = f"sqlite:///{db_path}", MIGRATE_ON_STARTUP = "1" if migrate else "0")
+
+
+_STARTUP = """
+import asyncio
+from app.main import app
+async def main():
+    async with app.router.lifespan_context(app):
+        pass
+asyncio.run(main())
+"""
+
+
+def run(repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+
+        summarize("python -c pass (interpreter baseline)", [_run([sys.executable, "-c", "pass"]) for _ in range(repeat)])
+        summarize("import app.main", [
+            _run([sys.executable, "-c", "import app.main"], _env(db_path, True)) for _ in range(repeat)
+        ])
+        print(f"{'database file created by import':<40} {os.path.exists(db_path)}")
+
+        fresh = []
+        for _ in range(repeat):
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            fresh.append(_run([sys.executable, "-c", _STARTUP], _env(db_path, True)))
+        summarize("import + lifespan (empty DB, migrate)", fresh)
+        summarize("import + lifespan (DB at head)", [
+            _run([sys.executable, "-c", _STARTUP], _env(db_path, True)) for _ in range(repeat)
+        ])
+        summarize("import + lifespan (MIGRATE_ON_STARTUP=0)", [
+            _run([sys.executable, "-c", _STARTUP], _env(db_path, False)) for _ in range(repeat)
+        ])
+
+    summarize("pytest --collect-only", [
+        _run([sys.executable, "-m", "pytest", "--collect-only", "-q"]) for _ in range(repeat)
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type = int, default = 5)
+    args = parser.parse_args()
+    run(args.repeat)
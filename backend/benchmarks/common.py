@@ -0,0 +1,77 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file so they never touch
+manufacturing.db. Run them from the backend directory, e.g.:
+
+    python -m benchmarks.bench_fleet_snapshot
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Equipment, SensorReading
+
+
+def temp_database(prefix: str = "bench"):
+
+    """Create an empty schema in a temp file. Returns (url, engine, Session, path)."""
+
+    fd, path = tempfile.mkstemp(prefix = prefix + "_", suffix = ".db")
+    os.close(fd)
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, connect_args = {"check_same_thread": False})
+    Base.metadata.create_all(bind = engine)
+    return url, engine, sessionmaker(autocommit = False, autoflush = False, bind = engine), path
+
+
+def seed(Session, tools: int, readings_per_tool: int, seed_value: int = 1):
+
+    """Bulk insert tools and readings spread over the last few hours."""
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    with Session() as db:
+        db.bulk_insert_mappings(Equipment, [
+            {"id": i, "name": f"TOOL-{i:05d}", "tool_type": "Etch", "location": f"Bay {i % 20}",
+             "last_seen_at": now - timedelta(seconds = rng.randint(0, 120))}
+            for i in range(1, tools + 1)
+        ])
+        rows = []
+        for i in range(1, tools + 1):
+            for j in range(readings_per_tool):
+                rows.append({
+                    "equipment_id": i,
+                    "temperature": rng.uniform(60, 100),
+                    "pressure": rng.uniform(0.85, 1.2),
+                    "vibration": rng.uniform(0.2, 0.95),
+                    "timestamp": now - timedelta(seconds = 10 * (readings_per_tool - j)),
+                })
+        db.bulk_insert_mappings(SensorReading, rows)
+        db.commit()
+
+
+def timed(fn, repeat: int) -> list[float]:
+
+    """Call fn `repeat` times, returning per-call latencies in milliseconds."""
+
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def summarize(label: str, samples_ms: list[float]):
+    samples = sorted(samples_ms)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<40} median {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms   n={len(samples)}")
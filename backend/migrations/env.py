@@ -0,0 +1,50 @@
+"""
+Alembic environment.
+
+Uses the connection handed over by app.database.run_migrations() when
+called from the app, or builds one from DATABASE_URL for the alembic CLI.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.config import DATABASE_URL
+from app.database import Base
+from app import models  # noqa: F401  (registers tables on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(url = DATABASE_URL, target_metadata = target_metadata, literal_binds = True,
+                      render_as_batch = True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection = connection, target_metadata = target_metadata, render_as_batch = True)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = create_engine(DATABASE_URL)
+    with engine.connect() as connection:
+        context.configure(connection = connection, target_metadata = target_metadata, render_as_batch = True)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
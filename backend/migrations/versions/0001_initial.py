@@ -0,0 +1,60 @@
+"""Initial schema: equipment, sensor readings and alerts.
+
+Matches what the app's import-time create_all() built before migrations
+were introduced; such databases are stamped at this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "equipment",
+        sa.Column("id", sa.Integer, primary_key = True),
+        sa.Column("name", sa.String),
+        sa.Column("tool_type", sa.String),
+        sa.Column("location", sa.String),
+        sa.Column("status", sa.String),
+        sa.Column("last_seen_at", sa.DateTime, nullable = True),
+    )
+    op.create_index("ix_equipment_id", "equipment", ["id"])
+    op.create_index("ix_equipment_name", "equipment", ["name"], unique = True)
+
+    op.create_table(
+        "sensor_reading",
+        sa.Column("id", sa.Integer, primary_key = True),
+        sa.Column("equipment_id", sa.Integer, sa.ForeignKey("equipment.id")),
+        sa.Column("temperature", sa.Float),
+        sa.Column("pressure", sa.Float),
+        sa.Column("vibration", sa.Float),
+        sa.Column("timestamp", sa.DateTime(timezone = True), server_default = sa.func.now()),
+    )
+    op.create_index("ix_sensor_reading_id", "sensor_reading", ["id"])
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer, primary_key = True),
+        sa.Column("equipment_id", sa.Integer, sa.ForeignKey("equipment.id"), nullable = False),
+        sa.Column("severity", sa.String, nullable = False),
+        sa.Column("reason", sa.String, nullable = False),
+        sa.Column("create_at", sa.DateTime, nullable = False),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+    op.create_index("ix_alerts_equipment_id", "alerts", ["equipment_id"])
+
+
+def downgrade():
+    op.drop_table("alerts")
+    op.drop_table("sensor_reading")
+    op.drop_table("equipment")
@@ -0,0 +1,121 @@
+"""Device timestamps, rollups, alert links, backfill jobs and query indexes.
+
+- sensor_reading.received_at (arrival time; `timestamp` is device time)
+- alerts.reading_id (unique) so backfills can upsert alerts per reading
+- sensor_rollup, backfill_job, backfill_checkpoint tables
+- composite indexes for the per-tool window and alert queries
+
+Databases created by create_all() between revisions may already have some
+of these objects, so each step checks first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    return {c["name"] for c in insp.get_columns(table)}
+
+
+def _indexes(insp, table):
+    return {i["name"] for i in insp.get_indexes(table)}
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    tables = set(insp.get_table_names())
+
+    if "received_at" not in _columns(insp, "sensor_reading"):
+        op.add_column("sensor_reading", sa.Column("received_at", sa.DateTime, nullable = True))
+    if "ix_sensor_reading_equipment_ts" not in _indexes(insp, "sensor_reading"):
+        op.create_index("ix_sensor_reading_equipment_ts", "sensor_reading", ["equipment_id", "timestamp", "id"])
+
+    if "reading_id" not in _columns(insp, "alerts"):
+        # SQLite cannot ALTER in a foreign key; batch mode rebuilds the table
+        with op.batch_alter_table("alerts") as batch:
+            batch.add_column(sa.Column("reading_id", sa.Integer, nullable = True))
+            batch.create_foreign_key("fk_alerts_reading_id", "sensor_reading", ["reading_id"], ["id"])
+    alert_indexes = _indexes(insp, "alerts")
+    if "ix_alerts_reading_id" not in alert_indexes:
+        op.create_index("ix_alerts_reading_id", "alerts", ["reading_id"], unique = True)
+    if "ix_alerts_equipment_created" not in alert_indexes:
+        op.create_index("ix_alerts_equipment_created", "alerts", ["equipment_id", "create_at"])
+    if "ix_alerts_severity_created" not in alert_indexes:
+        op.create_index("ix_alerts_severity_created", "alerts", ["severity", "create_at"])
+
+    if "sensor_rollup" not in tables:
+        op.create_table(
+            "sensor_rollup",
+            sa.Column("id", sa.Integer, primary_key = True),
+            sa.Column("equipment_id", sa.Integer, sa.ForeignKey("equipment.id"), nullable = False),
+            sa.Column("bucket_start", sa.DateTime, nullable = False),
+            sa.Column("count", sa.Integer, nullable = False),
+            sa.Column("temperature_sum", sa.Float, nullable = False),
+            sa.Column("temperature_max", sa.Float, nullable = False),
+            sa.Column("pressure_min", sa.Float, nullable = False),
+            sa.Column("pressure_max", sa.Float, nullable = False),
+            sa.Column("vibration_sum", sa.Float, nullable = False),
+            sa.Column("vibration_max", sa.Float, nullable = False),
+            sa.Column("warning_count", sa.Integer, nullable = False),
+            sa.Column("failure_count", sa.Integer, nullable = False),
+            sa.UniqueConstraint("equipment_id", "bucket_start", name = "uq_rollup_bucket"),
+        )
+        op.create_index("ix_sensor_rollup_id", "sensor_rollup", ["id"])
+
+    if "backfill_job" not in tables:
+        op.create_table(
+            "backfill_job",
+            sa.Column("id", sa.Integer, primary_key = True),
+            sa.Column("range_start", sa.DateTime, nullable = True),
+            sa.Column("range_end", sa.DateTime, nullable = True),
+            sa.Column("equipment_ids", sa.String, nullable = False),
+            sa.Column("chunk_size", sa.Integer, nullable = False),
+            sa.Column("max_rows_per_sec", sa.Float, nullable = True),
+            sa.Column("status", sa.String, nullable = False),
+            sa.Column("rows_total", sa.Integer, nullable = False),
+            sa.Column("max_reading_id", sa.Integer, nullable = False),
+            sa.Column("rows_at_start", sa.Integer, nullable = False),
+            sa.Column("error", sa.String, nullable = True),
+            sa.Column("created_at", sa.DateTime, nullable = False),
+            sa.Column("started_at", sa.DateTime, nullable = True),
+            sa.Column("finished_at", sa.DateTime, nullable = True),
+        )
+        op.create_index("ix_backfill_job_id", "backfill_job", ["id"])
+
+    if "backfill_checkpoint" not in tables:
+        op.create_table(
+            "backfill_checkpoint",
+            sa.Column("id", sa.Integer, primary_key = True),
+            sa.Column("job_id", sa.Integer, sa.ForeignKey("backfill_job.id"), nullable = False),
+            sa.Column("equipment_id", sa.Integer, sa.ForeignKey("equipment.id"), nullable = False),
+            sa.Column("last_reading_id", sa.Integer, nullable = True),
+            sa.Column("rows_processed", sa.Integer, nullable = False),
+            sa.Column("done", sa.Integer, nullable = False),
+            sa.UniqueConstraint("job_id", "equipment_id", name = "uq_backfill_checkpoint"),
+        )
+        op.create_index("ix_backfill_checkpoint_id", "backfill_checkpoint", ["id"])
+        op.create_index("ix_backfill_checkpoint_job_id", "backfill_checkpoint", ["job_id"])
+
+
+def downgrade():
+    op.drop_table("backfill_checkpoint")
+    op.drop_table("backfill_job")
+    op.drop_table("sensor_rollup")
+    op.drop_index("ix_alerts_severity_created", "alerts")
+    op.drop_index("ix_alerts_equipment_created", "alerts")
+    op.drop_index("ix_alerts_reading_id", "alerts")
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("reading_id")
+    op.drop_index("ix_sensor_reading_equipment_ts", "sensor_reading")
+    with op.batch_alter_table("sensor_reading") as batch:
+        batch.drop_column("received_at")
@@ -0,0 +1,30 @@
+"""Per-tool reading id bound on backfill checkpoints.
+
+backfill_checkpoint.max_reading_id is the newest reading of the tool at
+the moment its derived rows were cleared; the job rebuilds up to it and
+later (live) readings keep the rollups they were ingested with.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if "max_reading_id" not in {c["name"] for c in insp.get_columns("backfill_checkpoint")}:
+        op.add_column("backfill_checkpoint", sa.Column("max_reading_id", sa.Integer, nullable = True))
+
+
+def downgrade():
+    with op.batch_alter_table("backfill_checkpoint") as batch:
+        batch.drop_column("max_reading_id")
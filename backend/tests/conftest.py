@@ -17,14 +17,24 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.main import app, get_db
-from app import models
-from app.database import Base
-
 # Create a separate SQLite database for testing only
 TEST_DB_PATH = "test_manufacturing.db"
 TEST_DATABASE_URL = f"sqlite:///./{TEST_DB_PATH}"
 
+# Point the app at the test database before it is imported; the schema is
+# created by the fixture below, so the lifespan hook skips migrations.
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["MIGRATE_ON_STARTUP"] = "0"
+# Tests post bursts of readings per tool; admission control is tested on its own
+os.environ["INGEST_TOOL_RATE"] = "0"
+os.environ["INGEST_GLOBAL_RATE"] = "0"
+# Tests call main.check_backfills() themselves instead of racing the watcher thread
+os.environ["BACKFILL_POLL_SECONDS"] = "0"
+
+from app.main import app, get_db
+from app import models
+from app.database import Base
+
 engine = create_engine(
     TEST_DATABASE_URL,
     connect_args = {"check_same_thread": False},
@@ -0,0 +1,119 @@
+"""
+Tests for ingest admission control.
+
+A flooding tool must be shed with 429 + Retry-After without affecting other
+tools, and FAILURE-range readings must keep getting through.
+"""
+
+import pytest
+
+from app.admission import AdmissionController, admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_buckets_shed_with_failure_priority():
+    clock = FakeClock()
+    ctl = AdmissionController(tool_rate = 1, tool_burst = 5, global_rate = 100, global_burst = 10,
+                              failure_reserve = 0.5, clock = clock)
+
+    # Tool burst of 5, then shed with a retry hint of ~1 s
+    assert [ctl.admit(1, "NORMAL") for _ in range(5)] == [None] * 5
+    assert ctl.admit(1, "NORMAL") == pytest.approx(1.0)
+
+    # FAILURE readings overdraw the tool bucket by up to one burst
+    assert [ctl.admit(1, "FAILURE") for _ in range(5)] == [None] * 5
+    assert ctl.admit(1, "FAILURE") is not None
+    assert ctl.priority_admitted == 5
+
+    # 10 tokens taken: the global bucket is empty, the reserve is gone too
+    assert ctl.admit(2, "NORMAL") is not None
+
+    # Refill: 2 s later tool 2 is back (global gained 200 tokens, capped at 10)
+    clock.now += 2
+    assert ctl.admit(2, "NORMAL") is None
+    # Tool 1 is still paying back its FAILURE overdraft
+    assert ctl.admit(1, "NORMAL") is not None
+
+    stats = ctl.stats()
+    assert stats["admitted"] == {"NORMAL": 6, "FAILURE": 5}
+    assert stats["shed"]["tool:NORMAL"] == 2
+    assert stats["top_shed_tools"][0]["equipment_id"] == 1
+
+
+def test_global_reserve_is_kept_for_failures():
+    ctl = AdmissionController(tool_rate = 0, global_rate = 1, global_burst = 10, failure_reserve = 0.3,
+                              clock = FakeClock())
+    admitted = sum(ctl.admit(i, "NORMAL") is None for i in range(20))
+    assert admitted == 7
+    assert [ctl.admit(99, "FAILURE") for _ in range(3)] == [None] * 3
+    assert ctl.admit(99, "FAILURE") is not None
+
+
+@pytest.fixture
+def limited():
+    admission.configure(tool_rate = 0.5, tool_burst = 2, global_rate = 0)
+    yield admission
+    admission.configure(tool_rate = 0, global_rate = 0)
+
+
+def test_readings_endpoint_returns_429(client, limited):
+    eq_id = client.post(
+        "/equipment", json = {"name": "FLOOD-01", "tool_type": "Etch", "location": "Fab G"}
+    ).json()["id"]
+    normal = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3}
+
+    assert client.post("/readings", json = normal).status_code == 200
+    assert client.post("/readings", json = normal).status_code == 200
+    r = client.post("/readings", json = normal)
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+
+    # A FAILURE reading from the same tool is still accepted
+    assert client.post("/readings", json = dict(normal, vibration = 1.2)).status_code == 200
+
+    # Malformed readings are left to validation, not shed
+    assert client.post("/readings", json = {"equipment_id": eq_id}).status_code == 422
+
+    stats = client.get("/ingest/admission").json()
+    assert stats["shed_total"] == 1
+    assert stats["priority_admitted"] == 1
+
+
+
+def test_flood_is_shed_but_reads_are_not(client, monkeypatch):
+    # Time only moves when the test says so
+    clock = FakeClock()
+    monkeypatch.setattr(admission, "_clock", clock)
+    admission.configure(tool_rate = 1, tool_burst = 2, global_rate = 100, global_burst = 1000)
+    try:
+        flood_id, quiet_id = (
+            client.post("/equipment", json = {"name": name, "tool_type": "Etch", "location": "Fab G"}).json()["id"]
+            for name in ("FLOOD-02", "QUIET-02")
+        )
+        normal = {"temperature": 70.0, "pressure": 1.0, "vibration": 0.3}
+
+        statuses = [client.post("/readings", json = dict(normal, equipment_id = flood_id)) for _ in range(20)]
+        assert [r.status_code for r in statuses] == [200] * 2 + [429] * 18
+        assert all(int(r.headers["retry-after"]) == 1 for r in statuses[2:])
+
+        # Other tools keep ingesting, and reads never go through admission
+        assert client.post("/readings", json = dict(normal, equipment_id = quiet_id)).status_code == 200
+        for _ in range(20):
+            for path in ("/fleet/snapshot", f"/equipment/{flood_id}/health", f"/health?ids={flood_id}&ids={quiet_id}",
+                         f"/equipment/{flood_id}/readings", "/dashboard/summary", "/equipment"):
+                assert client.get(path).status_code == 200, path
+
+        # One second later the flooding tool has one token again
+        clock.now += 1
+        assert client.post("/readings", json = dict(normal, equipment_id = flood_id)).status_code == 200
+        assert client.post("/readings", json = dict(normal, equipment_id = flood_id)).status_code == 429
+        assert admission.stats()["shed_total"] == 19
+    finally:
+        admission.configure(tool_rate = 0, global_rate = 0)
@@ -0,0 +1,108 @@
+"""
+Tests for the cold-tier reading archive.
+
+Archived readings must leave the live tables, stay readable through the
+range and export endpoints, and merge in order with live readings.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import backfill, main
+from app.archive import SegmentStore, archive_readings
+from app.models import Alert, SensorReading
+from conftest import TestingSessionLocal
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    store = SegmentStore(str(tmp_path / "archive"))
+    monkeypatch.setattr(main, "archive", store)
+    monkeypatch.setattr(backfill, "archive", store)
+    return store
+
+
+def test_archived_readings_merge_with_live_rows(client, store):
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "ARCHIVE-01", "tool_type": "Litho", "location": "Fab F - Bay 1"},
+    ).json()["id"]
+
+    # 30 readings over three days ago ... two days ago, then 5 recent ones
+    old = datetime.utcnow() - timedelta(days = 3)
+    for i in range(30):
+        ts = old + timedelta(hours = 2 * i)
+        r = {"equipment_id": eq_id, "temperature": 60.0 + i, "pressure": 1.0, "vibration": 0.3, "timestamp": ts.isoformat()}
+        assert client.post("/readings", json = r).status_code == 200
+    for i in range(5):
+        r = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 1.1}
+        assert client.post("/readings", json = r).status_code == 200
+
+    before = client.get(f"/equipment/{eq_id}/readings/range?limit=100").json()
+    cutoff = datetime.utcnow() - timedelta(hours = 12)
+
+    with TestingSessionLocal() as db:
+        stats = archive_readings(db, store, cutoff, [eq_id])
+        assert stats["readings"] == 30
+        assert stats["segments"] >= 3
+        assert db.query(SensorReading).filter(SensorReading.equipment_id == eq_id).count() == 5
+        # Alert history is kept; archived readings' alerts are unlinked
+        assert db.query(Alert).filter(Alert.equipment_id == eq_id).count() == 35
+        assert db.query(Alert).filter(Alert.equipment_id == eq_id, Alert.reading_id.is_(None)).count() == 30
+    assert len(client.get(f"/equipment/{eq_id}/alerts?limit=100").json()) == 35
+
+    # Same rows, same order, now served from both tiers
+    after = client.get(f"/equipment/{eq_id}/readings/range?limit=100").json()
+    assert after == before
+    assert [r["timestamp"] for r in after] == sorted(r["timestamp"] for r in after)
+
+    # Bounded range inside the archive
+    start = (old + timedelta(hours = 10)).isoformat()
+    end = (old + timedelta(hours = 20)).isoformat()
+    window = client.get(f"/equipment/{eq_id}/readings/range?start={start}&end={end}").json()
+    assert [r["temperature"] for r in window] == [65.0, 66.0, 67.0, 68.0, 69.0]
+
+    cols = store.read_range(eq_id)
+    assert cols["temperature"].mean() == pytest.approx(sum(60.0 + i for i in range(30)) / 30)
+
+    r = client.get(f"/equipment/{eq_id}/readings/export")
+    assert r.status_code == 200
+    lines = r.text.strip().split("\n")
+    assert lines[0] == "id,equipment_id,timestamp,temperature,pressure,vibration,received_at"
+    assert len(lines) == 36
+
+    # Backfills never start before the archive cutoff
+    with TestingSessionLocal() as db:
+        job = backfill.create_job(db, start = old, equipment_ids = [eq_id])
+        assert job.range_start >= cutoff
+
+
+def test_interrupted_archival_does_not_duplicate_rows(client, store):
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "ARCHIVE-02", "tool_type": "Litho", "location": "Fab F - Bay 1"},
+    ).json()["id"]
+    old = datetime.utcnow() - timedelta(days = 2)
+    for i in range(4):
+        ts = old + timedelta(minutes = i)
+        r = {"equipment_id": eq_id, "temperature": 60.0, "pressure": 1.0, "vibration": 0.3, "timestamp": ts.isoformat()}
+        client.post("/readings", json = r)
+
+    # Segments written, but the delete never committed
+    with TestingSessionLocal() as db:
+        rows = (
+            db.query(SensorReading)
+            .filter(SensorReading.equipment_id == eq_id)
+            .order_by(SensorReading.timestamp, SensorReading.id)
+            .all()
+        )
+        store.write_segment(eq_id, [(r.id, r.timestamp, r.received_at, r.temperature, r.pressure, r.vibration, 0) for r in rows])
+
+    assert len(client.get(f"/equipment/{eq_id}/readings/range").json()) == 4
+
+    # Re-running archival completes the move without a second copy
+    with TestingSessionLocal() as db:
+        archive_readings(db, store, datetime.utcnow() - timedelta(days = 1), [eq_id])
+    assert len(store.segments(eq_id)) == 1
+    assert len(client.get(f"/equipment/{eq_id}/readings/range").json()) == 4
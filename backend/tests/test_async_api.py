@@ -0,0 +1,91 @@
+"""
+Tests for the async (DB_MODE=async) ingestion and query endpoints.
+
+The async router is mounted on its own app against the test database and
+must behave like the sync endpoints.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import async_api
+from app.database import to_async_url
+from conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture()
+def async_client():
+
+    """TestClient for an app serving only the async router."""
+
+    # NullPool: aiosqlite connections are tied to the TestClient's event loop
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass = NullPool)
+    Session = async_sessionmaker(engine, autoflush = False, expire_on_commit = False)
+
+    async def override_get_async_db():
+        async with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_api.router)
+    app.dependency_overrides[async_api.get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert to_async_url("postgresql+psycopg2://u@h/db") == "postgresql+asyncpg://u@h/db"
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u@h/db")
+
+
+def test_async_ingest_and_queries(client, async_client):
+
+    """
+    Readings posted through the async endpoint produce alerts, health and
+    cached responses the same way as the sync path.
+    """
+
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "ASYNC-01", "tool_type": "PVD", "location": "Fab G - Bay 1"},
+    ).json()["id"]
+
+    normal = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3}
+    fail_vib = dict(normal, vibration = 1.1)
+    for r in (normal, normal, fail_vib):
+        res = async_client.post("/readings", json = r)
+        assert res.status_code == 200
+        assert res.json()["equipment_id"] == eq_id
+
+    assert async_client.post("/readings", json = dict(normal, equipment_id = 999999)).status_code == 404
+
+    readings = async_client.get(f"/equipment/{eq_id}/readings").json()
+    assert len(readings) == 3
+    assert readings[0]["vibration"] == 1.1
+
+    alerts = async_client.get(f"/equipment/{eq_id}/alerts").json()
+    assert [a["severity"] for a in alerts].count("FAILURE") == 1
+    assert any(a["equipment_id"] == eq_id for a in async_client.get("/alerts/failure").json())
+
+    r = async_client.get(f"/equipment/{eq_id}/health")
+    assert r.json()["failure_count"] == 1
+    assert async_client.get(f"/equipment/{eq_id}/health", headers = {"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert async_client.get(f"/equipment/{eq_id}/health?window=2").json()["failure_count"] == 1
+
+    # Same result as the sync endpoint
+    assert client.get(f"/equipment/{eq_id}/health").json() == r.json()
+    bulk = async_client.get("/health", params = {"ids": [eq_id, 999999]}).json()
+    assert bulk == [r.json()]
+
+    eq = async_client.get(f"/equipment/{eq_id}").json()
+    assert eq["status"] == "RUN"
+    assert any(e["id"] == eq_id for e in async_client.get("/equipment").json())
+    assert async_client.get("/dashboard/summary").json() == client.get("/dashboard/summary").json()
@@ -0,0 +1,172 @@
+"""
+Tests for the historical re-evaluation (backfill) job.
+
+After a rule change, a backfill must rewrite alerts and rollups for the
+selected range and tools, and a resumed job must not process rows twice.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from app import alerts, backfill, main
+from app.models import Alert, BackfillCheckpoint
+from conftest import TEST_DATABASE_URL, TestingSessionLocal
+
+
+def _tool_with_readings(client, name, n = 20, temperature = 80.0):
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": name, "tool_type": "Etch", "location": "Fab D - Bay 1"},
+    ).json()["id"]
+    start = datetime.utcnow() - timedelta(minutes = 3)
+    for i in range(n):
+        r = {
+            "equipment_id": eq_id,
+            "temperature": temperature,
+            "pressure": 1.0,
+            "vibration": 0.3,
+            "timestamp": (start + timedelta(seconds = i)).isoformat(),
+        }
+        assert client.post("/readings", json = r).status_code == 200
+    return eq_id
+
+
+def test_backfill_reclassifies_alerts_and_rollups(client, monkeypatch):
+
+    """
+    Readings at 80C are NORMAL under the default rules. Lowering TEMP_WARN
+    and running a backfill should turn every alert and rollup into WARNING.
+    """
+
+    eq_id = _tool_with_readings(client, "BF-01")
+    assert all(a["severity"] == "NORMAL" for a in client.get(f"/equipment/{eq_id}/alerts").json())
+
+    monkeypatch.setattr(alerts, "TEMP_WARN", 75.0)
+
+    with TestingSessionLocal() as db:
+        job = backfill.create_job(db, equipment_ids = [eq_id], chunk_size = 7)
+        assert job.rows_total == 20
+
+    result = backfill.run_job(TEST_DATABASE_URL, job.id, workers = 1)
+    assert result["status"] == "DONE"
+    assert result["rows_processed"] == 20
+    assert result["progress"] == 1.0
+
+    got = client.get(f"/equipment/{eq_id}/alerts?limit=100").json()
+    assert len(got) == 20
+    assert all(a["severity"] == "WARNING" for a in got)
+
+    rollups = client.get(f"/equipment/{eq_id}/rollups").json()
+    assert sum(b["count"] for b in rollups) == 20
+    assert sum(b["warning_count"] for b in rollups) == 20
+
+
+def test_backfill_resumes_from_checkpoint(client):
+
+    """
+    A job interrupted after one tool finishes resumes with only the
+    remaining tool, and each reading is processed exactly once.
+    """
+
+    a = _tool_with_readings(client, "BF-02", n = 5)
+    b = _tool_with_readings(client, "BF-03", n = 8)
+
+    with TestingSessionLocal() as db:
+        job = backfill.create_job(db, equipment_ids = [a, b], chunk_size = 3)
+
+    # Simulate a run that died after finishing tool `a`
+    assert backfill.process_tool(TEST_DATABASE_URL, job.id, a) == 5
+
+    result = backfill.run_job(TEST_DATABASE_URL, job.id, workers = 2)
+    assert result["status"] == "DONE"
+    assert result["rows_processed"] == 13
+    assert result["tools_done"] == 2
+
+    with TestingSessionLocal() as db:
+        cps = db.query(BackfillCheckpoint).filter(BackfillCheckpoint.job_id == job.id).all()
+        assert sorted(cp.rows_processed for cp in cps) == [5, 8]
+        assert db.query(Alert).filter(Alert.equipment_id == b).count() == 8
+
+
+def test_backfill_keeps_readings_ingested_after_job_creation(client):
+
+    """
+    Live readings that arrive between create_job and run_job land in buckets
+    the job clears; they must still be counted once the job is done. Two
+    pending tools with two workers run on the process pool, whose spawned
+    workers load the rules from app/alerts.py (a monkeypatch would not reach
+    them), so every reading here is a WARNING under the default rules.
+    """
+
+    a = _tool_with_readings(client, "BF-05", n = 5, temperature = 90.0)
+    b = _tool_with_readings(client, "BF-06", n = 4, temperature = 90.0)
+
+    with TestingSessionLocal() as db:
+        job = backfill.create_job(db, equipment_ids = [a, b], chunk_size = 2)
+    for eq_id in (a, b, a):
+        live = {"equipment_id": eq_id, "temperature": 90.0, "pressure": 1.0, "vibration": 0.3}
+        assert client.post("/readings", json = live).status_code == 200
+
+    result = backfill.run_job(TEST_DATABASE_URL, job.id, workers = 2)
+    assert result["status"] == "DONE"
+    assert result["tools_done"] == 2
+
+    for eq_id, n in ((a, 7), (b, 5)):
+        assert len(client.get(f"/equipment/{eq_id}/readings?limit=100").json()) == n
+        rollups = client.get(f"/equipment/{eq_id}/rollups").json()
+        assert sum(r["count"] for r in rollups) == n
+        assert sum(r["warning_count"] for r in rollups) == n
+
+
+def test_backfill_api_reports_progress(client):
+
+    """The API starts a job in the background and reports its progress."""
+
+    eq_id = _tool_with_readings(client, "BF-04", n = 6)
+
+    r = client.post("/backfill", json = {"equipment_ids": [eq_id], "workers": 1})
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    assert r.json()["rows_total"] == 6
+
+    for _ in range(100):
+        progress = client.get(f"/backfill/{job_id}").json()
+        if progress["status"] == "DONE":
+            break
+        time.sleep(0.05)
+    assert progress["status"] == "DONE"
+    assert progress["rows_processed"] == 6
+
+    assert client.get("/backfill/999999").status_code == 404
+    assert client.post(f"/backfill/{job_id}/resume").status_code == 409
+
+
+def test_server_picks_up_backfills_run_by_the_cli(client, monkeypatch):
+
+    """A job run outside the API (python -m app.backfill) refreshes the server's cached health."""
+
+    eq_id = _tool_with_readings(client, "BF-07", n = 10)
+    before = client.get(f"/equipment/{eq_id}/health")
+    assert before.json()["warning_count"] == 0
+
+    seen = {}
+    main.check_backfills(seen)
+
+    monkeypatch.setattr(alerts, "TEMP_WARN", 75.0)
+    with TestingSessionLocal() as db:
+        job = backfill.create_job(db, equipment_ids = [eq_id])
+    backfill.run_job(TEST_DATABASE_URL, job.id, workers = 1)
+
+    # Until the server checks, it keeps serving what it had cached
+    stale = client.get(f"/equipment/{eq_id}/health", headers = {"If-None-Match": before.headers["etag"]})
+    assert stale.status_code == 304
+
+    main.check_backfills(seen)
+    fresh = client.get(f"/equipment/{eq_id}/health", headers = {"If-None-Match": before.headers["etag"]})
+    assert fresh.status_code == 200
+    assert fresh.json()["warning_count"] == 10
+
+    # Nothing new finished: nothing is invalidated
+    etag = fresh.headers["etag"]
+    main.check_backfills(seen)
+    assert client.get(f"/equipment/{eq_id}/health", headers = {"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,112 @@
+"""
+Tests for the response cache on polled read endpoints.
+
+Unchanged polls must be answered from memory (no SQL) and return 304 when
+the client already holds the current ETag; ingest must invalidate.
+"""
+
+from sqlalchemy import event
+
+from app.cache import ResponseCache
+from conftest import engine
+
+
+def test_conditional_get_skips_db_until_ingest(client):
+
+    """
+    A repeat poll with If-None-Match returns 304 without running any SQL;
+    a new reading changes the data version, so the next poll returns 200.
+    """
+
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "CACHE-01", "tool_type": "Metrology", "location": "Fab F - Bay 1"},
+    ).json()["id"]
+
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    for path in (f"/equipment/{eq_id}/health", f"/equipment/{eq_id}", "/dashboard/summary", "/equipment"):
+        r = client.get(path)
+        assert r.status_code == 200
+        assert r.headers["cache-control"] == "no-cache"
+        etag = r.headers["etag"]
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            r = client.get(path, headers = {"If-None-Match": etag})
+            assert r.status_code == 304
+            r = client.get(path)
+            assert r.status_code == 200
+            assert r.headers["etag"] == etag
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert statements == [], path
+
+    r = client.get(f"/equipment/{eq_id}/health")
+    etag = r.headers["etag"]
+    fail_vib = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 1.1}
+    assert client.post("/readings", json = fail_vib).status_code == 200
+
+    r = client.get(f"/equipment/{eq_id}/health", headers = {"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["failure_count"] == 1
+
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] > 0 and stats["misses"] > 0 and stats["not_modified"] > 0
+
+    assert client.get("/equipment/999999").status_code == 404
+
+
+def test_response_cache_is_bounded():
+
+    """Entries beyond the count or byte budget are evicted least-recently-used first."""
+
+    cache = ResponseCache(max_entries = 2, max_bytes = 10)
+    cache.put("a", 1, b"aaaa")
+    cache.put("b", 1, b"bbbb")
+    assert cache.get("a", 1) is not None
+    cache.put("c", 1, b"cccc")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache.put("d", 1, b"dddddddd")
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get("a", 2) is None
+
+
+def test_bulk_health_one_request_for_many_tools(client):
+
+    """
+    GET /health?ids=... returns the same entries as the per-tool endpoint, in
+    request order, and its cached response is invalidated by any listed tool.
+    """
+
+    ids = [
+        client.post(
+            "/equipment",
+            json = {"name": f"BULK-{i}", "tool_type": "CMP", "location": "Fab F - Bay 2"},
+        ).json()["id"]
+        for i in range(3)
+    ]
+    fail_vib = {"equipment_id": ids[1], "temperature": 70.0, "pressure": 1.0, "vibration": 1.1}
+    assert client.post("/readings", json = fail_vib).status_code == 200
+
+    query = {"ids": [ids[2], ids[0], ids[1], ids[0], 999999]}
+    r = client.get("/health", params = query)
+    assert r.status_code == 200
+    assert [h["equipment_id"] for h in r.json()] == [ids[2], ids[0], ids[1]]
+    assert r.json()[2] == client.get(f"/equipment/{ids[1]}/health").json()
+    assert client.get("/health", params = query, headers = {"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    assert client.post("/readings", json = dict(fail_vib, equipment_id = ids[2])).status_code == 200
+    r = client.get("/health", params = query, headers = {"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 200
+    assert r.json()[0]["failure_count"] == 1
+
+    assert client.get("/health").status_code == 422
+    assert client.get("/health", params = {"ids": list(range(1, 1002))}).status_code == 422
@@ -0,0 +1,50 @@
+"""
+Tests for the fleet snapshot endpoint.
+
+The snapshot must reflect ingest incrementally and support conditional GET.
+"""
+
+
+def test_fleet_snapshot_tracks_ingest_and_etag(client):
+
+    """
+    A new tool and its readings show up in the snapshot, and an unchanged
+    poll with If-None-Match returns 304.
+    """
+
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "FLEET-01", "tool_type": "Implant", "location": "Fab E - Bay 1"},
+    ).json()["id"]
+
+    r = client.get("/fleet/snapshot")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    tool = next(t for t in r.json()["tools"] if t["id"] == eq_id)
+    assert tool["latest_reading"] is None
+    assert r.json()["summary"]["total"] == len(r.json()["tools"])
+
+    # Unchanged -> 304 with the same ETag
+    r = client.get("/fleet/snapshot", headers = {"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    # Ingest changes the snapshot
+    fail_vib = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 1.1}
+    for _ in range(3):
+        assert client.post("/readings", json = fail_vib).status_code == 200
+
+    r = client.get("/fleet/snapshot", headers = {"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    tool = next(t for t in r.json()["tools"] if t["id"] == eq_id)
+    assert tool["status"] == "RUN"
+    assert tool["failure_count"] == 3
+    assert tool["level"] == "HIGH"
+    assert tool["latest_reading"]["severity"] == "FAILURE"
+
+    # Same numbers as the per-tool health endpoint
+    health = client.get(f"/equipment/{eq_id}/health?window=50").json()
+    assert (tool["warning_count"], tool["failure_count"], tool["level"]) == (
+        health["warning_count"], health["failure_count"], health["level"]
+    )
@@ -0,0 +1,208 @@
+"""
+Tests for out-of-order ingestion.
+
+Readings carry device timestamps and may arrive in any order. Derived state
+(health window, alert state, rollups) must end up the same as if the
+readings had arrived sorted.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.alerts import evaluate_reading
+from app.health import HealthWindow, level_from_counts
+from conftest import TestingSessionLocal
+from app.ingest import IngestPipeline, latest_readings, pipeline, rollup_row, upsert_rollups, TOO_LATE
+
+
+def _make_readings(eq_id, n, start):
+    rng = random.Random(42)
+    readings = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.7:
+            temp, vib = 70.0, 0.3
+        elif roll < 0.9:
+            temp, vib = 90.0, 0.3
+        else:
+            temp, vib = 70.0, 1.1
+        readings.append({
+            "equipment_id": eq_id,
+            "temperature": temp,
+            "pressure": 1.0,
+            "vibration": vib,
+            "timestamp": (start + timedelta(seconds = i)).isoformat(),
+        })
+    return readings
+
+
+def test_health_window_is_order_independent():
+
+    """
+    A HealthWindow fed a heavily shuffled stream must match one fed in order.
+    """
+
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1)
+    events = [(base + timedelta(seconds = i), i, rng.choice(["NORMAL", "WARNING", "FAILURE"])) for i in range(500)]
+
+    expected = events[-50:]
+    exp_warn = sum(1 for e in expected if e[2] == "WARNING")
+    exp_fail = sum(1 for e in expected if e[2] == "FAILURE")
+
+    for _ in range(5):
+        shuffled = events[:]
+        rng.shuffle(shuffled)
+        w = HealthWindow(50)
+        for ts, rid, sev in shuffled:
+            w.add(ts, rid, sev)
+        # Re-delivery must not double count
+        for ts, rid, sev in shuffled[:100]:
+            w.add(ts, rid, sev)
+
+        assert len(w) == 50
+        assert (w.warning_count, w.failure_count) == (exp_warn, exp_fail)
+        assert w.level == level_from_counts(50, exp_warn, exp_fail)
+
+
+def test_shuffled_ingest_matches_sorted_state(client):
+
+    """
+    Post readings with device timestamps in shuffled order (within the
+    watermark) and verify readings, health, alert state and rollups are
+    computed in event-time order.
+    """
+
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "OOO-01", "tool_type": "CVD", "location": "Fab C - Bay 1"},
+    ).json()["id"]
+
+    start = datetime.utcnow() - timedelta(seconds = 200)
+    readings = _make_readings(eq_id, 180, start)
+    shuffled = readings[:]
+    random.Random(3).shuffle(shuffled)
+
+    for r in shuffled:
+        assert client.post("/readings", json = r).status_code == 200
+
+    # Readings come back newest-first by device time, not arrival
+    got = client.get(f"/equipment/{eq_id}/readings?limit=50").json()
+    assert [g["timestamp"] for g in got] == [r["timestamp"] for r in reversed(readings[-50:])]
+
+    # Health over the incremental window matches a recompute over the sorted tail
+    severities = [evaluate_reading(r["temperature"], r["pressure"], r["vibration"])[0] for r in readings[-50:]]
+    warn = severities.count("WARNING")
+    fail = severities.count("FAILURE")
+    health = client.get(f"/equipment/{eq_id}/health?window=50").json()
+    assert (health["warning_count"], health["failure_count"]) == (warn, fail)
+    assert health["level"] == level_from_counts(50, warn, fail)
+
+    # Alert state follows the newest reading by device time
+    latest = pipeline.state_for(None, eq_id).latest
+    assert latest["timestamp"].isoformat() == readings[-1]["timestamp"]
+
+    # Rollups account for every reading exactly once
+    rollups = client.get(f"/equipment/{eq_id}/rollups?limit=100").json()
+    assert sum(b["count"] for b in rollups) == len(readings)
+    all_sev = [evaluate_reading(r["temperature"], r["pressure"], r["vibration"])[0] for r in readings]
+    assert sum(b["failure_count"] for b in rollups) == all_sev.count("FAILURE")
+
+
+def test_reading_behind_watermark_skips_rollups(client):
+
+    """
+    A reading older than the lateness watermark is stored as raw history
+    but does not reopen a finalized rollup bucket.
+    """
+
+    eq_id = client.post(
+        "/equipment",
+        json = {"name": "OOO-02", "tool_type": "CVD", "location": "Fab C - Bay 2"},
+    ).json()["id"]
+
+    now = datetime.utcnow()
+    fresh = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3,
+             "timestamp": now.isoformat()}
+    stale = dict(fresh, timestamp = (now - pipeline.lateness - timedelta(seconds = 120)).isoformat())
+
+    assert client.post("/readings", json = fresh).status_code == 200
+    before = pipeline.stats[TOO_LATE]
+    assert client.post("/readings", json = stale).status_code == 200
+    assert pipeline.stats[TOO_LATE] == before + 1
+
+    assert len(client.get(f"/equipment/{eq_id}/readings").json()) == 2
+    rollups = client.get(f"/equipment/{eq_id}/rollups").json()
+    assert sum(b["count"] for b in rollups) == 1
+
+    future = dict(fresh, timestamp = (now + timedelta(days = 1)).isoformat())
+    assert client.post("/readings", json = future).status_code == 422
+
+
+def test_warm_all_reads_each_listed_tools_window(client):
+
+    """Bulk warm-up builds the same state as a per-tool warm-up, for the listed tools only."""
+
+    ids = [
+        client.post("/equipment", json = {"name": f"WARM-{i}", "tool_type": "CVD", "location": "Fab C"}).json()["id"]
+        for i in range(3)
+    ]
+    start = datetime.utcnow() - timedelta(seconds = 200)
+    for eq_id, n in zip(ids, (80, 10, 30)):
+        shuffled = _make_readings(eq_id, n, start)
+        random.Random(eq_id).shuffle(shuffled)
+        for r in shuffled:
+            assert client.post("/readings", json = r).status_code == 200
+
+    with TestingSessionLocal() as db:
+        bulk, single = IngestPipeline(window_size = 20), IngestPipeline(window_size = 20)
+        bulk.warm_all(db, ids[:2])
+        for eq_id, size in zip(ids, (20, 10)):
+            warmed, expected = bulk.state_for(None, eq_id), single.state_for(db, eq_id)
+            assert len(warmed.window) == len(expected.window) == size
+            assert (warmed.window.warning_count, warmed.window.failure_count) == \
+                (expected.window.warning_count, expected.window.failure_count)
+            assert warmed.latest == expected.latest
+            assert warmed.max_event_time == expected.max_event_time
+        # Tools that were not asked for are left to state_for()
+        assert ids[2] not in bulk._states
+
+
+def test_rollup_upsert_compiles_for_postgresql():
+
+    """The rollup upsert uses PostgreSQL's ON CONFLICT and greatest()/least() there."""
+
+    class Bind:
+        dialect = postgresql.dialect()
+
+    class Session:
+        def get_bind(self):
+            return Bind()
+
+        def execute(self, stmt):
+            self.sql = str(stmt.compile(dialect = Bind.dialect))
+
+    db = Session()
+    upsert_rollups(db, [rollup_row(1, datetime(2025, 1, 1), 70.0, 1.0, 0.3, "NORMAL")])
+    assert "ON CONFLICT (equipment_id, bucket_start) DO UPDATE" in db.sql
+    assert "greatest(sensor_rollup.temperature_max, excluded.temperature_max)" in db.sql
+    assert "least(sensor_rollup.pressure_min, excluded.pressure_min)" in db.sql
+
+
+def test_warm_up_query_is_bounded_per_tool_on_postgresql():
+
+    """PostgreSQL reads each tool's window through a LATERAL subquery with a LIMIT."""
+
+    class Bind:
+        dialect = postgresql.dialect()
+
+    class Session:
+        def get_bind(self):
+            return Bind()
+
+    sql = str(latest_readings(Session(), [1, 2], 50).compile(dialect = Bind.dialect))
+    assert "JOIN LATERAL" in sql
+    assert "LIMIT" in sql
+    assert "row_number" not in sql
@@ -0,0 +1,99 @@
+"""
+Tests for Alembic schema management.
+
+A fresh database must migrate to the same schema as the models, and a
+database created by the old import-time create_all() must upgrade in place
+without losing rows.
+"""
+
+import multiprocessing
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base, make_engine, run_migrations, serving_lock
+
+
+def test_fresh_database_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    run_migrations(engine)
+
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        assert table.name in insp.get_table_names()
+        assert {c["name"] for c in insp.get_columns(table.name)} == {c.name for c in table.columns}
+        expected = {i.name for i in table.indexes}
+        assert expected <= {i["name"] for i in insp.get_indexes(table.name)}
+
+    # Running again at head is a no-op
+    run_migrations(engine)
+    engine.dispose()
+
+
+def test_legacy_database_is_stamped_and_upgraded(tmp_path):
+
+    """
+    Build the pre-migration schema (revision 0001) without an alembic_version
+    table, as create_all() used to, then upgrade it.
+    """
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    run_migrations(engine, revision = "0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text("INSERT INTO equipment (id, name, tool_type, location, status) VALUES (1, 'ETCH-01', 'Etch', 'Bay 1', 'RUN')"))
+        conn.execute(text("INSERT INTO sensor_reading (id, equipment_id, temperature, pressure, vibration, timestamp) "
+                          "VALUES (1, 1, 70.0, 1.0, 0.3, :ts)"), {"ts": datetime(2025, 1, 1)})
+        conn.execute(text("INSERT INTO alerts (id, equipment_id, severity, reason, create_at) "
+                          "VALUES (1, 1, 'NORMAL', 'Within limits', :ts)"), {"ts": datetime(2025, 1, 1)})
+
+    run_migrations(engine)
+
+    insp = inspect(engine)
+    assert "reading_id" in {c["name"] for c in insp.get_columns("alerts")}
+    assert "received_at" in {c["name"] for c in insp.get_columns("sensor_reading")}
+    assert {"sensor_rollup", "backfill_job", "backfill_checkpoint"} <= set(insp.get_table_names())
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0003"
+        assert conn.execute(text("SELECT count(*) FROM alerts WHERE reading_id IS NULL")).scalar() == 1
+        assert conn.execute(text("SELECT name FROM equipment")).scalar() == "ETCH-01"
+    engine.dispose()
+
+
+def _migrate(url):
+    engine = make_engine(url)
+    try:
+        run_migrations(engine)
+    finally:
+        engine.dispose()
+
+
+def test_concurrent_workers_migrate_a_fresh_database_once(tmp_path):
+
+    """Several worker processes starting on a fresh database all come up."""
+
+    url = f"sqlite:///{tmp_path / 'workers.db'}"
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target = _migrate, args = (url,)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * 4
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM alembic_version")).scalar() == 1
+    engine.dispose()
+
+
+def test_second_server_on_a_database_refuses_to_start(tmp_path):
+    url = f"sqlite:///{tmp_path / 'served.db'}"
+    with serving_lock(url):
+        with pytest.raises(RuntimeError, match = "single worker"):
+            with serving_lock(url):
+                pass
+    # Released when the first server stops
+    with serving_lock(url):
+        pass
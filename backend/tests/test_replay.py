@@ -0,0 +1,147 @@
+"""
+Tests for the telemetry replay tool.
+
+A replay must deliver every recorded reading in per-tool order, follow the
+recorded schedule scaled by the speed factor, and report alert latency.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import replay
+from app.models import SensorReading
+from conftest import TEST_DATABASE_URL, TestingSessionLocal
+
+
+def _write_trace(path, tool_ids, n = 20, span_seconds = 10.0):
+    start = datetime(2025, 3, 1, 8, 0, 0)
+    lines = ["id,equipment_id,timestamp,temperature,pressure,vibration,received_at"]
+    rid = 1
+    for i in range(n):
+        for eq_id in tool_ids:
+            arrival = start + timedelta(seconds = span_seconds * i / n)
+            # Every 5th reading was uploaded 30 s late; every 4th is a FAILURE
+            ts = arrival - timedelta(seconds = 30 if i % 5 == 0 else 0)
+            vibration = 1.1 if i % 4 == 0 else 0.3
+            lines.append(f"{rid},{eq_id},{ts.isoformat()},70.0,1.0,{vibration},{arrival.isoformat()}")
+            rid += 1
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _create(client, name):
+    return client.post("/equipment", json = {"name": name, "tool_type": "Etch", "location": "Fab R"}).json()["id"]
+
+
+def test_replay_in_process_keeps_order_and_schedule(client, tmp_path):
+    tools = [_create(client, "REPLAY-A"), _create(client, "REPLAY-B")]
+    trace = tmp_path / "trace.csv"
+    _write_trace(trace, tools, n = 20, span_seconds = 10.0)
+
+    report = replay.replay(replay.read_csv([str(trace)]), replay.InProcessTarget(), speed = 50, workers = 2)
+
+    assert report["readings"] == 40
+    assert report["ok"] == 40
+    assert report["errors"] == {}
+    # 10 s of trace at 50x takes at least 0.19 s (last arrival is at 9.5 s)
+    assert report["elapsed_seconds"] >= 9.5 / 50
+    assert report["alerts"] == 10
+    assert report["alert_latency_ms"]["p50"] is not None
+
+    # Readings were stored in recorded order for each tool
+    with TestingSessionLocal() as db:
+        for eq_id in tools:
+            rows = db.query(SensorReading).filter(SensorReading.equipment_id == eq_id).order_by(SensorReading.id).all()
+            assert len(rows) == 20
+            assert [r.vibration for r in rows] == [1.1 if i % 4 == 0 else 0.3 for i in range(20)]
+            # Late uploads keep their recorded lag
+            lag = (rows[0].received_at - rows[0].timestamp).total_seconds()
+            assert lag == pytest.approx(30, abs = 1)
+
+
+def test_replay_from_database_source(client, tmp_path):
+    eq_id = _create(client, "REPLAY-C")
+    trace = tmp_path / "trace.csv"
+    _write_trace(trace, [eq_id], n = 10, span_seconds = 1.0)
+    replay.replay(replay.read_csv([str(trace)]), replay.InProcessTarget(), speed = 1000)
+
+    # The readings just stored are themselves a recording that can be replayed
+    recorded = list(replay.read_database(TEST_DATABASE_URL, equipment_ids = [eq_id]))
+    assert len(recorded) == 10
+    assert [r.arrival for r in recorded] == sorted(r.arrival for r in recorded)
+
+    with pytest.raises(ValueError):
+        replay.replay(iter(recorded), replay.InProcessTarget(), speed = 5000)
+
+
+def test_export_csv_keeps_arrival_times(client, tmp_path):
+
+    """A /readings/export file replays on its recorded arrival schedule, not device time."""
+
+    eq_id = _create(client, "REPLAY-D")
+    late = datetime.utcnow() - timedelta(seconds = 30)
+    r = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 0.3, "timestamp": late.isoformat()}
+    assert client.post("/readings", json = r).status_code == 200
+
+    export = tmp_path / "export.csv"
+    export.write_text(client.get(f"/equipment/{eq_id}/readings/export").text)
+    [recorded] = list(replay.read_csv([str(export)]))
+    assert (recorded.arrival - recorded.timestamp).total_seconds() == pytest.approx(30, abs = 1)
+
+
+
+class SheddingTarget:
+
+    """Answers 429 to every reading's first send, like an admission-limited server."""
+
+    def __init__(self):
+        self.sent = []
+
+    def sender(self):
+        def send(payload):
+            self.sent.append(payload["vibration"])
+            shed = self.sent.count(payload["vibration"]) == 1
+            return (429, 0.01) if shed else (200, None)
+        return send
+
+
+def test_replay_retries_shed_readings_after_retry_after(tmp_path):
+    trace = tmp_path / "trace.csv"
+    _write_trace(trace, [1], n = 2, span_seconds = 0.1)
+
+    target = SheddingTarget()
+    report = replay.replay(replay.read_csv([str(trace)]), target, speed = 1000, workers = 1)
+    assert report["ok"] == 2
+    assert report["retried"] == 2
+    # Each reading is resent before the tool's next one
+    assert target.sent == [1.1, 1.1, 0.3, 0.3]
+
+    report = replay.replay(replay.read_csv([str(trace)]), SheddingTarget(), speed = 1000, retries = 0)
+    assert report["errors"] == {"429": 2}
+
+
+class FailingTarget:
+
+    """Raises on every other send, like a database that keeps locking up."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def sender(self):
+        def send(payload):
+            self.calls += 1
+            if self.calls % 2:
+                raise ConnectionError("database is locked")
+            return 200, None
+        return send
+
+
+def test_replay_reports_send_failures_and_finishes(tmp_path):
+    # More readings than a sender queue holds, so a dead sender would block the reader
+    trace = tmp_path / "trace.csv"
+    _write_trace(trace, [1], n = 2500, span_seconds = 0.5)
+
+    report = replay.replay(replay.read_csv([str(trace)]), FailingTarget(), speed = 1000, workers = 1)
+    assert report["readings"] == 2500
+    assert report["ok"] == 1250
+    assert report["errors"] == {"ConnectionError": 1250}
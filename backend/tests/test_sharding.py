@@ -0,0 +1,103 @@
+"""
+Tests for sharded telemetry storage.
+
+Readings and alerts must land on each tool's home shard, and fleet-wide
+endpoints must merge results from every shard.
+"""
+
+import pytest
+
+from app import main
+from app.fleet import fleet
+from app.ingest import pipeline
+from app.models import Equipment, SensorReading
+from app.sharding import ShardRouter, location_shard
+from conftest import TestingSessionLocal
+
+
+@pytest.fixture()
+def sharded(client, tmp_path, monkeypatch):
+
+    """Three shards in temp files, swapped in for the main database's telemetry."""
+
+    def locate(equipment_id):
+        with TestingSessionLocal() as db:
+            eq = db.get(Equipment, equipment_id)
+            return (eq is not None, eq.location if eq is not None else None)
+
+    def make(key):
+        router = ShardRouter([f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(3)], key, locate)
+        router.migrate()
+        monkeypatch.setattr(main, "shards", router)
+        routers.append(router)
+        return router
+
+    routers = []
+    pipeline.reset()
+    fleet.reset()
+    yield make
+    pipeline.reset()
+    fleet.reset()
+    for router in routers:
+        router.dispose()
+
+
+def _create(client, name, location):
+    return client.post(
+        "/equipment", json = {"name": name, "tool_type": "CVD", "location": location}
+    ).json()["id"]
+
+
+def test_ingest_routes_to_home_shard_and_fleet_queries_merge(client, sharded):
+    router = sharded("equipment")
+    ids = [_create(client, f"SHARD-{i}", "Fab S - Bay 1") for i in range(6)]
+
+    for eq_id in ids:
+        r = client.post("/readings", json = {"equipment_id": eq_id, "temperature": 70.0, "pressure": 1.0, "vibration": 1.1})
+        assert r.status_code == 200
+
+    # Telemetry lives only on the home shard, never in the main database
+    for eq_id in ids:
+        home = router.shard_for(eq_id)
+        for shard in range(len(router)):
+            with router.session(shard) as db:
+                n = db.query(SensorReading).filter(SensorReading.equipment_id == eq_id).count()
+            assert n == (1 if shard == home else 0)
+    with TestingSessionLocal() as db:
+        assert db.query(SensorReading).filter(SensorReading.equipment_id.in_(ids)).count() == 0
+
+    # Per-tool reads go to the home shard
+    assert len(client.get(f"/equipment/{ids[0]}/readings").json()) == 1
+    assert client.get(f"/equipment/{ids[0]}").json()["status"] == "RUN"
+
+    # Fleet-wide reads merge every shard
+    assert {e["id"] for e in client.get("/equipment").json()} == set(ids)
+    failures = client.get("/alerts/failure?limit=4").json()
+    assert len(failures) == 4
+    assert [a["create_at"] for a in failures] == sorted((a["create_at"] for a in failures), reverse = True)
+
+    bulk = client.get("/health", params = {"ids": ids[::-1]}).json()
+    assert [h["equipment_id"] for h in bulk] == ids[::-1]
+    assert all(h["failure_count"] == 1 for h in bulk)
+
+    summary = client.get("/dashboard/summary").json()
+    assert summary["total"] == 6
+    assert summary["run"] == 6
+
+    snapshot = client.get("/fleet/snapshot").json()
+    assert {t["id"] for t in snapshot["tools"]} == set(ids)
+
+    assert client.post("/backfill", json = {}).status_code == 409
+
+
+def test_location_key_keeps_a_bay_on_one_shard(client, sharded):
+    router = sharded("location")
+    bay = "Fab S - Bay 7"
+    ids = [_create(client, f"BAY-{i}", bay) for i in range(3)]
+
+    assert {router.shard_for(eq_id) for eq_id in ids} == {location_shard(bay, 3)}
+
+    # A fresh router finds the home shard through the registry
+    router._homes.clear()
+    assert router.shard_for(ids[0]) == location_shard(bay, 3)
+    assert client.get("/equipment/999999/readings").status_code == 404
@@ -10,8 +10,34 @@ const API_BASE = import.meta.env.VITE_API_BASE_URL;
  * Design goal:
  * - Every function either returns JSON, or throws a readable Error message
  *   that the UI can display (and allow Retry).
+ *
+ * Data layer (shared by every page):
+ * - identical GETs that are in flight at the same time share one fetch
+ * - responses are cached per URL; within its staleness window a response is
+ *   reused without asking the backend, after that it is revalidated with
+ *   If-None-Match (the backend answers 304 when nothing changed)
+ * - callers pass an AbortSignal; a shared fetch is aborted once every caller
+ *   waiting on it has aborted (e.g. the user navigated away)
+ * - fetchHealth calls made in the same tick are batched into GET /health?ids=...
+ *   requests of at most HEALTH_BULK_MAX_IDS tools
+ * - health and summary calls without a window use the backend's HEALTH_WINDOW
  */
 
+// How long (ms) a cached response is used without revalidating.
+const STALE_MS = {
+    equipment: 30_000,
+    readings: 5_000,
+    health: 5_000,
+    summary: 5_000,
+    snapshot: 2_000,
+};
+
+// Most ids one GET /health accepts (backend HEALTH_BULK_MAX_IDS)
+const HEALTH_BULK_MAX_IDS = 1000;
+
+const cache = new Map(); // url -> { data, etag, fetchedAt }
+const inflight = new Map(); // url -> { promise, controller, waiting }
+
 async function asError(res, context) {
     // Use text() because FastAPI error bodies are usually JSON, but sometimes
     // proxy/network errors return empty bodies or HTML.
@@ -19,12 +45,6 @@ async function asError(res, context) {
     return new Error(`${context} failed (${res.status}): ${text || res.statusText}`);
 }
 
-async function expectJson(res, context) {
-    // Centralized response check so pages stay simple.
-    if (!res.ok) throw await asError(res, context);
-    return res.json();
-}
-
 function withNetworkHint(err) {
     // Browser-level failures often appear as "Failed to fetch"
     // (e.g., backend stopped or proxy cannot connect).
@@ -37,50 +57,192 @@ function withNetworkHint(err) {
     return err;
 }
 
-export async function fetchEquipment() {
-    // List all tools for the Equipment List page
-    try {
-        const res = await fetch(`/api/equipment`);
-        return await expectJson(res, "GET /equipment");
-    } catch (e){
-        throw withNetworkHint(e);
-    }   
+function abortError() {
+    return new DOMException("The request was aborted", "AbortError");
 }
 
-export async function fetchEquipmentById(id) {
-    // Fetch tool metadata for the Equipment Detail page
-    try{
-        const res = await fetch(`/api/equipment/${id}`);
-        return await expectJson(res, `GET /equipment/${id}`);
-    } catch (e) {
-        throw withNetworkHint(e);
+export function isAbortError(e) {
+    // Pages ignore these: the result is no longer wanted.
+    return e?.name === "AbortError";
+}
+
+async function revalidate(url, context, controller) {
+    // One network round trip for `url`, conditional when we hold an ETag.
+    const cached = cache.get(url);
+    const headers = cached?.etag ? { "If-None-Match": cached.etag } : {};
+    const res = await fetch(url, { headers, signal: controller.signal });
+
+    if (res.status === 304 && cached) {
+        cached.fetchedAt = Date.now();
+        return cached.data;
     }
+    if (!res.ok) throw await asError(res, context);
+
+    const data = await res.json();
+    cache.set(url, { data, etag: res.headers.get("ETag"), fetchedAt: Date.now() });
+    return data;
 }
 
-export async function fetchReadings(id, limit = 50) {
-    // Fetch most recent sensor readings (latest first) for table/chart display
-    try{
-        const res = await fetch(`/api/equipment/${id}/readings?limit=${limit}`);
-        return await expectJson(res, `GET / equipment/${id}/readings`);
-    } catch (e) {
-        throw withNetworkHint(e);
+function getJson(path, { context, maxAge = 0, force = false, signal } = {}) {
+    /**
+     * Cached, deduplicated GET.
+     *
+     * `force` skips the staleness window (Refresh buttons) but still
+     * revalidates with the ETag, so an unchanged resource costs a 304.
+     */
+    const url = `/api${path}`;
+    context = context || `GET ${path}`;
+
+    const cached = cache.get(url);
+    if (!force && cached && Date.now() - cached.fetchedAt < maxAge) {
+        return Promise.resolve(cached.data);
     }
+    if (signal?.aborted) return Promise.reject(abortError());
+
+    let entry = inflight.get(url);
+    if (!entry) {
+        const controller = new AbortController();
+        entry = { controller, waiting: 0 };
+        entry.promise = revalidate(url, context, controller)
+            .catch((e) => { throw withNetworkHint(e); })
+            .finally(() => { if (inflight.get(url) === entry) inflight.delete(url); });
+        inflight.set(url, entry);
+    }
+    entry.waiting += 1;
+
+    return new Promise((resolve, reject) => {
+        let done = false;
+        const leave = () => {
+            if (done) return;
+            done = true;
+            signal?.removeEventListener("abort", onAbort);
+        };
+        const onAbort = () => {
+            if (done) return;
+            leave();
+            entry.waiting -= 1;
+            if (entry.waiting === 0) {
+                // Nobody wants it any more; later callers start a fresh fetch
+                if (inflight.get(url) === entry) inflight.delete(url);
+                entry.controller.abort();
+            }
+            reject(abortError());
+        };
+        signal?.addEventListener("abort", onAbort);
+        entry.promise.then(
+            (data) => { if (!done) { leave(); resolve(data); } },
+            (e) => { if (!done) { leave(); reject(e); } },
+        );
+    });
 }
 
-export async function fetchHealth(id, window = 50) {
-    try {
-        const res = await fetch(`/api/equipment/${id}/health?window=${window}`);
-        return await expectJson(res, `GET / equipment/${id}/health`);
-    } catch (e) {
-        throw withNetworkHint(e);
+export function invalidate(prefix = "") {
+    // Drop cached responses whose path starts with `prefix` (e.g. after a write).
+    for (const url of cache.keys()) {
+        if (url.startsWith(`/api${prefix}`)) cache.delete(url);
     }
 }
 
-export async function fetchDashboardSummary(window = 50) {
-    const res = await fetch(`/api/dashboard/summary?window=${window}`);
-    if (!res.ok) {
-        const text = await res.text();
-        throw new Error(`GET /dashboard/summary failed (${res.status}): ${text}`);
+export function fetchEquipment({ signal, force } = {}) {
+    // List all tools for the Equipment List page
+    return getJson(`/equipment`, { maxAge: STALE_MS.equipment, signal, force });
+}
+
+export function fetchEquipmentById(id, { signal, force } = {}) {
+    // Fetch tool metadata for the Equipment Detail page
+    return getJson(`/equipment/${id}`, { maxAge: STALE_MS.equipment, signal, force });
+}
+
+export function fetchReadings(id, limit = 50, { signal, force } = {}) {
+    // Fetch most recent sensor readings (latest first) for table/chart display
+    return getJson(`/equipment/${id}/readings?limit=${limit}`, {
+        context: `GET /equipment/${id}/readings`, maxAge: STALE_MS.readings, signal, force,
+    });
+}
+
+export function fetchHealthMany(ids, window, { signal, force } = {}) {
+    // Health of many tools in one request; ids are sorted so equal sets share a cache entry.
+    const params = new URLSearchParams();
+    if (window != null) params.set("window", String(window));
+    [...new Set(ids)].sort((a, b) => a - b).forEach((id) => params.append("ids", String(id)));
+    return getJson(`/health?${params}`, {
+        context: "GET /health", maxAge: STALE_MS.health, signal, force,
+    });
+}
+
+// fetchHealth calls waiting for the next tick, per window size (undefined = server default)
+const healthBatches = new Map();
+
+function chunks(items, size) {
+    const out = [];
+    for (let i = 0; i < items.length; i += size) out.push(items.slice(i, i + size));
+    return out;
+}
+
+export function fetchHealth(id, window, { signal, force } = {}) {
+    /**
+     * Health of one tool. Calls made in the same tick share bulk requests,
+     * so rendering N tools costs ceil(N / HEALTH_BULK_MAX_IDS) GET /health
+     * instead of N.
+     */
+    let batch = healthBatches.get(window);
+    if (!batch) {
+        batch = { ids: new Set(), controller: new AbortController(), waiting: 0, force: false };
+        batch.promise = new Promise((resolve) => setTimeout(resolve, 0)).then(() => {
+            healthBatches.delete(window);
+            const opts = { signal: batch.controller.signal, force: batch.force };
+            const ids = [...batch.ids].sort((a, b) => a - b);
+            return Promise.all(chunks(ids, HEALTH_BULK_MAX_IDS).map((part) => fetchHealthMany(part, window, opts)))
+                .then((parts) => parts.flat());
+        });
+        healthBatches.set(window, batch);
     }
-    return await res.json();
-}
\ No newline at end of file
+    batch.ids.add(id);
+    batch.force = batch.force || Boolean(force);
+    batch.waiting += 1;
+
+    return new Promise((resolve, reject) => {
+        let done = false;
+        const onAbort = () => {
+            if (done) return;
+            done = true;
+            batch.waiting -= 1;
+            if (batch.waiting === 0) {
+                // Nobody wants it any more; later callers start a fresh batch
+                if (healthBatches.get(window) === batch) healthBatches.delete(window);
+                batch.controller.abort();
+            }
+            reject(abortError());
+        };
+        if (signal?.aborted) return onAbort();
+        signal?.addEventListener("abort", onAbort);
+        batch.promise.then(
+            (rows) => {
+                if (done) return;
+                done = true;
+                signal?.removeEventListener("abort", onAbort);
+                const health = rows.find((h) => h.equipment_id === id);
+                if (health) resolve(health);
+                else reject(new Error(`GET /equipment/${id}/health failed (404): Equipment not found`));
+            },
+            (e) => {
+                if (done) return;
+                done = true;
+                signal?.removeEventListener("abort", onAbort);
+                reject(e);
+            },
+        );
+    });
+}
+
+export function fetchDashboardSummary(window, { signal, force } = {}) {
+    const query = window != null ? `?window=${window}` : "";
+    return getJson(`/dashboard/summary${query}`, {
+        context: "GET /dashboard/summary", maxAge: STALE_MS.summary, signal, force,
+    });
+}
+
+export function fetchFleetSnapshot({ signal, force } = {}) {
+    // One call for every tool's status, health and latest reading (Dashboard).
+    return getJson(`/fleet/snapshot`, { maxAge: STALE_MS.snapshot, signal, force });
+}
@@ -1,6 +1,6 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { Link } from "react-router-dom";
-import { fetchEquipment, fetchHealth, fetchDashboardSummary } from "../api";
+import { fetchFleetSnapshot, isAbortError } from "../api";
 import Nav from "../components/Nav";
 import Loading from "../components/Loading";
 import ErrorBox from "../components/ErrorBox";
@@ -19,46 +19,44 @@ export default function Dashboard() {
   const [loading, setLoading] = useState(false);
   const [err, setErr] = useState("");
   const [summary, setSummary] = useState(null);
+  const active = useRef(null); // AbortController of the current load
+
+  const load = async (force = false) => {
+    // A new load (or leaving the page) cancels the previous one.
+    active.current?.abort();
+    const controller = new AbortController();
+    active.current = controller;
 
-  const load = async () => {
     setLoading(true);
     setErr("");
     try {
-      const equipment = await fetchEquipment();
-
-      const s = await fetchDashboardSummary(50);
-      setSummary(s);
-
-      // Fetch health in parallel; if one fails, keep dashboard alive.
-      const healthList = await Promise.all(
-        // equipment.map(async (eq, i) => {
-        //   const idToUse = i === 0 ? 999999 : eq.id;
-        //   return await fetchHealth(idToUse, 50);
-        // }),
-        equipment.map(async (eq) => {
-          try {
-            return await fetchHealth(eq.id, 50);
-          } catch (e) {
-            return { equipment_id: eq.id, level: "UNKNOWN", warning_count: null, failure_count: null, error: e?.message };
-          }
-        })
-      );
-
-      const merged = equipment.map((eq) => {
-        const h = healthList.find((x) => x.equipment_id === eq.id);
-        return { ...eq, health: h };
-      });
+      // Single request: summary + per-tool health come from the fleet snapshot.
+      // Cached by the data layer; Refresh revalidates with the ETag (304 if unchanged).
+      const snapshot = await fetchFleetSnapshot({ signal: controller.signal, force });
+      setSummary(snapshot.summary);
+
+      const merged = snapshot.tools.map((t) => ({
+        ...t,
+        health: {
+          equipment_id: t.id,
+          level: t.level,
+          warning_count: t.warning_count,
+          failure_count: t.failure_count,
+        },
+      }));
 
       setRows(merged);
     } catch (e) {
+      if (isAbortError(e)) return;
       setErr(e?.message || "Failed to load dashboard");
     } finally {
-      setLoading(false);
+      if (active.current === controller) setLoading(false);
     }
   };
 
   useEffect(() => {
     load();
+    return () => active.current?.abort();
   }, []);
 
   return (
@@ -68,7 +66,7 @@ export default function Dashboard() {
       <div style={{ display: "flex", alignItems: "center", gap: 12, marginBottom: 12 }}>
         <h1 style={{ margin: 0 }}>Dashboard</h1>
         <button
-          onClick={load}
+          onClick={() => load(true)}
           style={{
             marginLeft: "auto",
             padding: "8px 12px",
@@ -86,7 +84,7 @@ export default function Dashboard() {
       {loading && <Loading label="Loading dashboard..." />}
 
       {!loading && err && (
-        <ErrorBox title="Could not load dashboard" message={err} onRetry={load} />
+        <ErrorBox title="Could not load dashboard" message={err} onRetry={() => load(true)} />
       )}
 
       {!loading && !err && rows.length === 0 && (
@@ -10,9 +10,9 @@
  */
 
 
-import { use, useEffect, useMemo, useState } from "react";
+import { use, useEffect, useMemo, useRef, useState } from "react";
 import {Link, useParams } from "react-router-dom";
-import { fetchEquipmentById, fetchReadings } from "../api";
+import { fetchEquipmentById, fetchHealth, fetchReadings, isAbortError } from "../api";
 import Nav from "../components/Nav";
 import Loading from "../components/Loading";
 import ErrorBox from "../components/ErrorBox";
@@ -29,36 +29,62 @@ export default function EquipmentDetail() {
     const equipmentId = useMemo(() => Number(id), [id]);
 
     const [eq, setEq] = useState(null);
+    const [health, setHealth] = useState(null);
+    const [healthErr, setHealthErr] = useState("");
     const [readings, setReadings] = useState([]);
     const [limit, setLimit] = useState(50);
 
     const [loading, setLoading] = useState(true);
     const [err, setErr] = useState("");
+    const active = useRef(null); // AbortController of the current load
 
-    const load = async () => {
+    const load = async (force = false) => {
     if (!Number.isFinite(equipmentId)) {
       setErr(`Invalid equipment id: ${id}`);
       return;
     }
 
+    // Switching tools, changing the limit or leaving the page cancels the previous load.
+    active.current?.abort();
+    const controller = new AbortController();
+    active.current = controller;
+    const opts = { signal: controller.signal, force };
+
     setLoading(true);
     setErr("");
     try {
-      const [eqData, readingsData] = await Promise.all([
-        fetchEquipmentById(equipmentId),
-        fetchReadings(equipmentId, limit),
+      // Health is optional: if it fails, the tool and its readings still render.
+      const [eqRes, healthRes, readingsRes] = await Promise.allSettled([
+        fetchEquipmentById(equipmentId, opts),
+        fetchHealth(equipmentId, undefined, opts),
+        fetchReadings(equipmentId, limit, opts),
       ]);
-      setEq(eqData);
-      setReadings(readingsData);
-    } catch (e) {
-      setErr(e?.message || "Failed to load equipment detail");
+      if (controller.signal.aborted) return;
+
+      const failed = [eqRes, readingsRes].find((r) => r.status === "rejected");
+      if (failed) {
+        if (!isAbortError(failed.reason)) {
+          setErr(failed.reason?.message || "Failed to load equipment detail");
+        }
+        return;
+      }
+      setEq(eqRes.value);
+      setReadings(readingsRes.value);
+      if (healthRes.status === "fulfilled") {
+        setHealth(healthRes.value);
+        setHealthErr("");
+      } else {
+        setHealth(null);
+        setHealthErr(isAbortError(healthRes.reason) ? "" : healthRes.reason?.message || "unavailable");
+      }
     } finally {
-      setLoading(false);
+      if (active.current === controller) setLoading(false);
     }
   };
 
   useEffect(() => {
     load();
+    return () => active.current?.abort();
   }, [equipmentId, limit]);
 
   return (
@@ -79,7 +105,7 @@ export default function EquipmentDetail() {
         </label>
 
         <button
-          onClick={load}
+          onClick={() => load(true)}
           style={{
             padding: "8px 12px",
             borderRadius: 10,
@@ -96,7 +122,7 @@ export default function EquipmentDetail() {
       {loading && <Loading label="Loading equipment detail..." />}
 
       {!loading && err && (
-        <ErrorBox title="Could not load equipment detail" message={err} onRetry={load} />
+        <ErrorBox title="Could not load equipment detail" message={err} onRetry={() => load(true)} />
       )}
 
       {!loading && !err && eq && (
@@ -106,6 +132,17 @@ export default function EquipmentDetail() {
           </h1>
           <div style={{ opacity: 0.85, marginBottom: 18 }}>
             <b>Tool Type:</b> {eq.tool_type} &nbsp;•&nbsp; <b>Location:</b> {eq.location}
+            {health && (
+              <>
+                &nbsp;•&nbsp; <b>Health:</b> {health.level} ({health.warning_count} warnings,{" "}
+                {health.failure_count} failures in last {health.window})
+              </>
+            )}
+            {!health && healthErr && (
+              <>
+                &nbsp;•&nbsp; <b>Health:</b> <span title={healthErr}>unavailable</span>
+              </>
+            )}
           </div>
 
           <div style={{ display: "flex", gap: 12, alignItems: "center", marginBottom: 10 }}>
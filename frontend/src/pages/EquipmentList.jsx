@@ -9,9 +9,9 @@
  * - GET /equipment (via frontend proxy /api/equipment)
  */
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link } from "react-router-dom";
-import { fetchEquipment } from "../api";
+import { fetchEquipment, isAbortError } from "../api";
 import Nav from "../components/Nav";
 import Loading from "../components/Loading";
 import ErrorBox from "../components/ErrorBox";
@@ -29,22 +29,29 @@ export default function EquipmentList() {
   const [items, setItems] = useState([]);
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState("");
+  const active = useRef(null); // AbortController of the current load
+
+  const load = async (force = false) => {
+    active.current?.abort();
+    const controller = new AbortController();
+    active.current = controller;
 
-  const load = async () => {
     setLoading(true);
     setErr("");
     try {
-      const data = await fetchEquipment();
+      const data = await fetchEquipment({ signal: controller.signal, force });
       setItems(data);
     } catch (e) {
+      if (isAbortError(e)) return;
       setErr(e?.message || "Failed to load equipment");
     } finally {
-      setLoading(false);
+      if (active.current === controller) setLoading(false);
     }
   };
 
   useEffect(() => {
     load();
+    return () => active.current?.abort();
   }, []);
 
   return (
@@ -54,7 +61,7 @@ export default function EquipmentList() {
       <div style={{ display: "flex", alignItems: "center", gap: 12, marginBottom: 8 }}>
         <h1 style={{ margin: 0 }}>Equipment</h1>
         <button
-          onClick={load}
+          onClick={() => load(true)}
           style={{
             marginLeft: "auto",
             padding: "8px 12px",
@@ -72,7 +79,7 @@ export default function EquipmentList() {
       {loading && <Loading label="Loading equipment..." />}
 
       {!loading && err && (
-        <ErrorBox title="Could not load equipment" message={err} onRetry={load} />
+        <ErrorBox title="Could not load equipment" message={err} onRetry={() => load(true)} />
       )}
 
       {!loading && !err && items.length === 0 && (